@@ -6,6 +6,7 @@ from pythonjsonlogger import jsonlogger
 
 from lambdas.arithmetic_operation_worker.processor import ArithmeticOperationWorkerProcessor
 from shared.crud_service import CrudService
+from shared.sqs_utils import get_batch_item_failures
 
 # environment variables
 LOGGING_LEVEL = os.environ.get('LOGGING_LEVEL', 'INFO')
@@ -27,23 +28,27 @@ crud_service = CrudService(logger=logger,
                            table=table)
 
 
-def handler(event: dict, context: dict) -> None:
+def handler(event: dict, context: dict) -> dict:
     """
     Arithmetic Operation Worker Lambda.
     This lambda is triggered by messages in the Arithmetic Operation SQS Queue and
     is responsible for performing all arithmetic operations (addition, subtraction,
     multiplication, division, and square_root).
 
-    If the user has a record history but does not have sufficient funds, it drops the
-    message and gets ready to process others.
+    The operation cost is deducted from the user Balance item (users without a Balance
+    item get one initialized from their record history or the initial credit). If the
+    user does not have sufficient funds, the message is not processed.
 
-    Otherwise, if the user does NOT have a record history (first operation) or the
-    user has sufficient balance to cover for the operation cost, it performs the
-    operation, deducts the operation cost from the balance, and saves a new
-    Record with the results into the DynamoDB table.
+    Otherwise, it saves a new Record with the results into the DynamoDB table in the same
+    transaction as the resulting balance and the updates of the user Stats and hourly,
+    daily and monthly Rollups.
+
+    The messages of a batch are grouped by user so each user's balance is read and
+    written once per batch. Redelivered messages whose Record already exists are skipped,
+    and only the messages that failed are reported back to SQS to be retried.
     """
     processor = ArithmeticOperationWorkerProcessor(logger=logger,
                                                    crud_service=crud_service)
 
-    for item in event.get('Records', []):
-        processor.process_arithmetic_operation_event(event=item)
+    failed_message_ids = processor.process_arithmetic_operation_events(events=event.get('Records', []))
+    return get_batch_item_failures(message_ids=failed_message_ids)
@@ -1,15 +1,14 @@
 from logging import Logger
-from typing import Union
+from typing import Union, List, Tuple
 
 from shared.date_utils import get_js_utc_now
-from shared.arithmetic_utils import OPERATION_MAP
+from shared.arithmetic_utils import perform_arithmetic_operation
+from shared.balance_utils import get_or_initialize_user_balance, save_user_records
 from shared.crud_service import CrudService
-from shared.json_utils import json_string_to_dict
-from shared.models.operation_model import Operation, OperationType
-from shared.models.record_model import RecordOUT, RecordIN, DEFAULT_INITIAL_USER_BALANCE
-from shared.record_utils import get_user_most_recent_record, is_user_first_operation, check_user_has_sufficient_balance
-
-SINGLE_NUMBER_OPERATIONS = [OperationType.SQUARE_ROOT]
+from shared.models.operation_model import Operation
+from shared.models.record_model import RecordIN
+from shared.record_utils import get_saved_record_ids
+from shared.sqs_utils import group_messages_by_user
 
 
 class ArithmeticOperationWorkerProcessor:
@@ -20,31 +19,73 @@ class ArithmeticOperationWorkerProcessor:
         self.logger = logger
         self.crud_service = crud_service
 
-    def process_arithmetic_operation_event(self, event: dict) -> None:
-        body = json_string_to_dict(event.get('body', '{}'))
-        record_id = body.get('record_id')
-        user_id = body.get('user_id')
-        num1 = body.get('num1')
-        num2 = body.get('num2')
-        single_number = body.get('single_number')
-        operation_in = body.get('operation', {})
-        operation = Operation(**operation_in)
+    def process_arithmetic_operation_events(self, events: List[dict]) -> List[str]:
+        """
+        Processes a batch of SQS messages grouped by user. Each user's balance is read once,
+        the operation costs are deducted in order in memory, and the resulting balance and
+        Records are persisted together in a transaction.
+        Messages without sufficient funds are dropped, messages whose Record already exists
+        (redeliveries) are skipped.
+        :param events: SQS records of the Lambda event
+        :return: IDs of the messages that failed and should be retried
+        """
+        messages_by_user, failed_message_ids = group_messages_by_user(logger=self.logger,
+                                                                      events=events)
+        for user_id, user_messages in messages_by_user.items():
+            try:
+                failed_message_ids.extend(self._process_user_arithmetic_operation_events(user_id=user_id,
+                                                                                         user_messages=user_messages))
+            except Exception as err:
+                self.logger.exception(f"Could not process messages for User {user_id}",
+                                      extra={'Exception': err})
+                failed_message_ids.extend(event.get('messageId') for event, _ in user_messages)
+        return failed_message_ids
 
-        self.logger.info(f"Processing Arithmetic Operation event for User {user_id}",
-                         extra={'RecordId': record_id, 'Operation': operation.dict()})
-        user_records_db = get_user_most_recent_record(crud_service=self.crud_service,
-                                                      user_id=user_id)
+    def _process_user_arithmetic_operation_events(self,
+                                                  user_id: str,
+                                                  user_messages: List[Tuple[dict, dict]]
+                                                  ) -> List[str]:
+        """
+        Performs the operations of a single user and persists them.
+        :param user_id: ID of the user
+        :param user_messages: List of (SQS record, parsed message body) in order
+        :return: IDs of the messages whose operation could not be performed
+        """
+        self.logger.info(f"Processing {len(user_messages)} Arithmetic Operation events for User {user_id}")
+        balance = get_or_initialize_user_balance(logger=self.logger,
+                                                 crud_service=self.crud_service,
+                                                 user_id=user_id)
+        saved_record_ids = get_saved_record_ids(crud_service=self.crud_service,
+                                                user_id=user_id,
+                                                record_ids=[body.get('record_id') for _, body in user_messages])
+        user_balance = balance.user_balance
+        records = []
+        operation_types = []
+        failed_message_ids = []
+        for event, body in user_messages:
+            record_id = body.get('record_id')
+            if record_id in saved_record_ids:
+                self.logger.info("Record was already saved.",
+                                 extra={'RecordId': record_id})
+                continue
+            try:
+                operation = Operation(**body.get('operation', {}))
+                if user_balance < operation.cost:
+                    self.logger.info("Insufficient funds. Dropping message.",
+                                     extra={'RecordId': record_id, 'UserBalance': user_balance})
+                    continue
 
-        if is_user_first_operation(logger=self.logger,
-                                   user_records_db=user_records_db):
-            self.logger.info("User's first operation. Granting credit and calculating operation.")
-            results = self._perform_arithmetic_operation(num1=num1,
-                                                         num2=num2,
-                                                         single_number=single_number,
-                                                         operation=operation)
+                results = self._perform_arithmetic_operation(num1=body.get('num1'),
+                                                             num2=body.get('num2'),
+                                                             single_number=body.get('single_number'),
+                                                             operation=operation)
+            except Exception as err:
+                self.logger.exception("Could not perform the operation.",
+                                      extra={'RecordId': record_id, 'Exception': err})
+                failed_message_ids.append(event.get('messageId'))
+                continue
 
-            self.logger.info("Deducting operation costs from initial balance")
-            user_balance = DEFAULT_INITIAL_USER_BALANCE - operation.cost
+            user_balance = user_balance - operation.cost
             record_in = RecordIN(record_id=record_id,
                                  operation_id=operation.operation_id,
                                  user_id=user_id,
@@ -52,32 +93,20 @@ class ArithmeticOperationWorkerProcessor:
                                  user_balance=user_balance,
                                  operation_response=results,
                                  date=get_js_utc_now())
-            self.logger.info("Saving record to DB",
-                             extra={'RecordIN': record_in.dict()})
-            self.crud_service.create(item=record_in.dict())
-            return
+            records.append(record_in.dict())
+            operation_types.append(operation.type)
+            saved_record_ids.add(record_id)
+
+        if not records:
+            return failed_message_ids
 
-        user_record = RecordOUT(**user_records_db[0])
-        check_user_has_sufficient_balance(logger=self.logger,
-                                          operation=operation,
-                                          recent_record=user_record)
-        results = self._perform_arithmetic_operation(num1=num1,
-                                                     num2=num2,
-                                                     single_number=single_number,
-                                                     operation=operation)
-        self.logger.info("Deducting operation cost from current balance")
-        user_balance = user_record.user_balance - operation.cost
-        record_in = RecordIN(record_id=record_id,
-                             operation_id=operation.operation_id,
-                             user_id=user_id,
-                             amount=operation.cost,
-                             user_balance=user_balance,
-                             operation_response=results,
-                             date=get_js_utc_now())
-        self.logger.info("Saving record to DB",
-                         extra={'RecordIN': record_in.dict()})
-        self.crud_service.create(item=record_in.dict())
-        return
+        save_user_records(logger=self.logger,
+                          crud_service=self.crud_service,
+                          user_id=user_id,
+                          expected_balance=balance.user_balance,
+                          records=records,
+                          operation_types=operation_types)
+        return failed_message_ids
 
     def _perform_arithmetic_operation(self,
                                       num1: Union[float, int],
@@ -95,9 +124,7 @@ class ArithmeticOperationWorkerProcessor:
         :return: the operation result
         """
         self.logger.info("Doing calculation")
-        operation_func = OPERATION_MAP[operation.type]
-
-        if operation.type in SINGLE_NUMBER_OPERATIONS:
-            return operation_func(single_number)
-
-        return operation_func(num1, num2)
+        return perform_arithmetic_operation(operation_type=operation.type,
+                                            num1=num1,
+                                            num2=num2,
+                                            single_number=single_number)
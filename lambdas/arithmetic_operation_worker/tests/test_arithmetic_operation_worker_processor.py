@@ -1,21 +1,27 @@
+from http import HTTPStatus
+
 import pytest
 from mock import MagicMock, patch
 
 from lambdas.arithmetic_operation_worker.processor import ArithmeticOperationWorkerProcessor
+from shared.error_handling import HTTPException
 from shared.fixture_utils import json_fixture
+from shared.json_utils import json_string_to_dict, dict_to_json_string
 
 mock_logger = MagicMock()
 mock_crud_service = MagicMock()
 mock_js_utc_now = MagicMock()
 
 ARITHMETIC_OPERATION_EVENT_VALID = json_fixture('arithmetic_operation_event_valid.json')
-LIST_ITEMS_GET_USER_NO_RECORDS_RETURN_VALUE = json_fixture('list_items_get_user_no_records_return_value.json')
 ARITHMETIC_OPERATION_EXPECTED_VALID = json_fixture('arithmetic_operation_expected_valid.json')
 
 
 def reset_mocks():
     mock_logger.reset_mock()
     mock_crud_service.reset_mock()
+    mock_crud_service.transact_write.side_effect = None
+    mock_crud_service.batch_get.return_value = []
+    mock_js_utc_now.return_value = 1678232290113
 
 
 @pytest.fixture(scope="module")
@@ -25,14 +31,123 @@ def processor() -> ArithmeticOperationWorkerProcessor:
                                               crud_service=mock_crud_service)
 
 
+def _batch_event(message_id: str, user_id: str, record_id: str, **body_fields) -> dict:
+    body = json_string_to_dict(ARITHMETIC_OPERATION_EVENT_VALID['body'])
+    body['user_id'] = user_id
+    body['record_id'] = record_id
+    body.update(body_fields)
+    return {'messageId': message_id, 'body': dict_to_json_string(body)}
+
+
+def _saved_records() -> list:
+    transact_items = mock_crud_service.transact_write.call_args.kwargs['transact_items']
+    return [transact_item['Put']['Item'] for transact_item in transact_items if 'Put' in transact_item]
+
+
 @patch("lambdas.arithmetic_operation_worker.processor.get_js_utc_now", mock_js_utc_now)
 def test_arithmetic_operation_success(processor):
-    event = ARITHMETIC_OPERATION_EVENT_VALID
-    mock_crud_service.list_items.return_value = LIST_ITEMS_GET_USER_NO_RECORDS_RETURN_VALUE
-    mock_js_utc_now.return_value = 1678232290113
-    processor.process_arithmetic_operation_event(event=event)
-    expected = ARITHMETIC_OPERATION_EXPECTED_VALID
+    reset_mocks()
+    user_id = 'b86ed25a-f978-4ca6-9903-4fd2ef3b6209'
+    mock_crud_service.get.return_value = {'SK': 'Balance', 'user_id': user_id, 'user_balance': 20}
+    event = {**ARITHMETIC_OPERATION_EVENT_VALID, 'messageId': '1'}
+
+    failed_message_ids = processor.process_arithmetic_operation_events(events=[event])
+
+    assert failed_message_ids == []
+    assert _saved_records() == [ARITHMETIC_OPERATION_EXPECTED_VALID['item']]
+
+
+@patch("lambdas.arithmetic_operation_worker.processor.get_js_utc_now", mock_js_utc_now)
+def test_arithmetic_operation_batch_groups_messages_by_user(processor):
+    reset_mocks()
+    mock_crud_service.get.return_value = {'SK': 'Balance', 'user_id': 'user-1', 'user_balance': 2}
+    events = [
+        _batch_event(message_id='1', user_id='user-1', record_id='record-1'),
+        _batch_event(message_id='2', user_id='user-1', record_id='record-2'),
+        _batch_event(message_id='3', user_id='user-1', record_id='record-3')
+    ]
+
+    failed_message_ids = processor.process_arithmetic_operation_events(events=events)
+
+    assert failed_message_ids == []
+    # the Balance and the Stats bounds
+    assert mock_crud_service.get.call_count == 2
+    assert mock_crud_service.transact_write.call_count == 1
+    transact_items = mock_crud_service.transact_write.call_args.kwargs['transact_items']
+    balance_update = transact_items[0]['Update']
+    assert balance_update['ConditionExpression'] == '#user_balance = :expected_balance'
+    assert balance_update['ExpressionAttributeValues'][':expected_balance'] == 2
+    assert balance_update['ExpressionAttributeValues'][':user_balance'] == 0
+    assert balance_update['ExpressionAttributeValues'][':record_id'] == 'record-2'
+    assert all(transact_item['Put']['ConditionExpression'] == 'attribute_not_exists(SK)'
+               for transact_item in transact_items[1:3])
+    records = _saved_records()
+    assert [record['record_id'] for record in records] == ['record-1', 'record-2']
+    assert [record['user_balance'] for record in records] == [1, 0]
+    stats_update = transact_items[3]['Update']
+    assert stats_update['Key'] == {'PK': 'User#user-1', 'SK': 'Stats'}
+    assert stats_update['ExpressionAttributeValues'][':operation_count'] == 2
+    assert stats_update['ExpressionAttributeValues'][':min_balance'] == 0
+    rollup_updates = [transact_item['Update'] for transact_item in transact_items[4:]]
+    assert [update['Key']['SK'] for update in rollup_updates] == ['Rollup#hour#2023-03-07T23',
+                                                                  'Rollup#day#2023-03-07',
+                                                                  'Rollup#month#2023-03']
+    assert all(update['ExpressionAttributeValues'][':operation_count'] == 2 for update in rollup_updates)
 
-    mock_crud_service.create.assert_called_with(**expected)
 
+@patch("lambdas.arithmetic_operation_worker.processor.get_js_utc_now", mock_js_utc_now)
+def test_arithmetic_operation_batch_skips_records_already_saved(processor):
+    reset_mocks()
+    mock_crud_service.get.return_value = {'SK': 'Balance', 'user_id': 'user-1', 'user_balance': 9,
+                                          'last_record_id': 'record-1'}
+    mock_crud_service.batch_get.return_value = [{'PK': 'User#user-1', 'SK': 'Record#record-1',
+                                                 'record_id': 'record-1'}]
+    events = [
+        _batch_event(message_id='1', user_id='user-1', record_id='record-1'),
+        _batch_event(message_id='2', user_id='user-1', record_id='record-2')
+    ]
+
+    failed_message_ids = processor.process_arithmetic_operation_events(events=events)
+
+    assert failed_message_ids == []
+    assert mock_crud_service.batch_get.call_args.kwargs['consistent_read'] is True
+    records = _saved_records()
+    assert [record['record_id'] for record in records] == ['record-2']
+    assert records[0]['user_balance'] == 8
+
+
+@patch("lambdas.arithmetic_operation_worker.processor.get_js_utc_now", mock_js_utc_now)
+def test_arithmetic_operation_batch_reports_only_failed_messages(processor):
+    reset_mocks()
+    mock_crud_service.get.return_value = {'SK': 'Balance', 'user_id': 'user-1', 'user_balance': 10}
+    division = {'entity': 'OPERATION', 'type': 'DIVISION', 'cost': 1, 'operation_id': 'division'}
+    events = [
+        _batch_event(message_id='1', user_id='user-1', record_id='record-1', num2=0, operation=division),
+        _batch_event(message_id='2', user_id='user-1', record_id='record-2'),
+        {'messageId': '3', 'body': '{"user_id": '}
+    ]
+
+    failed_message_ids = processor.process_arithmetic_operation_events(events=events)
+
+    assert failed_message_ids == ['3', '1']
+    records = _saved_records()
+    assert [record['record_id'] for record in records] == ['record-2']
+    assert records[0]['user_balance'] == 9
+
+
+@patch("lambdas.arithmetic_operation_worker.processor.get_js_utc_now", mock_js_utc_now)
+def test_arithmetic_operation_batch_reports_user_messages_when_transaction_fails(processor):
+    reset_mocks()
+    mock_crud_service.get.return_value = {'SK': 'Balance', 'user_id': 'user-1', 'user_balance': 10}
+    mock_crud_service.transact_write.side_effect = [HTTPException(status_code=HTTPStatus.CONFLICT, msg='conflict'),
+                                                    None]
+    events = [
+        _batch_event(message_id='1', user_id='user-1', record_id='record-1'),
+        _batch_event(message_id='2', user_id='user-2', record_id='record-2'),
+        _batch_event(message_id='3', user_id='user-1', record_id='record-3')
+    ]
+
+    failed_message_ids = processor.process_arithmetic_operation_events(events=events)
 
+    assert failed_message_ids == ['1', '3']
+    assert mock_crud_service.transact_write.call_count == 2
@@ -0,0 +1,61 @@
+from http import HTTPStatus
+from logging import Logger
+from typing import List
+
+from shared.api_utils import HTTPResponse, get_event_body
+from shared.crud_service import CrudService, BATCH_GET_MAX_KEYS
+from shared.error_handling import HTTPException
+from shared.json_utils import json_string_to_dict
+from shared.models.record_model import RecordOUT
+from shared.user_utils import get_user_id_from_cognito_authorizer
+
+
+class BatchPollResultsProcessor:
+    def __init__(self,
+                 logger: Logger,
+                 crud_service: CrudService
+                 ) -> None:
+        self.logger = logger
+        self.crud_service = crud_service
+
+    def process_batch_poll_results_event(self, event: dict) -> HTTPResponse:
+        user_id = get_user_id_from_cognito_authorizer(logger=self.logger,
+                                                      event=event)
+        body = json_string_to_dict(get_event_body(event=event))
+        record_ids = self._get_record_ids(body=body)
+
+        self.logger.info(f"Processing Batch Poll Results request for User {user_id}",
+                         extra={'RecordIdsCount': len(record_ids)})
+
+        keys = [{'PK': f'User#{user_id}', 'SK': f'Record#{record_id}'} for record_id in record_ids]
+        user_records_db = self.crud_service.batch_get(keys=keys)
+        user_records = {record['record_id']: record for record in RecordOUT.from_db_items(user_records_db)}
+
+        # keep the order of the request, BatchGetItem returns the items in no particular order
+        response_body = {
+            'completed': [user_records[record_id] for record_id in record_ids if record_id in user_records],
+            'pending': [record_id for record_id in record_ids if record_id not in user_records]
+        }
+        self.logger.info("Returning User records.",
+                         extra={'Completed': len(response_body['completed']),
+                                'Pending': len(response_body['pending'])})
+
+        return HTTPResponse(status_code=HTTPStatus.OK,
+                            body=response_body)
+
+    def _get_record_ids(self, body: dict) -> List[str]:
+        """
+        Validates the record_ids of the request body.
+        :param body: Request body
+        :return: unique record_ids, in request order
+        """
+        record_ids = body.get('record_ids') if isinstance(body, dict) else None
+        if (not isinstance(record_ids, list) or not record_ids
+                or not all(isinstance(record_id, str) and record_id for record_id in record_ids)):
+            raise HTTPException(status_code=HTTPStatus.BAD_REQUEST,
+                                msg="record_ids must be a non-empty list of record ids.")
+        record_ids = list(dict.fromkeys(record_ids))
+        if len(record_ids) > BATCH_GET_MAX_KEYS:
+            raise HTTPException(status_code=HTTPStatus.BAD_REQUEST,
+                                msg=f"A maximum of {BATCH_GET_MAX_KEYS} record_ids can be polled at once.")
+        return record_ids
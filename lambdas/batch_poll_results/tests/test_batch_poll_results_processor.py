@@ -0,0 +1,59 @@
+from http import HTTPStatus
+
+import pytest
+from mock import MagicMock
+
+from lambdas.batch_poll_results.processor import BatchPollResultsProcessor
+from shared.error_handling import HTTPException
+from shared.fixture_utils import json_fixture
+from shared.json_utils import dict_to_json_string, json_string_to_dict
+
+mock_logger = MagicMock()
+mock_crud_service = MagicMock()
+
+BATCH_POLL_RESULTS_EVENT_VALID = json_fixture('batch_poll_results_event_valid.json')
+BATCH_POLL_RESULTS_BATCH_GET_RETURN_VALUE = json_fixture('batch_poll_results_batch_get_return_value.json')
+BATCH_POLL_RESULTS_VALID_EXPECTED = json_fixture('batch_poll_results_valid_expected.json')
+
+
+def reset_mocks():
+    mock_logger.reset_mock()
+    mock_crud_service.reset_mock()
+
+
+@pytest.fixture(scope="module")
+def processor() -> BatchPollResultsProcessor:
+    reset_mocks()
+    return BatchPollResultsProcessor(logger=mock_logger,
+                                     crud_service=mock_crud_service)
+
+
+def test_batch_poll_results_success(processor):
+    event = BATCH_POLL_RESULTS_EVENT_VALID
+    mock_crud_service.batch_get.return_value = BATCH_POLL_RESULTS_BATCH_GET_RETURN_VALUE
+    result = processor.process_batch_poll_results_event(event=event)
+
+    expected = BATCH_POLL_RESULTS_VALID_EXPECTED
+
+    assert result.status_code == HTTPStatus.OK
+    assert json_string_to_dict(result.body) == expected
+    user_pk = 'User#77d46173-1d59-48d0-8b75-eaa76eb857b2'
+    mock_crud_service.batch_get.assert_called_with(keys=[
+        {'PK': user_pk, 'SK': 'Record#1a40eea3-bd09-4ee9-8b21-c7b50c536f3d'},
+        {'PK': user_pk, 'SK': 'Record#5d8a4c3e-2f1b-4e6a-9c7d-0b1e2f3a4b5c'}
+    ])
+
+
+@pytest.mark.parametrize('body', [
+    {},
+    {'record_ids': []},
+    {'record_ids': 'abc'},
+    {'record_ids': ['']},
+    {'record_ids': [str(index) for index in range(101)]},
+])
+def test_batch_poll_results_invalid_record_ids_raises_400(processor, body):
+    event = {**BATCH_POLL_RESULTS_EVENT_VALID, 'body': dict_to_json_string(body)}
+    with pytest.raises(HTTPException) as err:
+        processor.process_batch_poll_results_event(event=event)
+
+    assert err.value.status_code == HTTPStatus.BAD_REQUEST
@@ -0,0 +1,50 @@
+import logging
+import os
+
+import boto3
+from pythonjsonlogger import jsonlogger
+
+from lambdas.bulk_delete_records.processor import BulkDeleteRecordsProcessor
+from shared.api_utils import HTTPResponse
+from shared.concurrency_utils import AdaptiveConcurrencyRunner
+from shared.crud_service import CrudService
+from shared.error_handling import exception_handler
+
+# environment variables
+LOGGING_LEVEL = os.environ.get('LOGGING_LEVEL', 'INFO')
+DYNAMODB_TABLE_NAME = os.environ.get('DYNAMODB_TABLE_NAME', 'arithmetic-calculator-api-dev-ArithmeticCalculatorTable')
+BULK_DELETE_MAX_RECORDS = int(os.environ.get('BULK_DELETE_MAX_RECORDS', 500))
+BULK_DELETE_MAX_CONCURRENCY = int(os.environ.get('BULK_DELETE_MAX_CONCURRENCY', 16))
+
+# logging
+logger = logging.getLogger(__name__)
+logHandler = logging.StreamHandler()
+formatter = jsonlogger.JsonFormatter()
+logHandler.setFormatter(formatter)
+logger.addHandler(logHandler)
+logger.setLevel(LOGGING_LEVEL)
+
+# AWS resources
+dynamodb = boto3.resource('dynamodb')
+table = dynamodb.Table(DYNAMODB_TABLE_NAME)
+
+crud_service = CrudService(logger=logger,
+                           table=table)
+
+
+@exception_handler
+def handler(event: dict, context: dict) -> HTTPResponse:
+    """
+    Delete (soft delete) many Records in a single request, given a list of record_ids or a
+    date range. The updates are sent in parallel with adaptive concurrency, backing off when
+    DynamoDB throttles them, and the outcome of every Record is returned.
+    Date ranges with more Records than BULK_DELETE_MAX_RECORDS are deleted in chunks,
+    the response next_cursor continues the deletion on the next request.
+    """
+    processor = BulkDeleteRecordsProcessor(logger=logger,
+                                           crud_service=crud_service,
+                                           runner=AdaptiveConcurrencyRunner(logger=logger,
+                                                                            max_concurrency=BULK_DELETE_MAX_CONCURRENCY),
+                                           max_records=BULK_DELETE_MAX_RECORDS)
+
+    return processor.process_bulk_delete_records_event(event=event)
@@ -0,0 +1,149 @@
+from http import HTTPStatus
+from logging import Logger
+from typing import List, Optional, Tuple
+
+from shared.api_utils import HTTPResponse, get_event_body
+from shared.concurrency_utils import AdaptiveConcurrencyRunner
+from shared.crud_service import CrudService, ConditionType
+from shared.date_utils import validate_date_epoch_string
+from shared.error_handling import HTTPException
+from shared.json_utils import json_string_to_dict
+from shared.pagination import CursorPaginator
+from shared.record_utils import RECORD_NOT_DELETED_FILTER
+from shared.user_utils import get_user_id_from_cognito_authorizer
+
+RECORD_DELETED = 'deleted'
+RECORD_NOT_FOUND = 'not_found'
+RECORD_FAILED = 'failed'
+
+
+class BulkDeleteRecordsProcessor:
+    def __init__(self,
+                 logger: Logger,
+                 crud_service: CrudService,
+                 runner: AdaptiveConcurrencyRunner,
+                 max_records: int
+                 ) -> None:
+        self.logger = logger
+        self.crud_service = crud_service
+        self.runner = runner
+        self.max_records = max_records
+
+    def process_bulk_delete_records_event(self, event: dict) -> HTTPResponse:
+        user_id = get_user_id_from_cognito_authorizer(logger=self.logger,
+                                                      event=event)
+        body = json_string_to_dict(get_event_body(event=event))
+        if not isinstance(body, dict):
+            body = {}
+
+        self.logger.info(f"Processing Bulk Delete Records request for User {user_id}")
+
+        pk = f'User#{user_id}'
+        next_cursor = None
+        if 'record_ids' in body:
+            record_ids = self._get_record_ids(body=body)
+        else:
+            record_ids, next_cursor = self._get_record_ids_in_date_range(pk=pk, body=body)
+
+        self.logger.info(f"Deleting {len(record_ids)} records",
+                         extra={'HasMore': next_cursor is not None})
+        outcomes = self.runner.run(func=lambda record_id: self._delete_record(pk=pk, record_id=record_id),
+                                   items=record_ids,
+                                   is_throttled=_is_throttled)
+
+        results = {record_id: self._get_result_status(error=error) for record_id, _, error in outcomes}
+        response_body = {
+            'deleted': sum(status == RECORD_DELETED for status in results.values()),
+            'not_found': sum(status == RECORD_NOT_FOUND for status in results.values()),
+            'failed': sum(status == RECORD_FAILED for status in results.values()),
+            'results': [{'record_id': record_id, 'status': results[record_id]} for record_id in record_ids],
+            'next_cursor': next_cursor
+        }
+        self.logger.info("Bulk delete finished.",
+                         extra={key: response_body[key] for key in ('deleted', 'not_found', 'failed')})
+
+        return HTTPResponse(status_code=HTTPStatus.OK,
+                            body=response_body)
+
+    def _delete_record(self, pk: str, record_id: str) -> Optional[dict]:
+        """
+        Marks a Record as deleted, same update as the Delete Record endpoint.
+        :param pk: User partition key
+        :param record_id: Record id
+        :return: Updated Record
+        """
+        return self.crud_service.update_item_attributes(pk=pk,
+                                                        sk=f'Record#{record_id}',
+                                                        update_expression='SET #deleted = :deleted',
+                                                        expression_attribute_names={'#deleted': 'deleted'},
+                                                        expression_attribute_values={':deleted': True})
+
+    def _get_result_status(self, error: Optional[Exception]) -> str:
+        if error is None:
+            return RECORD_DELETED
+        if isinstance(error, HTTPException) and error.status_code == HTTPStatus.NOT_FOUND:
+            return RECORD_NOT_FOUND
+        self.logger.error("Could not delete record", extra={'Exception': error})
+        return RECORD_FAILED
+
+    def _get_record_ids(self, body: dict) -> List[str]:
+        """
+        Validates the record_ids of the request body.
+        :param body: Request body
+        :return: unique record_ids, in request order
+        """
+        record_ids = body.get('record_ids')
+        if (not isinstance(record_ids, list) or not record_ids
+                or not all(isinstance(record_id, str) and record_id for record_id in record_ids)):
+            raise HTTPException(status_code=HTTPStatus.BAD_REQUEST,
+                                msg="record_ids must be a non-empty list of record ids.")
+        record_ids = list(dict.fromkeys(record_ids))
+        if len(record_ids) > self.max_records:
+            raise HTTPException(status_code=HTTPStatus.BAD_REQUEST,
+                                msg=f"A maximum of {self.max_records} records can be deleted at once.")
+        return record_ids
+
+    def _get_record_ids_in_date_range(self, pk: str, body: dict) -> Tuple[List[str], Optional[str]]:
+        """
+        Reads the ids of the Records not deleted yet in a date range (GSI1), up to max_records.
+        :param pk: User partition key
+        :param body: Request body with date_start, date_end and an optional cursor
+        :return: record_ids and the cursor to continue with, None when the range is finished
+        """
+        date_start = str(body.get('date_start', ''))
+        date_end = str(body.get('date_end', ''))
+        if not date_start or not date_end:
+            raise HTTPException(status_code=HTTPStatus.BAD_REQUEST,
+                                msg="Either record_ids or date_start and date_end must be provided.")
+        validate_date_epoch_string(logger=self.logger, date=date_start)
+        validate_date_epoch_string(logger=self.logger, date=date_end)
+        if int(date_start) > int(date_end):
+            raise HTTPException(status_code=HTTPStatus.BAD_REQUEST,
+                                msg="date_start must be lower or equal than date_end")
+
+        paginator = CursorPaginator(logger=self.logger,
+                                    cursor=body.get('cursor') or '',
+                                    per_page=str(self.max_records))
+        exclusive_start_key = paginator.exclusive_start_key
+        if exclusive_start_key and (set(exclusive_start_key) != {'PK', 'SK', 'GSI1PK', 'GSI1SK'}
+                                    or exclusive_start_key['PK'] != pk or exclusive_start_key['GSI1PK'] != pk):
+            raise HTTPException(status_code=HTTPStatus.BAD_REQUEST,
+                                msg="cursor parameter is not valid")
+
+        records = self.crud_service.iter_items(pk=pk,
+                                               gsi1=True,
+                                               condition_type=ConditionType.BETWEEN,
+                                               low_value=f'Record#{date_start}',
+                                               high_value=f'Record#{date_end}',
+                                               ascending=True,
+                                               max_items=self.max_records,
+                                               exclusive_start_key=exclusive_start_key,
+                                               fields=['SK'],
+                                               filter_expression=RECORD_NOT_DELETED_FILTER)
+        record_ids = [record['SK'].split('#')[1] for record in records]
+        paginator.set_next_cursor(last_evaluated_key=records.last_evaluated_key)
+        return record_ids, paginator.next_cursor
+
+
+def _is_throttled(error: Exception) -> bool:
+    return isinstance(error, HTTPException) and error.status_code == HTTPStatus.TOO_MANY_REQUESTS
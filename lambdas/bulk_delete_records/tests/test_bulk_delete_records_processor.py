@@ -0,0 +1,118 @@
+from http import HTTPStatus
+
+import pytest
+from mock import MagicMock, patch
+
+from lambdas.bulk_delete_records.processor import BulkDeleteRecordsProcessor
+from shared.concurrency_utils import AdaptiveConcurrencyRunner
+from shared.error_handling import HTTPException
+from shared.fixture_utils import json_fixture
+from shared.json_utils import dict_to_json_string, json_string_to_dict
+from shared.pagination import CursorPaginator
+from shared.record_utils import RECORD_NOT_DELETED_FILTER
+
+mock_logger = MagicMock()
+mock_crud_service = MagicMock()
+
+BULK_DELETE_RECORDS_EVENT_VALID = json_fixture('bulk_delete_records_event_valid.json')
+USER_PK = 'User#77d46173-1d59-48d0-8b75-eaa76eb857b2'
+
+
+def reset_mocks():
+    mock_logger.reset_mock()
+    mock_crud_service.reset_mock()
+
+
+@pytest.fixture
+def processor() -> BulkDeleteRecordsProcessor:
+    reset_mocks()
+    return BulkDeleteRecordsProcessor(logger=mock_logger,
+                                      crud_service=mock_crud_service,
+                                      runner=AdaptiveConcurrencyRunner(logger=mock_logger),
+                                      max_records=3)
+
+
+def get_event(body: dict) -> dict:
+    return {**BULK_DELETE_RECORDS_EVENT_VALID, 'body': dict_to_json_string(body)}
+
+
+@patch('shared.concurrency_utils.sleep')
+def test_bulk_delete_records_by_ids_reports_outcomes(mock_sleep, processor):
+    throttled_once = []
+
+    def update_item_attributes(pk, sk, **kwargs):
+        if sk == 'Record#missing':
+            raise HTTPException(status_code=HTTPStatus.NOT_FOUND, msg='Item does not exists')
+        if sk == 'Record#throttled' and not throttled_once:
+            throttled_once.append(sk)
+            raise HTTPException(status_code=HTTPStatus.TOO_MANY_REQUESTS, msg='Too many requests')
+        return {'PK': pk, 'SK': sk, 'deleted': True}
+
+    mock_crud_service.update_item_attributes.side_effect = update_item_attributes
+    event = get_event({'record_ids': ['1', 'missing', 'throttled', '1']})
+    result = processor.process_bulk_delete_records_event(event=event)
+
+    assert result.status_code == HTTPStatus.OK
+    assert json_string_to_dict(result.body) == {
+        'deleted': 2,
+        'not_found': 1,
+        'failed': 0,
+        'results': [{'record_id': '1', 'status': 'deleted'},
+                    {'record_id': 'missing', 'status': 'not_found'},
+                    {'record_id': 'throttled', 'status': 'deleted'}],
+        'next_cursor': None
+    }
+    mock_crud_service.update_item_attributes.assert_any_call(pk=USER_PK,
+                                                             sk='Record#1',
+                                                             update_expression='SET #deleted = :deleted',
+                                                             expression_attribute_names={'#deleted': 'deleted'},
+                                                             expression_attribute_values={':deleted': True})
+    mock_sleep.assert_called_once()
+
+
+def test_bulk_delete_records_by_date_range_returns_next_cursor(processor):
+    last_evaluated_key = {'PK': USER_PK, 'SK': 'Record#c', 'GSI1PK': USER_PK, 'GSI1SK': 'Record#3'}
+    records = MagicMock()
+    records.__iter__.return_value = iter([{'SK': 'Record#a'}, {'SK': 'Record#c'}])
+    records.last_evaluated_key = last_evaluated_key
+    mock_crud_service.iter_items.return_value = records
+    mock_crud_service.update_item_attributes.side_effect = None
+    mock_crud_service.update_item_attributes.return_value = {}
+
+    event = get_event({'date_start': '1', 'date_end': '3'})
+    result = processor.process_bulk_delete_records_event(event=event)
+    body = json_string_to_dict(result.body)
+
+    assert [item['record_id'] for item in body['results']] == ['a', 'c']
+    assert body['deleted'] == 2
+    assert CursorPaginator(logger=mock_logger, cursor=body['next_cursor'], per_page='3').exclusive_start_key == \
+        last_evaluated_key
+    assert mock_crud_service.iter_items.call_args.kwargs['low_value'] == 'Record#1'
+    assert mock_crud_service.iter_items.call_args.kwargs['max_items'] == 3
+    assert mock_crud_service.iter_items.call_args.kwargs['filter_expression'] == RECORD_NOT_DELETED_FILTER
+
+
+@pytest.mark.parametrize('body', [
+    {},
+    {'record_ids': []},
+    {'record_ids': ['1', '2', '3', '4']},
+    {'date_start': '3', 'date_end': '1'},
+    {'date_start': '1', 'date_end': 'abc'},
+])
+def test_bulk_delete_records_invalid_request_raises_400(processor, body):
+    with pytest.raises(HTTPException) as err:
+        processor.process_bulk_delete_records_event(event=get_event(body))
+
+    assert err.value.status_code == HTTPStatus.BAD_REQUEST
+
+
+def test_bulk_delete_records_cursor_of_another_user_raises_400(processor):
+    other_pk = 'User#other'
+    cursor = CursorPaginator(logger=mock_logger, cursor='', per_page='3').encode_cursor(
+        {'PK': other_pk, 'SK': 'Record#c', 'GSI1PK': other_pk, 'GSI1SK': 'Record#3'})
+
+    with pytest.raises(HTTPException) as err:
+        processor.process_bulk_delete_records_event(event=get_event({'date_start': '1', 'date_end': '3',
+                                                                     'cursor': cursor}))
+
+    assert err.value.status_code == HTTPStatus.BAD_REQUEST
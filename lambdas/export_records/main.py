@@ -0,0 +1,49 @@
+import logging
+import os
+
+import boto3
+from pythonjsonlogger import jsonlogger
+
+from lambdas.export_records.processor import ExportRecordsProcessor
+from shared.api_utils import HTTPResponse
+from shared.crud_service import CrudService
+from shared.error_handling import exception_handler
+
+# environment variables
+LOGGING_LEVEL = os.environ.get('LOGGING_LEVEL', 'INFO')
+DYNAMODB_TABLE_NAME = os.environ.get('DYNAMODB_TABLE_NAME', 'arithmetic-calculator-api-dev-ArithmeticCalculatorTable')
+# Lambda responses are limited to 6 MB, base64 (gzip) adds a third to the chunk size
+EXPORT_RECORDS_MAX_BYTES = int(os.environ.get('EXPORT_RECORDS_MAX_BYTES', 3 * 1024 * 1024))
+
+# logging
+logger = logging.getLogger(__name__)
+logHandler = logging.StreamHandler()
+formatter = jsonlogger.JsonFormatter()
+logHandler.setFormatter(formatter)
+logger.addHandler(logHandler)
+logger.setLevel(LOGGING_LEVEL)
+
+# AWS resources
+dynamodb = boto3.resource('dynamodb')
+table = dynamodb.Table(DYNAMODB_TABLE_NAME)
+
+crud_service = CrudService(logger=logger,
+                           table=table)
+
+
+@exception_handler
+def handler(event: dict, context: dict) -> HTTPResponse:
+    """
+    Export all the Records of the user as NDJSON or CSV (`?format=`), gzip compressed with
+    `?compression=gzip` (requested with `Accept: application/gzip`, the binary media type
+    API Gateway decodes the body for). Large exports are sent in chunks of about EXPORT_RECORDS_MAX_BYTES,
+    the X-Next-Cursor response header is passed as `?cursor=` to get the next chunk.
+    """
+    processor = ExportRecordsProcessor(logger=logger,
+                                       crud_service=crud_service,
+                                       max_bytes=EXPORT_RECORDS_MAX_BYTES)
+
+    get_remaining_time_in_millis = getattr(context, 'get_remaining_time_in_millis', None)
+    remaining_time_in_millis = get_remaining_time_in_millis() if get_remaining_time_in_millis else None
+    return processor.process_export_records_event(event=event,
+                                                  remaining_time_in_millis=remaining_time_in_millis)
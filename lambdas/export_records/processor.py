@@ -0,0 +1,186 @@
+import base64
+import csv
+import io
+import zlib
+from http import HTTPStatus
+from logging import Logger
+from time import monotonic
+from typing import List, Optional
+
+from shared.api_utils import HTTPResponse
+from shared.crud_service import CrudService, ConditionType
+from shared.error_handling import HTTPException
+from shared.json_utils import dict_to_json_string
+from shared.models.record_model import RecordOUT
+from shared.pagination import CursorPaginator
+from shared.record_utils import RECORD_NOT_DELETED_FILTER
+from shared.user_utils import get_user_id_from_cognito_authorizer
+
+EXPORT_FORMAT_NDJSON = 'ndjson'
+EXPORT_FORMAT_CSV = 'csv'
+EXPORT_CONTENT_TYPES = {
+    EXPORT_FORMAT_NDJSON: 'application/x-ndjson',
+    EXPORT_FORMAT_CSV: 'text/csv; charset=utf-8'
+}
+EXPORT_COMPRESSION_GZIP = 'gzip'
+EXPORT_CSV_FIELDS = list(RecordOUT.__fields__)
+# Records read per DynamoDB request, the chunk may exceed max_bytes by up to one page
+EXPORT_PAGE_SIZE = 500
+# Time left to send the chunk after the last page is read
+EXPORT_DEADLINE_MARGIN_MILLISECONDS = 3000
+EXPORT_GZIP_LEVEL = 6
+# zlib window bits for a gzip container (header and trailer) instead of a raw zlib stream
+GZIP_WBITS = 16 + zlib.MAX_WBITS
+
+
+class ExportRecordsProcessor:
+    def __init__(self,
+                 logger: Logger,
+                 crud_service: CrudService,
+                 max_bytes: int
+                 ) -> None:
+        self.logger = logger
+        self.crud_service = crud_service
+        self.max_bytes = max_bytes
+
+    def process_export_records_event(self,
+                                     event: dict,
+                                     remaining_time_in_millis: Optional[int] = None
+                                     ) -> HTTPResponse:
+        """
+        Export the Records of the user in chronological order as NDJSON or CSV.
+        The Records are read from GSI1 one DynamoDB page at a time and written to the chunk
+        as they arrive, until the chunk reaches max_bytes or the Lambda is about to time out.
+        The X-Next-Cursor response header continues the export on the next request, it is
+        missing on the last chunk. Concatenating the chunks gives the full export: the CSV
+        header is only written on the first chunk and every gzip chunk is a complete gzip
+        member (a multi-member gzip file is a valid gzip file).
+        :param event: API Gateway event
+        :param remaining_time_in_millis: [Optional] Time left before the Lambda times out
+        :return: HTTPResponse with the chunk of the export
+        """
+        user_id = get_user_id_from_cognito_authorizer(logger=self.logger,
+                                                      event=event)
+        params = event.get('queryStringParameters') or {}
+        export_format = params.get('format', EXPORT_FORMAT_NDJSON)
+        if export_format not in EXPORT_CONTENT_TYPES:
+            raise HTTPException(status_code=HTTPStatus.BAD_REQUEST,
+                                msg=f"format parameter must be one of {', '.join(EXPORT_CONTENT_TYPES)}.")
+        compression = params.get('compression')
+        if compression not in (None, '', EXPORT_COMPRESSION_GZIP):
+            raise HTTPException(status_code=HTTPStatus.BAD_REQUEST,
+                                msg=f"compression parameter must be {EXPORT_COMPRESSION_GZIP}.")
+        gzip_compressed = compression == EXPORT_COMPRESSION_GZIP
+
+        self.logger.info(f"Processing Export Records request for User {user_id}",
+                         extra={'QueryParameters': params})
+
+        pk = f'User#{user_id}'
+        cursor = params.get('cursor') or ''
+        paginator = CursorPaginator(logger=self.logger,
+                                    cursor=cursor,
+                                    per_page=str(EXPORT_PAGE_SIZE))
+        self._validate_cursor_belongs_to_user(pk=pk, exclusive_start_key=paginator.exclusive_start_key)
+
+        include_deleted = params.get('include_deleted', 'false').lower() == 'true'
+        records = self.crud_service.iter_items(pk=pk,
+                                               gsi1=True,
+                                               condition_type=ConditionType.BEGINS_WITH,
+                                               condition_value='Record#',
+                                               ascending=True,
+                                               page_size=EXPORT_PAGE_SIZE,
+                                               exclusive_start_key=paginator.exclusive_start_key,
+                                               filter_expression=None if include_deleted else RECORD_NOT_DELETED_FILTER)
+
+        deadline = None
+        if remaining_time_in_millis is not None:
+            deadline = monotonic() + (remaining_time_in_millis - EXPORT_DEADLINE_MARGIN_MILLISECONDS) / 1000
+        writer = _ExportWriter(export_format=export_format,
+                               gzip_compressed=gzip_compressed,
+                               write_header=not cursor)
+        for page in records.pages():
+            writer.write_records(RecordOUT.from_db_items(page))
+            if writer.size >= self.max_bytes or (deadline is not None and monotonic() >= deadline):
+                break
+        paginator.set_next_cursor(last_evaluated_key=records.last_evaluated_key)
+        body = writer.close()
+
+        self.logger.info("Export chunk finished.",
+                         extra={'Count': records.count,
+                                'ScannedCount': records.scanned_count,
+                                'Bytes': len(body),
+                                'HasMore': paginator.next_cursor is not None})
+
+        file_name = f'records.{export_format}'
+        headers = {'Content-Type': EXPORT_CONTENT_TYPES[export_format],
+                   'Content-Disposition': f'attachment; filename="{file_name}"',
+                   'Cache-Control': 'private, no-store'}
+        if gzip_compressed:
+            headers['Content-Type'] = 'application/gzip'
+            headers['Content-Disposition'] = f'attachment; filename="{file_name}.gz"'
+        if paginator.next_cursor:
+            headers['X-Next-Cursor'] = paginator.next_cursor
+            headers['Access-Control-Expose-Headers'] = 'X-Next-Cursor'
+
+        if not gzip_compressed:
+            return HTTPResponse(status_code=HTTPStatus.OK,
+                                body=body.decode('utf-8'),
+                                headers=headers,
+                                serialize=False)
+        response = HTTPResponse(status_code=HTTPStatus.OK,
+                                body=base64.b64encode(body).decode('ascii'),
+                                headers=headers,
+                                serialize=False)
+        response.is_base64_encoded = True
+        return response
+
+    def _validate_cursor_belongs_to_user(self, pk: str, exclusive_start_key: Optional[dict]) -> None:
+        """
+        Make sure a client-provided cursor is a GSI1 key of the user's partition.
+        :param pk: User partition key
+        :param exclusive_start_key: Decoded cursor
+        """
+        if exclusive_start_key and (set(exclusive_start_key) != {'PK', 'SK', 'GSI1PK', 'GSI1SK'}
+                                    or exclusive_start_key['PK'] != pk or exclusive_start_key['GSI1PK'] != pk):
+            self.logger.error("Cursor does not belong to the user partition")
+            raise HTTPException(status_code=HTTPStatus.BAD_REQUEST,
+                                msg="cursor parameter is not valid")
+
+
+class _ExportWriter:
+    """
+    Serializes Records to NDJSON or CSV, optionally compressing them with a streaming
+    gzip compressor, so only the (compressed) output of the chunk is kept in memory.
+    """
+
+    def __init__(self, export_format: str, gzip_compressed: bool, write_header: bool) -> None:
+        self.export_format = export_format
+        self.size = 0
+        self._chunks: List[bytes] = []
+        self._compressor = zlib.compressobj(EXPORT_GZIP_LEVEL, zlib.DEFLATED, GZIP_WBITS) if gzip_compressed else None
+        if export_format == EXPORT_FORMAT_CSV and write_header:
+            self._write(','.join(EXPORT_CSV_FIELDS) + '\r\n')
+
+    def write_records(self, records: List[dict]) -> None:
+        if self.export_format == EXPORT_FORMAT_NDJSON:
+            self._write(''.join(f'{dict_to_json_string(record)}\n' for record in records))
+            return
+        text = io.StringIO()
+        csv.DictWriter(text, fieldnames=EXPORT_CSV_FIELDS).writerows(records)
+        self._write(text.getvalue())
+
+    def close(self) -> bytes:
+        """
+        :return: the serialized chunk
+        """
+        if self._compressor:
+            self._append(self._compressor.flush())
+        return b''.join(self._chunks)
+
+    def _write(self, text: str) -> None:
+        data = text.encode('utf-8')
+        self._append(self._compressor.compress(data) if self._compressor else data)
+
+    def _append(self, data: bytes) -> None:
+        self._chunks.append(data)
+        self.size += len(data)
@@ -0,0 +1,141 @@
+import base64
+import csv
+import gzip
+import io
+from http import HTTPStatus
+
+import pytest
+from mock import MagicMock
+
+from lambdas.export_records.processor import ExportRecordsProcessor
+from shared.crud_service import ConditionType, QueryIterator
+from shared.error_handling import HTTPException
+from shared.fixture_utils import json_fixture
+from shared.json_utils import json_string_to_dict
+from shared.pagination import CursorPaginator
+from shared.record_utils import RECORD_NOT_DELETED_FILTER
+
+mock_logger = MagicMock()
+mock_crud_service = MagicMock()
+
+EXPORT_RECORDS_EVENT_VALID = json_fixture('export_records_event_valid.json')
+EXPORT_RECORDS_CRUD_RETURN_VALUE = json_fixture('export_records_crud_return_value.json')
+USER_PK = 'User#77d46173-1d59-48d0-8b75-eaa76eb857b2'
+LAST_EVALUATED_KEY = {'PK': USER_PK,
+                      'SK': 'Record#1a40eea3-bd09-4ee9-8b21-c7b50c536f3d',
+                      'GSI1PK': USER_PK,
+                      'GSI1SK': 'Record#1678196485853'}
+
+
+def set_query_pages(*pages: list) -> MagicMock:
+    """
+    Makes crud_service.iter_items return a QueryIterator reading the given pages.
+    Every page but the last one has a LastEvaluatedKey.
+    """
+    page_source = MagicMock()
+    page_source._query.side_effect = [
+        {'Items': page, **({'LastEvaluatedKey': LAST_EVALUATED_KEY} if index < len(pages) - 1 else {})}
+        for index, page in enumerate(pages)
+    ]
+    mock_crud_service.iter_items.side_effect = \
+        lambda exclusive_start_key=None, **kwargs: QueryIterator(crud_service=page_source,
+                                                                 query_payload={},
+                                                                 exclusive_start_key=exclusive_start_key)
+    return page_source
+
+
+def get_event(params: dict = None) -> dict:
+    return {**EXPORT_RECORDS_EVENT_VALID, 'queryStringParameters': params}
+
+
+@pytest.fixture
+def processor() -> ExportRecordsProcessor:
+    mock_logger.reset_mock()
+    mock_crud_service.reset_mock()
+    return ExportRecordsProcessor(logger=mock_logger,
+                                  crud_service=mock_crud_service,
+                                  max_bytes=1024 * 1024)
+
+
+def test_export_records_ndjson(processor):
+    set_query_pages(EXPORT_RECORDS_CRUD_RETURN_VALUE[:1], EXPORT_RECORDS_CRUD_RETURN_VALUE[1:])
+    result = processor.process_export_records_event(event=get_event())
+
+    assert result.status_code == HTTPStatus.OK
+    assert result.headers['Content-Type'] == 'application/x-ndjson'
+    assert 'X-Next-Cursor' not in result.headers
+    assert not result.is_base64_encoded
+    lines = result.body.splitlines()
+    assert [json_string_to_dict(line)['record_id'] for line in lines] == \
+           [item['SK'].split('#')[1] for item in EXPORT_RECORDS_CRUD_RETURN_VALUE]
+    assert 'PK' not in json_string_to_dict(lines[0])
+    mock_crud_service.iter_items.assert_called_once_with(pk=USER_PK,
+                                                         gsi1=True,
+                                                         condition_type=ConditionType.BEGINS_WITH,
+                                                         condition_value='Record#',
+                                                         ascending=True,
+                                                         page_size=500,
+                                                         exclusive_start_key=None,
+                                                         filter_expression=RECORD_NOT_DELETED_FILTER)
+
+
+def test_export_records_csv(processor):
+    set_query_pages(EXPORT_RECORDS_CRUD_RETURN_VALUE)
+    result = processor.process_export_records_event(event=get_event({'format': 'csv',
+                                                                     'include_deleted': 'true'}))
+
+    assert result.headers['Content-Type'] == 'text/csv; charset=utf-8'
+    rows = list(csv.DictReader(io.StringIO(result.body)))
+    assert len(rows) == len(EXPORT_RECORDS_CRUD_RETURN_VALUE)
+    assert rows[0]['operation_id'] == EXPORT_RECORDS_CRUD_RETURN_VALUE[0]['operation_id']
+    assert mock_crud_service.iter_items.call_args.kwargs['filter_expression'] is None
+
+
+def test_export_records_gzip_chunks_resume_with_cursor(processor):
+    processor.max_bytes = 1
+    set_query_pages(EXPORT_RECORDS_CRUD_RETURN_VALUE[:1], EXPORT_RECORDS_CRUD_RETURN_VALUE[1:])
+    first = processor.process_export_records_event(event=get_event({'format': 'csv', 'compression': 'gzip'}))
+
+    assert first.is_base64_encoded
+    assert first.headers['Content-Type'] == 'application/gzip'
+    assert first.headers['Content-Disposition'] == 'attachment; filename="records.csv.gz"'
+    cursor = first.headers['X-Next-Cursor']
+    assert CursorPaginator(logger=mock_logger, cursor=cursor, per_page='1').exclusive_start_key == LAST_EVALUATED_KEY
+
+    second = processor.process_export_records_event(event=get_event({'format': 'csv',
+                                                                      'compression': 'gzip',
+                                                                      'cursor': cursor}))
+    assert 'X-Next-Cursor' not in second.headers
+    assert mock_crud_service.iter_items.call_args.kwargs['exclusive_start_key'] == LAST_EVALUATED_KEY
+
+    # the chunks concatenated are a single multi-member gzip file with one CSV header
+    export = gzip.decompress(base64.b64decode(first.body) + base64.b64decode(second.body)).decode('utf-8')
+    rows = list(csv.DictReader(io.StringIO(export)))
+    assert [row['record_id'] for row in rows] == \
+           [item['SK'].split('#')[1] for item in EXPORT_RECORDS_CRUD_RETURN_VALUE]
+
+
+def test_export_records_stops_before_the_deadline(processor):
+    page_source = set_query_pages(EXPORT_RECORDS_CRUD_RETURN_VALUE[:1], EXPORT_RECORDS_CRUD_RETURN_VALUE[1:])
+    result = processor.process_export_records_event(event=get_event(),
+                                                    remaining_time_in_millis=1000)
+
+    assert page_source._query.call_count == 1
+    assert len(result.body.splitlines()) == 1
+    assert 'X-Next-Cursor' in result.headers
+
+
+@pytest.mark.parametrize('params', [{'format': 'xml'}, {'compression': 'br'}])
+def test_export_records_invalid_parameters(processor, params):
+    with pytest.raises(HTTPException) as exc:
+        processor.process_export_records_event(event=get_event(params))
+    assert exc.value.status_code == HTTPStatus.BAD_REQUEST
+
+
+def test_export_records_cursor_of_another_user(processor):
+    paginator = CursorPaginator(logger=mock_logger, cursor='', per_page='1')
+    cursor = paginator.encode_cursor({**LAST_EVALUATED_KEY, 'PK': 'User#other', 'GSI1PK': 'User#other'})
+    with pytest.raises(HTTPException) as exc:
+        processor.process_export_records_event(event=get_event({'cursor': cursor}))
+    assert exc.value.status_code == HTTPStatus.BAD_REQUEST
+    mock_crud_service.iter_items.assert_not_called()
@@ -8,6 +8,10 @@ from pythonjsonlogger import jsonlogger
 from lambdas.generate_random_string_worker.processor import GenerateRandomStringWorkerProcessor
 from shared.crud_service import CrudService
 from shared.error_handling import exception_handler
+from shared.random_pool import (RandomStringPool, get_random_pool_spec, RANDOM_ORG_API_URL,
+                                RANDOM_ORG_STRING_QUERY_PARAMS)
+from shared.requests_utils import HttpClient
+from shared.sqs_utils import get_batch_item_failures
 
 # environment variables
 LOGGING_LEVEL = os.environ.get('LOGGING_LEVEL', 'INFO')
@@ -31,20 +35,18 @@ crud_service = CrudService(logger=logger,
 # Random.org resources
 max_cache_size = 10
 random_string_cache = FIFOCache(maxsize=max_cache_size)
-random_org_api_url = 'https://www.random.org/strings'
+random_org_api_url = RANDOM_ORG_API_URL
 random_org_api_query_params = {
-    'num': max_cache_size,
-    'len': 8,
-    'digits': 'on',
-    'upperalpha': 'on',
-    'loweralpha': 'on',
-    'unique': 'on',
-    'format': 'plain',
-    'rnd': 'new'
+    **RANDOM_ORG_STRING_QUERY_PARAMS,
+    'num': max_cache_size
 }
+random_org_http_client = HttpClient()
+random_string_pool = RandomStringPool(logger=logger,
+                                      crud_service=crud_service,
+                                      spec=get_random_pool_spec(random_org_api_query_params))
 
 
-def handler(event: dict, context: dict) -> None:
+def handler(event: dict, context: dict) -> dict:
     """
     Generate Random String Worker Lambda.
     This lambda is triggered by messages in the 'Generate Random String SQS Queue' and
@@ -57,23 +59,33 @@ def handler(event: dict, context: dict) -> None:
     other customers) but this is a good addition to reduce the amount of calls to the
     random string generation API.
 
+    When the in-memory cache is empty, a string is claimed from the random string pool
+    shared by all containers (kept topped up by the Refill Random String Pool Lambda),
+    and random.org is only called synchronously if the pool is empty.
+
     In the rare case we ran out of quota (Random.org grants each IP address has a base
     quota of 1,000,000 bits) it defaults to generating a random string locally so that
     the user experience is seamless.
 
-    If the user has a record history but does not have sufficient funds, it drops the
-    message and gets ready to process others.
+    The operation cost is deducted from the user Balance item (users without a Balance
+    item get one initialized from their record history or the initial credit). If the
+    user does not have sufficient funds, the message is not processed.
+
+    Otherwise, it saves a new Record with the results into the DynamoDB table in the same
+    transaction as the resulting balance and the updates of the user Stats and hourly,
+    daily and monthly Rollups.
 
-    Otherwise, if the user does NOT have a record history (first operation) or the
-    user has sufficient balance to cover for the operation cost, it performs the
-    operation, deducts the operation cost from the balance, and saves a new
-    Record with the results into the DynamoDB table.
+    The messages of a batch are grouped by user so each user's balance is read and
+    written once per batch. Redelivered messages whose Record already exists are skipped,
+    and only the messages that failed are reported back to SQS to be retried.
     """
     processor = GenerateRandomStringWorkerProcessor(logger=logger,
                                                     crud_service=crud_service,
                                                     random_org_api_url=random_org_api_url,
                                                     query_params=random_org_api_query_params,
-                                                    random_string_cache=random_string_cache)
+                                                    random_string_cache=random_string_cache,
+                                                    http_client=random_org_http_client,
+                                                    random_string_pool=random_string_pool)
 
-    for item in event.get('Records', []):
-        processor.process_generate_random_string_event(event=item)
+    failed_message_ids = processor.process_generate_random_string_events(events=event.get('Records', []))
+    return get_batch_item_failures(message_ids=failed_message_ids)
@@ -1,16 +1,19 @@
-import string
-import random
+from http import HTTPStatus
 from logging import Logger
+from typing import List, Optional, Tuple
 
+import requests
 from cachetools import FIFOCache
 
+from shared.balance_utils import get_or_initialize_user_balance, save_user_records
 from shared.date_utils import get_js_utc_now
 from shared.crud_service import CrudService
-from shared.json_utils import json_string_to_dict
 from shared.models.operation_model import Operation, OperationType
-from shared.models.record_model import RecordOUT, RecordIN, DEFAULT_INITIAL_USER_BALANCE
-from shared.record_utils import get_user_most_recent_record, is_user_first_operation, check_user_has_sufficient_balance
-from shared.requests_utils import request_with_retry
+from shared.models.record_model import RecordIN
+from shared.record_utils import get_saved_record_ids
+from shared.random_pool import RandomStringPool, generate_random_strings, get_random_org_alphabet
+from shared.requests_utils import HttpClient, request_with_retry
+from shared.sqs_utils import group_messages_by_user
 
 SINGLE_NUMBER_OPERATIONS = [OperationType.SQUARE_ROOT]
 
@@ -21,33 +24,83 @@ class GenerateRandomStringWorkerProcessor:
                  crud_service: CrudService,
                  random_org_api_url: str,
                  query_params: dict,
-                 random_string_cache: FIFOCache
+                 random_string_cache: FIFOCache,
+                 http_client: Optional[HttpClient] = None,
+                 random_string_pool: Optional[RandomStringPool] = None
                  ) -> None:
         self.logger = logger
         self.crud_service = crud_service
         self.random_org_api_url = random_org_api_url
         self.query_params = query_params
         self.random_string_cache = random_string_cache
-
-    def process_generate_random_string_event(self, event: dict) -> None:
-        body = json_string_to_dict(event.get('body', '{}'))
-        record_id = body.get('record_id')
-        user_id = body.get('user_id')
-        operation_in = body.get('operation', {})
-        operation = Operation(**operation_in)
-
-        self.logger.info(f"Processing Generate Random String event for User {user_id}",
-                         extra={'RecordId': record_id, 'Operation': operation.dict()})
-        user_records_db = get_user_most_recent_record(crud_service=self.crud_service,
-                                                      user_id=user_id)
-
-        if is_user_first_operation(logger=self.logger,
-                                   user_records_db=user_records_db):
-            self.logger.info("User's first operation. Granting credit and calculating operation.")
-            results = self._generate_random_string()
-
-            self.logger.info("Deducting operation costs from initial balance")
-            user_balance = DEFAULT_INITIAL_USER_BALANCE - operation.cost
+        self.http_client = http_client
+        self.random_string_pool = random_string_pool
+
+    def process_generate_random_string_events(self, events: List[dict]) -> List[str]:
+        """
+        Processes a batch of SQS messages grouped by user. Each user's balance is read once,
+        the operation costs are deducted in order in memory, and the resulting balance and
+        Records are persisted together in a transaction.
+        Messages without sufficient funds are dropped, messages whose Record already exists
+        (redeliveries) are skipped.
+        :param events: SQS records of the Lambda event
+        :return: IDs of the messages that failed and should be retried
+        """
+        messages_by_user, failed_message_ids = group_messages_by_user(logger=self.logger,
+                                                                      events=events)
+        for user_id, user_messages in messages_by_user.items():
+            try:
+                failed_message_ids.extend(self._process_user_generate_random_string_events(
+                    user_id=user_id,
+                    user_messages=user_messages))
+            except Exception as err:
+                self.logger.exception(f"Could not process messages for User {user_id}",
+                                      extra={'Exception': err})
+                failed_message_ids.extend(event.get('messageId') for event, _ in user_messages)
+        return failed_message_ids
+
+    def _process_user_generate_random_string_events(self,
+                                                    user_id: str,
+                                                    user_messages: List[Tuple[dict, dict]]
+                                                    ) -> List[str]:
+        """
+        Generates the random strings of a single user and persists them.
+        :param user_id: ID of the user
+        :param user_messages: List of (SQS record, parsed message body) in order
+        :return: IDs of the messages whose operation could not be performed
+        """
+        self.logger.info(f"Processing {len(user_messages)} Generate Random String events for User {user_id}")
+        balance = get_or_initialize_user_balance(logger=self.logger,
+                                                 crud_service=self.crud_service,
+                                                 user_id=user_id)
+        saved_record_ids = get_saved_record_ids(crud_service=self.crud_service,
+                                                user_id=user_id,
+                                                record_ids=[body.get('record_id') for _, body in user_messages])
+        user_balance = balance.user_balance
+        records = []
+        operation_types = []
+        failed_message_ids = []
+        for event, body in user_messages:
+            record_id = body.get('record_id')
+            if record_id in saved_record_ids:
+                self.logger.info("Record was already saved.",
+                                 extra={'RecordId': record_id})
+                continue
+            try:
+                operation = Operation(**body.get('operation', {}))
+                if user_balance < operation.cost:
+                    self.logger.info("Insufficient funds. Dropping message.",
+                                     extra={'RecordId': record_id, 'UserBalance': user_balance})
+                    continue
+
+                results = self._generate_random_string()
+            except Exception as err:
+                self.logger.exception("Could not generate the random string.",
+                                      extra={'RecordId': record_id, 'Exception': err})
+                failed_message_ids.append(event.get('messageId'))
+                continue
+
+            user_balance = user_balance - operation.cost
             record_in = RecordIN(record_id=record_id,
                                  operation_id=operation.operation_id,
                                  user_id=user_id,
@@ -55,29 +108,20 @@ class GenerateRandomStringWorkerProcessor:
                                  user_balance=user_balance,
                                  operation_response=results,
                                  date=get_js_utc_now())
-            self.logger.info("Saving record to DB",
-                             extra={'RecordIN': record_in.dict()})
-            self.crud_service.create(item=record_in.dict())
-            return
-
-        user_record = RecordOUT(**user_records_db[0])
-        check_user_has_sufficient_balance(logger=self.logger,
-                                          operation=operation,
-                                          recent_record=user_record)
-        results = self._generate_random_string()
-        self.logger.info("Deducting operation cost from current balance")
-        user_balance = user_record.user_balance - operation.cost
-        record_in = RecordIN(record_id=record_id,
-                             operation_id=operation.operation_id,
-                             user_id=user_id,
-                             amount=operation.cost,
-                             user_balance=user_balance,
-                             operation_response=results,
-                             date=get_js_utc_now())
-        self.logger.info("Saving record to DB",
-                         extra={'RecordIN': record_in.dict()})
-        self.crud_service.create(item=record_in.dict())
-        return
+            records.append(record_in.dict())
+            operation_types.append(operation.type)
+            saved_record_ids.add(record_id)
+
+        if not records:
+            return failed_message_ids
+
+        save_user_records(logger=self.logger,
+                          crud_service=self.crud_service,
+                          user_id=user_id,
+                          expected_balance=balance.user_balance,
+                          records=records,
+                          operation_types=operation_types)
+        return failed_message_ids
 
     def _generate_random_string(self) -> str:
         try:
@@ -88,15 +132,31 @@ class GenerateRandomStringWorkerProcessor:
             return random_string
 
         except KeyError:
+            if self.random_string_pool:
+                self.logger.info("Cache is empty. Claiming random string from the pool.")
+                random_string = self.random_string_pool.claim()
+                if random_string:
+                    self.logger.info("Returning random string",
+                                     extra={'RandomString': random_string})
+                    return random_string
+
             self.logger.info("Cache is empty. Calling random.org API.")
-            response = request_with_retry(logger=self.logger,
-                                          url=self.random_org_api_url,
-                                          request_method='GET',
-                                          query_params=self.query_params)
-            if not response.text:
+            try:
+                response = request_with_retry(logger=self.logger,
+                                              url=self.random_org_api_url,
+                                              request_method='GET',
+                                              query_params=self.query_params,
+                                              http_client=self.http_client)
+            except requests.RequestException as err:
+                self.logger.exception("Could not reach Random.org API.",
+                                      extra={'Exception': err})
+                response = None
+
+            if response is None or response.status_code >= HTTPStatus.BAD_REQUEST or not response.text:
                 self.logger.error("Unfortunately, we ran out of Random.org API Quota.")
-                local_strings_list = self._generate_random_strings_locally(count=10,
-                                                                           length=8)
+                local_strings_list = self._generate_random_strings_locally(
+                    count=int(self.query_params.get('num', 10)),
+                    length=int(self.query_params.get('len', 8)))
                 self.logger.info("Saving local random strings to cache",
                                  extra={'LocalStrings': local_strings_list})
                 for local_string in local_strings_list:
@@ -121,11 +181,6 @@ class GenerateRandomStringWorkerProcessor:
     def _generate_random_strings_locally(self, count: int, length: int) -> list:
         self.logger.info("Generating Random String Locally",
                          extra={'Count': count, 'StringsLength': length})
-        string_list = []
-        for _ in range(count):
-            # choose from all lowercase letter
-            letters = string.ascii_lowercase
-            result_str = ''.join(random.choice(letters) for i in range(length))
-            string_list.append(result_str)
-
-        return string_list
+        return generate_random_strings(count=count,
+                                       length=length,
+                                       alphabet=get_random_org_alphabet(self.query_params))
@@ -12,7 +12,6 @@ mock_cache = MagicMock()
 mock_js_utc_now = MagicMock()
 
 GENERATE_RANDOM_STRING_EVENT_VALID = json_fixture('generate_random_string_event_valid.json')
-RANDOM_STRING_REQUEST_RETURN_VALUE = "PKXculUm\nWhVZdSjH\nLQaa2XiN\new5KmzQK\nwG953VwV\nkQUnfUhG\nlBo9BIWI\nd4qWQZry\nbSVT7BjF"
 RANDOM_STRING_OPERATION_EXPECTED_VALID = json_fixture('random_string_operation_expected_valid.json')
 
 
@@ -25,15 +24,56 @@ def processor() -> GenerateRandomStringWorkerProcessor:
                                                random_string_cache=mock_cache)
 
 
-@patch('lambdas.generate_random_string_worker.processor.request_with_retry', mock_request_helper)
 @patch("lambdas.generate_random_string_worker.processor.get_js_utc_now", mock_js_utc_now)
 def test_generate_random_string_success(processor):
-    event = GENERATE_RANDOM_STRING_EVENT_VALID
-    mock_crud_service.list_items.return_value = []
-    mock_request_helper.text = RANDOM_STRING_REQUEST_RETURN_VALUE
+    event = {**GENERATE_RANDOM_STRING_EVENT_VALID, 'messageId': '1'}
+    mock_crud_service.reset_mock()
+    mock_crud_service.get.return_value = {'SK': 'Balance',
+                                          'user_id': 'b86ed25a-f978-4ca6-9903-4fd2ef3b6209',
+                                          'user_balance': 20}
+    mock_crud_service.batch_get.return_value = []
     mock_cache.popitem.return_value = ("PKXculUm", "PKXculUm")
     mock_js_utc_now.return_value = 1678232290113
-    processor.process_generate_random_string_event(event=event)
 
+    failed_message_ids = processor.process_generate_random_string_events(events=[event, event])
+
+    assert failed_message_ids == []
+    transact_items = mock_crud_service.transact_write.call_args.kwargs['transact_items']
+    assert transact_items[0]['Update']['ExpressionAttributeValues'][':user_balance'] == 14
+    # the redelivered duplicate in the same batch is saved once
     expected = RANDOM_STRING_OPERATION_EXPECTED_VALID
-    mock_crud_service.create.assert_called_with(**expected)
+    assert transact_items[1:2] == [{'Put': {'Item': expected['item'],
+                                            'ConditionExpression': 'attribute_not_exists(SK)'}}]
+    assert [transact_item['Update']['Key']['SK'] for transact_item in transact_items[2:]] == [
+        'Stats', 'Rollup#hour#2023-03-07T23', 'Rollup#day#2023-03-07', 'Rollup#month#2023-03']
+
+
+@patch('lambdas.generate_random_string_worker.processor.request_with_retry', mock_request_helper)
+def test_generate_random_string_claims_from_pool_when_cache_is_empty():
+    mock_request_helper.reset_mock()
+    mock_pool = MagicMock()
+    mock_pool.claim.return_value = 'WhVZdSjH'
+    empty_cache = MagicMock()
+    empty_cache.popitem.side_effect = KeyError()
+    processor = GenerateRandomStringWorkerProcessor(logger=mock_logger,
+                                                    crud_service=mock_crud_service,
+                                                    random_org_api_url='',
+                                                    query_params={},
+                                                    random_string_cache=empty_cache,
+                                                    random_string_pool=mock_pool)
+
+    assert processor._generate_random_string() == 'WhVZdSjH'
+    mock_request_helper.assert_not_called()
+
+
+def test_generate_random_strings_locally_uses_configured_charset():
+    processor = GenerateRandomStringWorkerProcessor(logger=mock_logger,
+                                                    crud_service=mock_crud_service,
+                                                    random_org_api_url='',
+                                                    query_params={'len': 8, 'digits': 'on', 'upperalpha': 'on'},
+                                                    random_string_cache=mock_cache)
+
+    random_strings = processor._generate_random_strings_locally(count=10, length=8)
+
+    assert len(set(random_strings)) == 10
+    assert all(len(s) == 8 and s.isalnum() and s == s.upper() for s in random_strings)
@@ -31,6 +31,7 @@ def processor() -> GetBalanceEventProcessor:
 
 def test_get_balance_first_user_operation_returns_default_initial_balance(processor):
     event = GET_BALANCE_EVENT_VALID
+    mock_crud_service.get.return_value = None
     mock_crud_service.list_items.return_value = LIST_ITEMS_GET_USER_NO_RECORDS_RETURN_VALUE
     result = processor.process_get_balance_event(event=event)
 
@@ -46,6 +47,7 @@ def test_get_balance_first_user_operation_returns_default_initial_balance(proces
 
 def test_get_balance_returns_current_balance(processor):
     event = GET_BALANCE_EVENT_VALID
+    mock_crud_service.get.return_value = None
     mock_crud_service.list_items.return_value = LIST_ITEMS_GET_USER_RECORDS_BALANCE_RETURN
     result = processor.process_get_balance_event(event=event)
 
@@ -57,3 +59,24 @@ def test_get_balance_returns_current_balance(processor):
 
     assert result.status_code == HTTPStatus.OK
     assert json_string_to_dict(result.body) == expected
+
+
+def test_get_balance_returns_balance_item(processor):
+    event = GET_BALANCE_EVENT_VALID
+    mock_crud_service.reset_mock()
+    mock_crud_service.get.return_value = {
+        'PK': 'User#77d46173-1d59-48d0-8b75-eaa76eb857b2',
+        'SK': 'Balance',
+        'entity': 'BALANCE',
+        'user_id': '77d46173-1d59-48d0-8b75-eaa76eb857b2',
+        'user_balance': 12
+    }
+    result = processor.process_get_balance_event(event=event)
+
+    assert result.status_code == HTTPStatus.OK
+    assert json_string_to_dict(result.body)['UserBalance'] == 12
+    mock_crud_service.get.assert_called_with(pk='User#77d46173-1d59-48d0-8b75-eaa76eb857b2',
+                                             sk='Balance',
+                                             consistent_read=True,
+                                             fields=['user_balance'])
+    mock_crud_service.list_items.assert_not_called()
@@ -0,0 +1,104 @@
+from datetime import datetime
+from http import HTTPStatus
+from logging import Logger
+
+from shared.api_utils import HTTPResponse
+from shared.crud_service import CrudService, ConditionType
+from shared.date_utils import validate_date_epoch_string
+from shared.error_handling import HTTPException
+from shared.models.rollup_model import RollupOUT
+from shared.rollup_utils import ROLLUP_GRANULARITIES, get_rollup_bucket, get_rollup_sort_key
+from shared.user_utils import get_user_id_from_cognito_authorizer
+
+# Rollup items read per request, ~40 days hourly, ~2.7 years daily
+HISTOGRAM_MAX_BUCKETS = 1000
+HISTOGRAM_BUCKET_FIELDS = ['bucket', 'operation_count', 'credit_spent', 'ending_balance', 'last_operation_date']
+MILLISECONDS_PER_UNIT = {
+    'hour': 60 * 60 * 1000,
+    'day': 24 * 60 * 60 * 1000
+}
+
+
+class GetRecordsHistogramEventProcessor:
+    def __init__(self,
+                 logger: Logger,
+                 crud_service: CrudService
+                 ) -> None:
+        self.logger = logger
+        self.crud_service = crud_service
+
+    def process_get_records_histogram_event(self, event: dict) -> HTTPResponse:
+        """
+        Summarizes the user operations of a date range per hour, day or month with a single
+        query on the Rollup items of the range (one item per bucket with operations), instead
+        of reading every Record. Buckets without operations are not returned.
+        :param event: API Gateway event
+        :return: HTTPResponse with the totals of the range and the buckets in chronological order
+        """
+        user_id = get_user_id_from_cognito_authorizer(logger=self.logger,
+                                                      event=event)
+        params = event.get('queryStringParameters') or {}
+        self.logger.info(f"Processing Get Records Histogram request for User {user_id}",
+                         extra={'QueryParameters': params})
+
+        granularity = params.get('granularity', 'day')
+        if granularity not in ROLLUP_GRANULARITIES:
+            raise HTTPException(status_code=HTTPStatus.BAD_REQUEST,
+                                msg=f"granularity parameter must be one of {', '.join(ROLLUP_GRANULARITIES)}.")
+        date_start = params.get('date_start', '')
+        date_end = params.get('date_end', '')
+        if not date_start or not date_end:
+            raise HTTPException(status_code=HTTPStatus.BAD_REQUEST,
+                                msg="date_start and date_end parameters are required.")
+        validate_date_epoch_string(logger=self.logger, date=date_start)
+        validate_date_epoch_string(logger=self.logger, date=date_end)
+        if int(date_start) > int(date_end):
+            raise HTTPException(status_code=HTTPStatus.BAD_REQUEST,
+                                msg="date_start must be lower or equal than date_end")
+        if _count_buckets(date_start=int(date_start), date_end=int(date_end), granularity=granularity) \
+                > HISTOGRAM_MAX_BUCKETS:
+            raise HTTPException(status_code=HTTPStatus.BAD_REQUEST,
+                                msg=f"The date range has more than {HISTOGRAM_MAX_BUCKETS} {granularity} buckets, "
+                                    f"use a shorter range or a coarser granularity.")
+
+        bucket_start = get_rollup_bucket(date=int(date_start), granularity=granularity)
+        bucket_end = get_rollup_bucket(date=int(date_end), granularity=granularity)
+        rollups_db = self.crud_service.list_items(pk=f'User#{user_id}',
+                                                  condition_type=ConditionType.BETWEEN,
+                                                  low_value=get_rollup_sort_key(granularity=granularity,
+                                                                                bucket=bucket_start),
+                                                  high_value=get_rollup_sort_key(granularity=granularity,
+                                                                                 bucket=bucket_end),
+                                                  ascending=True,
+                                                  limit=HISTOGRAM_MAX_BUCKETS,
+                                                  fields=HISTOGRAM_BUCKET_FIELDS)
+        buckets = RollupOUT.from_db_items(rollups_db, fields=HISTOGRAM_BUCKET_FIELDS)
+        self.logger.info(f"Returning {len(buckets)} {granularity} buckets.")
+
+        response_body = {
+            'granularity': granularity,
+            'date_start': int(date_start),
+            'date_end': int(date_end),
+            'operation_count': sum(bucket['operation_count'] for bucket in buckets),
+            'credit_spent': sum(bucket['credit_spent'] for bucket in buckets),
+            'ending_balance': buckets[-1]['ending_balance'] if buckets else None,
+            'buckets': buckets
+        }
+        return HTTPResponse(status_code=HTTPStatus.OK,
+                            body=response_body)
+
+
+def _count_buckets(date_start: int, date_end: int, granularity: str) -> int:
+    """
+    Number of buckets of the granularity a date range spans.
+    :param date_start: Start date in epoch format (milliseconds)
+    :param date_end: End date in epoch format (milliseconds)
+    :param granularity: hour, day or month
+    :return: number of buckets
+    """
+    if granularity in MILLISECONDS_PER_UNIT:
+        unit = MILLISECONDS_PER_UNIT[granularity]
+        return date_end // unit - date_start // unit + 1
+    start = datetime.utcfromtimestamp(date_start / 1000)
+    end = datetime.utcfromtimestamp(date_end / 1000)
+    return (end.year - start.year) * 12 + end.month - start.month + 1
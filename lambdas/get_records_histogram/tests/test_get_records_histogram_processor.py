@@ -0,0 +1,89 @@
+from http import HTTPStatus
+
+import pytest
+from mock import MagicMock
+
+from lambdas.get_records_histogram.processor import GetRecordsHistogramEventProcessor
+from shared.crud_service import ConditionType
+from shared.error_handling import HTTPException
+from shared.fixture_utils import json_fixture
+from shared.json_utils import json_string_to_dict
+
+mock_logger = MagicMock()
+mock_crud_service = MagicMock()
+
+GET_RECORDS_HISTOGRAM_EVENT_VALID = json_fixture('get_records_histogram_event_valid.json')
+GET_RECORDS_HISTOGRAM_LIST_ITEMS_RETURN_VALUE = json_fixture('get_records_histogram_list_items_return_value.json')
+USER_PK = 'User#77d46173-1d59-48d0-8b75-eaa76eb857b2'
+# 2023-03-07T00:00:00Z and 2023-03-09T23:59:59Z
+DATE_START = '1678147200000'
+DATE_END = '1678406399000'
+
+
+def reset_mocks():
+    mock_logger.reset_mock()
+    mock_crud_service.reset_mock()
+
+
+@pytest.fixture(scope="module")
+def processor() -> GetRecordsHistogramEventProcessor:
+    reset_mocks()
+    return GetRecordsHistogramEventProcessor(logger=mock_logger,
+                                             crud_service=mock_crud_service)
+
+
+def get_event(params: dict) -> dict:
+    return {**GET_RECORDS_HISTOGRAM_EVENT_VALID, 'queryStringParameters': params}
+
+
+def test_get_records_histogram_daily(processor):
+    mock_crud_service.list_items.return_value = GET_RECORDS_HISTOGRAM_LIST_ITEMS_RETURN_VALUE
+    result = processor.process_get_records_histogram_event(event=get_event({'date_start': DATE_START,
+                                                                            'date_end': DATE_END}))
+
+    assert result.status_code == HTTPStatus.OK
+    histogram = json_string_to_dict(result.body)
+    assert histogram['granularity'] == 'day'
+    assert histogram['operation_count'] == 5
+    assert histogram['credit_spent'] == 10
+    assert histogram['ending_balance'] == 20
+    assert [bucket['bucket'] for bucket in histogram['buckets']] == ['2023-03-07', '2023-03-09']
+    kwargs = mock_crud_service.list_items.call_args.kwargs
+    assert kwargs['pk'] == USER_PK
+    assert kwargs['condition_type'] == ConditionType.BETWEEN
+    assert kwargs['low_value'] == 'Rollup#day#2023-03-07'
+    assert kwargs['high_value'] == 'Rollup#day#2023-03-09'
+    assert kwargs['ascending'] is True
+
+
+@pytest.mark.parametrize('granularity, low_value, high_value', [
+    ('hour', 'Rollup#hour#2023-03-07T00', 'Rollup#hour#2023-03-09T23'),
+    ('month', 'Rollup#month#2023-03', 'Rollup#month#2023-03')
+])
+def test_get_records_histogram_granularities(processor, granularity, low_value, high_value):
+    mock_crud_service.list_items.return_value = []
+    result = processor.process_get_records_histogram_event(event=get_event({'granularity': granularity,
+                                                                            'date_start': DATE_START,
+                                                                            'date_end': DATE_END}))
+
+    histogram = json_string_to_dict(result.body)
+    assert histogram['buckets'] == []
+    assert histogram['operation_count'] == 0
+    assert histogram['ending_balance'] is None
+    kwargs = mock_crud_service.list_items.call_args.kwargs
+    assert (kwargs['low_value'], kwargs['high_value']) == (low_value, high_value)
+
+
+@pytest.mark.parametrize('params', [
+    {'granularity': 'week', 'date_start': DATE_START, 'date_end': DATE_END},
+    {'date_start': DATE_START},
+    {'date_start': DATE_END, 'date_end': DATE_START},
+    # more than 1000 hours
+    {'granularity': 'hour', 'date_start': '0', 'date_end': DATE_END}
+])
+def test_get_records_histogram_invalid_parameters(processor, params):
+    mock_crud_service.reset_mock()
+    with pytest.raises(HTTPException) as exc:
+        processor.process_get_records_histogram_event(event=get_event(params))
+    assert exc.value.status_code == HTTPStatus.BAD_REQUEST
+    mock_crud_service.list_items.assert_not_called()
@@ -0,0 +1,34 @@
+from http import HTTPStatus
+from logging import Logger
+
+from shared.api_utils import HTTPResponse
+from shared.crud_service import CrudService
+from shared.models.user_stats_model import UserStatsOUT
+from shared.stats_utils import USER_STATS_SK
+from shared.user_utils import get_user_id_from_cognito_authorizer
+
+
+class GetUserStatsEventProcessor:
+    def __init__(self,
+                 logger: Logger,
+                 crud_service: CrudService
+                 ) -> None:
+        self.logger = logger
+        self.crud_service = crud_service
+
+    def process_get_user_stats_event(self, event: dict) -> HTTPResponse:
+        user_id = get_user_id_from_cognito_authorizer(logger=self.logger,
+                                                      event=event)
+
+        self.logger.info(f"Processing Get User Stats request for User {user_id}")
+
+        stats_db = self.crud_service.get(pk=f'User#{user_id}',
+                                         sk=USER_STATS_SK)
+        if not stats_db:
+            self.logger.info("User has no stats yet.")
+            stats_db = {'user_id': user_id}
+        user_stats = UserStatsOUT(**stats_db).dict()
+        self.logger.info("Returning User stats.",
+                         extra={'UserStats': user_stats})
+        return HTTPResponse(status_code=HTTPStatus.OK,
+                            body=user_stats)
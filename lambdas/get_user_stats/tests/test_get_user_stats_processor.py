@@ -0,0 +1,61 @@
+from http import HTTPStatus
+
+import pytest
+from mock import MagicMock
+
+from lambdas.get_user_stats.processor import GetUserStatsEventProcessor
+from shared.fixture_utils import json_fixture
+from shared.json_utils import json_string_to_dict
+
+mock_logger = MagicMock()
+mock_crud_service = MagicMock()
+
+GET_USER_STATS_EVENT_VALID = json_fixture('get_user_stats_event_valid.json')
+GET_USER_STATS_GET_RETURN_VALUE = json_fixture('get_user_stats_get_return_value.json')
+USER_ID = '77d46173-1d59-48d0-8b75-eaa76eb857b2'
+
+
+def reset_mocks():
+    mock_logger.reset_mock()
+    mock_crud_service.reset_mock()
+
+
+@pytest.fixture(scope="module")
+def processor() -> GetUserStatsEventProcessor:
+    reset_mocks()
+    return GetUserStatsEventProcessor(logger=mock_logger,
+                                      crud_service=mock_crud_service)
+
+
+def test_get_user_stats(processor):
+    mock_crud_service.get.return_value = dict(GET_USER_STATS_GET_RETURN_VALUE)
+    result = processor.process_get_user_stats_event(event=GET_USER_STATS_EVENT_VALID)
+
+    assert result.status_code == HTTPStatus.OK
+    user_stats = json_string_to_dict(result.body)
+    assert user_stats['user_id'] == USER_ID
+    assert user_stats['operation_count'] == 3
+    assert user_stats['credit_spent'] == 8
+    assert user_stats['operations']['ADDITION'] == {'operation_count': 2, 'credit_spent': 2}
+    assert user_stats['operations']['RANDOM_STRING'] == {'operation_count': 1, 'credit_spent': 6}
+    assert user_stats['operations']['DIVISION'] == {'operation_count': 0, 'credit_spent': 0}
+    assert user_stats['first_operation_date'] == 1678196485853
+    assert user_stats['last_operation_date'] == 1678232290113
+    assert user_stats['min_balance'] == 22
+    assert user_stats['max_balance'] == 29
+    assert 'PK' not in user_stats and 'operation_count_ADDITION' not in user_stats
+    mock_crud_service.get.assert_called_with(pk=f'User#{USER_ID}', sk='Stats')
+
+
+def test_get_user_stats_without_operations(processor):
+    mock_crud_service.get.return_value = None
+    result = processor.process_get_user_stats_event(event=GET_USER_STATS_EVENT_VALID)
+
+    assert result.status_code == HTTPStatus.OK
+    user_stats = json_string_to_dict(result.body)
+    assert user_stats['operation_count'] == 0
+    assert user_stats['credit_spent'] == 0
+    assert user_stats['first_operation_date'] is None
+    assert user_stats['min_balance'] is None
+    assert set(user_stats['operations']) == {'ADDITION', 'SUBTRACTION', 'MULTIPLICATION',
+                                             'DIVISION', 'SQUARE_ROOT', 'RANDOM_STRING'}
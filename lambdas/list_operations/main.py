@@ -41,6 +41,9 @@ def handler(event: dict, context: dict) -> HTTPResponse:
     10 per_page limit.
 
     You can also filter by operation type by providing the operation_type query parameters.
+
+    To only return some of the Operation fields, provide them comma separated in the
+    `fields` query parameter (i.e. fields=operation_id,type,cost).
     """
     processor = ListOperationsProcessor(logger=logger,
                                         crud_service=crud_service)
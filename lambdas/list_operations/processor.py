@@ -2,10 +2,11 @@ from http import HTTPStatus
 from logging import Logger
 from typing import List
 
-from shared.api_utils import HTTPResponse
+from shared.api_utils import HTTPResponse, CACHE_CONTROL_REVALIDATE
 from shared.crud_service import CrudService, ConditionType
 from shared.models.operation_model import OperationOUT
 from shared.pagination import Paginator
+from shared.projection_utils import get_requested_fields
 from shared.user_utils import get_user_id_from_cognito_authorizer
 
 
@@ -35,11 +36,16 @@ class ListOperationsProcessor:
                               per_page=per_page)
 
         payload = self._evaluate_filter_conditions(params=params)
+        fields = get_requested_fields(logger=self.logger,
+                                      fields=params.get('fields'),
+                                      model=OperationOUT)
+        if fields:
+            payload['fields'] = OperationOUT.get_db_attributes(fields=fields)
 
         self.logger.info("Sending query request to DynamoDB",
                          extra={'Payload': payload})
         operations_queryset: List[dict] = self.crud_service.list_items(**payload)
-        operations_list = [OperationOUT(**record).dict() for record in operations_queryset]
+        operations_list = OperationOUT.from_db_items(operations_queryset, fields=fields)
         items = paginator.paginate(items_list=operations_list)
         response_body = {
             'page': int(page),
@@ -48,8 +54,10 @@ class ListOperationsProcessor:
             'total_pages': paginator.total_pages,
             'data': items
         }
+        # the catalog rarely changes, clients revalidate with the ETag (If-None-Match)
         return HTTPResponse(status_code=HTTPStatus.OK,
-                            body=response_body)
+                            body=response_body,
+                            headers={'Cache-Control': CACHE_CONTROL_REVALIDATE})
 
     def _evaluate_filter_conditions(self, params: dict) -> dict:
         """
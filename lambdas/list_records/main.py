@@ -36,6 +36,12 @@ def handler(event: dict, context: dict) -> HTTPResponse:
     Includes pagination (page and per_page parameters), which is enabled by default with a
     10 per_page limit.
 
+    The page/per_page mode reads every matching Record (following the DynamoDB continuation
+    keys) to compute the totals, so for large histories use cursor pagination instead by
+    providing the `cursor` query parameter (empty for the first page). Only `per_page` Records
+    are read from the DB and the response includes a `next_cursor` value to request the
+    following page (null on the last page).
+
     You can also filter by record date or by user balance by providing the query parameters:
     - date_start
     - date_end
@@ -56,6 +62,10 @@ def handler(event: dict, context: dict) -> HTTPResponse:
     These filters are mutually exclusive, meaning you can either filter by date or filter by
     user balance. If you provide a date_start/date_end and also a balance_start/balance_end,
     it returns the Records that comply with the date filters.
+
+    To only return some of the Record fields, provide them comma separated in the `fields`
+    query parameter (i.e. fields=record_id,operation_response,date). Only those attributes
+    are read from DynamoDB.
     """
     processor = ListRecordsProcessor(logger=logger,
                                      crud_service=crud_service)
@@ -1,15 +1,26 @@
+import operator
+from functools import reduce
 from http import HTTPStatus
 from logging import Logger
-from typing import List
+from typing import List, Optional
+
+from boto3.dynamodb.conditions import Attr, ConditionBase
 
 from shared.api_utils import HTTPResponse
 from shared.crud_service import CrudService, ConditionType
 from shared.date_utils import validate_date_epoch_string
 from shared.error_handling import HTTPException
-from shared.models.record_model import RecordOUT
-from shared.pagination import Paginator
+from shared.models.record_model import RecordOUT, get_balance_sort_key, BALANCE_SORT_KEY_MAX
+from shared.pagination import Paginator, CursorPaginator
+from shared.projection_utils import get_requested_fields
+from shared.record_utils import RECORD_NOT_DELETED_FILTER
+from shared.stats_utils import get_user_stats_bounds, USER_STATS_BOUNDS
 from shared.user_utils import get_user_id_from_cognito_authorizer
 
+LIST_RECORDS_MAX_ITEMS = 9999
+# DynamoDB IN comparator accepts up to 100 values
+OPERATION_ID_FILTER_MAX_VALUES = 100
+
 
 class ListRecordsProcessor:
     def __init__(self,
@@ -29,6 +40,10 @@ class ListRecordsProcessor:
         self.logger.info(f"Processing list records event for User: {user_id}",
                          extra={'QueryParameters': params})
 
+        if 'cursor' in params:
+            return self._process_list_records_with_cursor(user_id=user_id,
+                                                          params=params)
+
         self.logger.info("Initializing paginator")
         page = params.get('page', '1')
         per_page = params.get('per_page', '10')
@@ -38,27 +53,172 @@ class ListRecordsProcessor:
 
         self.logger.info("Evaluating filter conditions")
         payload = self._evaluate_filter_conditions(user_id, params)
+        fields = self._evaluate_fields(params=params,
+                                       payload=payload)
+
+        payload['max_items'] = LIST_RECORDS_MAX_ITEMS
 
         self.logger.info("Sending query request to DynamoDB",
                          extra={'Payload': payload})
-        records_queryset: List[dict] = self.crud_service.list_items(**payload)
-        records_list = [RecordOUT(**record).dict() for record in records_queryset]
+        records_queryset = self.crud_service.iter_items(**payload)
+        records_list = RecordOUT.from_db_items(records_queryset, fields=fields)
+        self._log_filter_selectivity(records_queryset=records_queryset)
         items = paginator.paginate(items_list=records_list)
         response_body = {
             'page': int(page),
             'per_page': int(per_page),
             'total': paginator.total,
             'total_pages': paginator.total_pages,
+            'count': records_queryset.count,
+            'scanned_count': records_queryset.scanned_count,
+            'index': _get_index_name(payload=payload),
             'data': items
         }
         return HTTPResponse(status_code=HTTPStatus.OK,
                             body=response_body)
 
-    def _evaluate_filter_conditions(self, user_id: str, params: dict) -> dict:
+    def _process_list_records_with_cursor(self, user_id: str, params: dict) -> HTTPResponse:
+        """
+        Cursor (keyset) pagination mode. Only `per_page` records are returned, reading from
+        DynamoDB right after the key encoded in the `cursor` parameter (more than one request
+        may be needed when the filters discard records). An empty cursor returns the first page.
+        :param user_id: User id from cognito authorizer
+        :param params: Query parameters
+        :return: HTTPResponse with the page and the next_cursor (null on the last page)
+        """
+        self.logger.info("Initializing cursor paginator")
+        cursor = params.get('cursor') or ''
+        per_page = params.get('per_page', '10')
+        paginator = CursorPaginator(logger=self.logger,
+                                    cursor=cursor,
+                                    per_page=per_page)
+
+        self.logger.info("Evaluating filter conditions")
+        payload = self._evaluate_filter_conditions(user_id, params,
+                                                   exclusive_start_key=paginator.exclusive_start_key)
+        self._validate_cursor_belongs_to_user(exclusive_start_key=paginator.exclusive_start_key,
+                                              payload=payload)
+        fields = self._evaluate_fields(params=params,
+                                       payload=payload)
+        payload['max_items'] = paginator.per_page
+        payload['exclusive_start_key'] = paginator.exclusive_start_key
+
+        self.logger.info("Sending page query request to DynamoDB",
+                         extra={'Payload': payload})
+        records_queryset = self.crud_service.iter_items(**payload)
+        records_list = RecordOUT.from_db_items(records_queryset, fields=fields)
+        self._log_filter_selectivity(records_queryset=records_queryset)
+        paginator.set_next_cursor(last_evaluated_key=records_queryset.last_evaluated_key)
+        response_body = {
+            'per_page': paginator.per_page,
+            'cursor': cursor,
+            'next_cursor': paginator.next_cursor,
+            'count': records_queryset.count,
+            'scanned_count': records_queryset.scanned_count,
+            'index': _get_index_name(payload=payload),
+            'data': records_list
+        }
+        return HTTPResponse(status_code=HTTPStatus.OK,
+                            body=response_body)
+
+    def _evaluate_filter_expression(self, params: dict) -> Optional[ConditionBase]:
+        """
+        Evaluates the query parameters applied to non-key attributes (FilterExpression).
+        Soft deleted records are hidden unless include_deleted=true.
+        :param params: Query parameters
+        :return: Filter conditions composed with AND, None if there are no conditions
+        """
+        conditions = []
+        if params.get('include_deleted', 'false').lower() != 'true':
+            conditions.append(RECORD_NOT_DELETED_FILTER)
+
+        amount_min = params.get('amount_min')
+        if amount_min:
+            self._validate_amount_parameter(amount=amount_min)
+            conditions.append(Attr('amount').gte(int(amount_min)))
+        amount_max = params.get('amount_max')
+        if amount_max:
+            self._validate_amount_parameter(amount=amount_max)
+            conditions.append(Attr('amount').lte(int(amount_max)))
+        if amount_min and amount_max:
+            self._validate_between_condition(start_value=amount_min,
+                                             end_value=amount_max)
+
+        operation_ids = [operation_id for operation_id in params.get('operation_id', '').split(',') if operation_id]
+        if len(operation_ids) > OPERATION_ID_FILTER_MAX_VALUES:
+            self.logger.error(f"Too many operation ids {len(operation_ids)}")
+            raise HTTPException(status_code=HTTPStatus.BAD_REQUEST,
+                                msg=f"A maximum of {OPERATION_ID_FILTER_MAX_VALUES} operation ids can be filtered")
+        if operation_ids:
+            conditions.append(Attr('operation_id').is_in(operation_ids))
+
+        return reduce(operator.and_, conditions) if conditions else None
+
+    def _log_filter_selectivity(self, records_queryset) -> None:
+        """
+        Logs how many records were read from DynamoDB and how many satisfied the filters.
+        :param records_queryset: consumed crud_service QueryIterator
+        """
+        self.logger.info("Records read from DynamoDB",
+                         extra={'Count': records_queryset.count,
+                                'ScannedCount': records_queryset.scanned_count})
+
+    def _evaluate_fields(self, params: dict, payload: dict) -> Optional[List[str]]:
+        """
+        Evaluates the fields query parameter and only reads the attributes needed to build
+        them from DynamoDB (ProjectionExpression).
+        :param params: Query parameters
+        :param payload: crud_service.list_items method payload
+        :return: Requested fields, None for all the fields
+        """
+        fields = get_requested_fields(logger=self.logger,
+                                      fields=params.get('fields'),
+                                      model=RecordOUT)
+        if fields:
+            payload['fields'] = RecordOUT.get_db_attributes(fields=fields)
+        return fields
+
+    def _validate_cursor_belongs_to_user(self, exclusive_start_key: Optional[dict], payload: dict) -> None:
+        """
+        Make sure a client-provided cursor cannot be used to read another user's partition.
+        The cursor must contain exactly the table and index key attributes of the query being
+        run, and every partition key attribute must match the current user's partition.
+        :param exclusive_start_key: Decoded cursor
+        :param payload: crud_service.list_items_page method payload
+        """
+        if not exclusive_start_key:
+            return
+
+        partition_keys = ['PK']
+        key_attributes = {'PK', 'SK'}
+        if payload.get('gsi1'):
+            partition_keys.append('GSI1PK')
+            key_attributes.update({'GSI1PK', 'GSI1SK'})
+        elif payload.get('gsi2'):
+            partition_keys.append('GSI2PK')
+            key_attributes.update({'GSI2PK', 'GSI2SK'})
+
+        valid_key_attributes = set(exclusive_start_key.keys()) == key_attributes
+        valid_partition = all(exclusive_start_key.get(partition_key) == payload['pk']
+                              for partition_key in partition_keys)
+        if not valid_key_attributes or not valid_partition:
+            self.logger.error("Cursor does not belong to the current user or query",
+                              extra={'Cursor': exclusive_start_key})
+            raise HTTPException(status_code=HTTPStatus.BAD_REQUEST,
+                                msg="cursor parameter is not valid")
+
+    def _evaluate_filter_conditions(self,
+                                    user_id: str,
+                                    params: dict,
+                                    exclusive_start_key: Optional[dict] = None
+                                    ) -> dict:
         """
         Evaluates query parameters and modifies the query before sending to DynamoDB.
+        When both a date range and a balance range are provided, the most selective one is
+        the key condition of the query (GSI1 or GSI2) and the other one is applied as a filter.
         :param user_id: User id from cognito authorizer
         :param params: Query parameters
+        :param exclusive_start_key: [Optional] Decoded cursor of the previous page
         :return: crud_service.list_items method payload
         """
         payload = {
@@ -66,6 +226,59 @@ class ListRecordsProcessor:
         }
         date_start = params.get('date_start')
         date_end = params.get('date_end')
+        balance_start = params.get('balance_start')
+        balance_end = params.get('balance_end')
+        range_filter = None
+        if (date_start or date_end) and (balance_start or balance_end):
+            if self._is_balance_range_more_selective(user_id=user_id,
+                                                     exclusive_start_key=exclusive_start_key,
+                                                     date_start=date_start,
+                                                     date_end=date_end,
+                                                     balance_start=balance_start,
+                                                     balance_end=balance_end):
+                self.logger.info("Querying the balance range, filtering the date range.")
+                range_filter = self._get_date_range_filter(date_start=date_start,
+                                                           date_end=date_end)
+                payload = self._get_balance_range_key_condition(balance_start=balance_start,
+                                                                balance_end=balance_end,
+                                                                payload=payload)
+            else:
+                self.logger.info("Querying the date range, filtering the balance range.")
+                range_filter = self._get_balance_range_filter(balance_start=balance_start,
+                                                              balance_end=balance_end)
+                payload = self._get_date_range_key_condition(date_start=date_start,
+                                                             date_end=date_end,
+                                                             payload=payload)
+        elif date_start or date_end:
+            payload = self._get_date_range_key_condition(date_start=date_start,
+                                                         date_end=date_end,
+                                                         payload=payload)
+        elif balance_start or balance_end:
+            payload = self._get_balance_range_key_condition(balance_start=balance_start,
+                                                            balance_end=balance_end,
+                                                            payload=payload)
+        else:
+            self.logger.info("No filters provided. Querying all user records.")
+            payload['gsi1'] = True
+            payload['gsi2'] = False
+            payload['condition_type'] = ConditionType.BEGINS_WITH
+            payload['condition_value'] = 'Record#'
+
+        filter_expression = self._evaluate_filter_expression(params=params)
+        if range_filter is not None:
+            filter_expression = range_filter if filter_expression is None else range_filter & filter_expression
+        if filter_expression is not None:
+            payload['filter_expression'] = filter_expression
+        return payload
+
+    def _get_date_range_key_condition(self, date_start: Optional[str], date_end: Optional[str], payload: dict) -> dict:
+        """
+        Modify the payload to query the records of a date range on GSI1
+        :param date_start: [Optional] Start date to query from
+        :param date_end: [Optional] End date to query until
+        :param payload: crud_service.list_items method payload
+        :return: updated payload
+        """
         if date_start:
             payload = self._validate_and_get_records_after_equal_start_date(date_start=date_start,
                                                                             payload=payload)
@@ -73,31 +286,117 @@ class ListRecordsProcessor:
                 payload = self._validate_and_get_records_between_start_and_end_date(date_start=date_start,
                                                                                     date_end=date_end,
                                                                                     payload=payload)
-        elif date_end:
+        else:
             payload = self._validate_and_get_records_before_equal_end_date(date_end=date_end,
                                                                            payload=payload)
+        return payload
 
+    def _get_balance_range_key_condition(self,
+                                         balance_start: Optional[str],
+                                         balance_end: Optional[str],
+                                         payload: dict
+                                         ) -> dict:
+        """
+        Modify the payload to query the records of a balance range on GSI2
+        :param balance_start: [Optional] Balance to query the records from
+        :param balance_end: [Optional] Balance to query the records until
+        :param payload: crud_service.list_items method payload
+        :return: updated payload
+        """
+        if balance_start:
+            payload = self._validate_and_get_records_greater_than_equal_balance_start(balance_start=balance_start,
+                                                                                      payload=payload)
+            if balance_end:
+                payload = self._validate_and_get_records_between_balance_start_and_end(balance_start=balance_start,
+                                                                                       balance_end=balance_end,
+                                                                                       payload=payload)
         else:
-            balance_start = params.get('balance_start')
-            balance_end = params.get('balance_end')
-            if balance_start:
-                payload = self._validate_and_get_records_greater_than_equal_balance_start(balance_start=balance_start,
-                                                                                          payload=payload)
-                if balance_end:
-                    payload = self._validate_and_get_records_between_balance_start_and_end(balance_start=balance_start,
-                                                                                           balance_end=balance_end,
-                                                                                           payload=payload)
-            elif balance_end:
-                payload = self._validate_and_get_records_less_than_equal_balance_end(balance_end=balance_end,
-                                                                                     payload=payload)
-            else:
-                self.logger.info("No filters provided. Querying all user records.")
-                payload['gsi1'] = True
-                payload['gsi2'] = False
-                payload['condition_type'] = ConditionType.BEGINS_WITH
-                payload['condition_value'] = 'Record#'
+            payload = self._validate_and_get_records_less_than_equal_balance_end(balance_end=balance_end,
+                                                                                 payload=payload)
         return payload
 
+    def _get_date_range_filter(self, date_start: Optional[str], date_end: Optional[str]) -> ConditionBase:
+        """
+        Validate the date parameters and get the filter condition of the date range
+        :param date_start: [Optional] Start date
+        :param date_end: [Optional] End date
+        :return: filter condition
+        """
+        conditions = []
+        if date_start:
+            validate_date_epoch_string(logger=self.logger, date=date_start)
+            conditions.append(Attr('date').gte(int(date_start)))
+        if date_end:
+            validate_date_epoch_string(logger=self.logger, date=date_end)
+            conditions.append(Attr('date').lte(int(date_end)))
+        if date_start and date_end:
+            self._validate_between_condition(start_value=date_start,
+                                             end_value=date_end)
+        return reduce(operator.and_, conditions)
+
+    def _get_balance_range_filter(self, balance_start: Optional[str], balance_end: Optional[str]) -> ConditionBase:
+        """
+        Validate the balance parameters and get the filter condition of the balance range
+        :param balance_start: [Optional] Start balance
+        :param balance_end: [Optional] End balance
+        :return: filter condition
+        """
+        conditions = []
+        if balance_start:
+            self._validate_balance_parameter(balance=balance_start)
+            conditions.append(Attr('user_balance').gte(int(balance_start)))
+        if balance_end:
+            self._validate_balance_parameter(balance=balance_end)
+            conditions.append(Attr('user_balance').lte(int(balance_end)))
+        if balance_start and balance_end:
+            self._validate_between_condition(start_value=balance_start,
+                                             end_value=balance_end)
+        return reduce(operator.and_, conditions)
+
+    def _is_balance_range_more_selective(self,
+                                         user_id: str,
+                                         exclusive_start_key: Optional[dict],
+                                         date_start: Optional[str],
+                                         date_end: Optional[str],
+                                         balance_start: Optional[str],
+                                         balance_end: Optional[str]
+                                         ) -> bool:
+        """
+        Estimates which range matches fewer records from the width of each range relative to
+        the user history, read from the date and balance bounds of the user Stats item.
+        The pages after the first one keep the index of the cursor (its key attributes), the
+        estimate would change as the user operates and the cursor would not fit the query.
+        :return: True if the balance range should be the key condition
+        """
+        if exclusive_start_key:
+            return 'GSI2SK' in exclusive_start_key
+
+        for value in (date_start, date_end, balance_start, balance_end):
+            if value and not value.isnumeric():
+                # invalid values are reported by the key condition/filter validations
+                return False
+
+        bounds = get_user_stats_bounds(crud_service=self.crud_service,
+                                       user_id=user_id)
+        if not bounds or any(bounds.get(attribute) is None for attribute, _, _ in USER_STATS_BOUNDS):
+            return False
+
+        first_date = int(bounds['first_operation_date'])
+        last_date = int(bounds['last_operation_date'])
+        date_low = max(int(date_start or first_date), first_date)
+        date_high = min(int(date_end or last_date), last_date)
+        date_fraction = max(0, date_high - date_low + 1) / (last_date - first_date + 1)
+
+        min_balance = int(bounds['min_balance'])
+        max_balance = int(bounds['max_balance'])
+        balance_low = max(int(balance_start or min_balance), min_balance)
+        balance_high = min(int(balance_end or max_balance), max_balance)
+        balance_fraction = max(0, balance_high - balance_low + 1) / (max_balance - min_balance + 1)
+
+        self.logger.info("Range selectivity estimated",
+                         extra={'DateFraction': date_fraction, 'BalanceFraction': balance_fraction})
+        return balance_fraction < date_fraction
+
     def _validate_and_get_records_after_equal_start_date(self, date_start: str, payload: dict) -> dict:
         """
         Validate the date start parameter and modify payload to get records after the start date
@@ -161,7 +460,7 @@ class ListRecordsProcessor:
         self._validate_balance_parameter(balance=balance_start)
         payload['gsi2'] = True
         payload['condition_type'] = ConditionType.GREATER_THAN_OR_EQUAL
-        payload['condition_value'] = f"Record#{balance_start}"
+        payload['condition_value'] = get_balance_sort_key(balance_start)
         return payload
 
     def _validate_and_get_records_between_balance_start_and_end(self,
@@ -182,8 +481,8 @@ class ListRecordsProcessor:
                                          end_value=balance_end)
         payload.pop('condition_value')
         payload['condition_type'] = ConditionType.BETWEEN
-        payload['low_value'] = f'Record#{balance_start}'
-        payload['high_value'] = f'Record#{balance_end}'
+        payload['low_value'] = get_balance_sort_key(balance_start)
+        payload['high_value'] = get_balance_sort_key(balance_end)
         return payload
 
     def _validate_and_get_records_less_than_equal_balance_end(self, balance_end: str, payload: dict) -> dict:
@@ -197,7 +496,7 @@ class ListRecordsProcessor:
         self._validate_balance_parameter(balance=balance_end)
         payload['gsi2'] = True
         payload['condition_type'] = ConditionType.LESS_THAN_OR_EQUAL
-        payload['condition_value'] = f'Record#{balance_end}'
+        payload['condition_value'] = get_balance_sort_key(balance_end)
         return payload
 
     def _validate_balance_parameter(self, balance: str) -> None:
@@ -215,6 +514,21 @@ class ListRecordsProcessor:
             raise HTTPException(status_code=HTTPStatus.BAD_REQUEST,
                                 msg="Negative balance not allowed")
 
+        if int(balance) > BALANCE_SORT_KEY_MAX:
+            self.logger.error(f"Balance value out of range {balance}")
+            raise HTTPException(status_code=HTTPStatus.BAD_REQUEST,
+                                msg=f"Balance value cannot be greater than {BALANCE_SORT_KEY_MAX}")
+
+    def _validate_amount_parameter(self, amount: str) -> None:
+        """
+        Validate the amount (operation cost) parameter
+        :param amount: Amount to validate
+        """
+        if not amount.isnumeric():
+            self.logger.error(f"Amount value is not numeric {amount}")
+            raise HTTPException(status_code=HTTPStatus.BAD_REQUEST,
+                                msg="Amount value must be numeric")
+
     def _validate_between_condition(self, start_value: str, end_value: str) -> None:
         """
         Validate parameters in a between condition
@@ -226,3 +540,6 @@ class ListRecordsProcessor:
             raise HTTPException(status_code=HTTPStatus.BAD_REQUEST,
                                 msg="Start value cannot be greater than end value.")
 
+
+def _get_index_name(payload: dict) -> str:
+    return 'GSI2' if payload.get('gsi2') else 'GSI1'
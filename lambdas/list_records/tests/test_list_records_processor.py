@@ -1,17 +1,33 @@
 from http import HTTPStatus
 
 import pytest
+from boto3.dynamodb.conditions import Attr
 from mock import MagicMock
 
-from lambdas.list_records.processor import ListRecordsProcessor
+from lambdas.list_records.processor import ListRecordsProcessor, LIST_RECORDS_MAX_ITEMS
 from shared.crud_service import ConditionType
+from shared.error_handling import HTTPException
 from shared.fixture_utils import json_fixture
+from shared.json_utils import json_string_to_dict
+from shared.pagination import CursorPaginator
+from shared.record_utils import RECORD_NOT_DELETED_FILTER
 
 mock_logger = MagicMock()
 mock_crud_service = MagicMock()
 
 LIST_RECORDS_EVENT_VALID = json_fixture('list_records_event_valid.json')
 LIST_RECORDS_CRUD_RETURN_VALUE = json_fixture('list_records_crud_return_value.json')
+LIST_RECORDS_USER_STATS_BOUNDS = {'first_operation_date': 0, 'last_operation_date': 10000,
+                                  'min_balance': 0, 'max_balance': 20}
+
+
+def get_query_iterator(items: list, last_evaluated_key: dict = None, scanned_count: int = None) -> MagicMock:
+    query_iterator = MagicMock()
+    query_iterator.__iter__.return_value = iter(items)
+    query_iterator.count = len(items)
+    query_iterator.scanned_count = len(items) if scanned_count is None else scanned_count
+    query_iterator.last_evaluated_key = last_evaluated_key
+    return query_iterator
 
 
 @pytest.fixture(scope="module")
@@ -22,7 +38,7 @@ def processor() -> ListRecordsProcessor:
 
 def test_list_records_no_filter(processor):
     event = LIST_RECORDS_EVENT_VALID
-    mock_crud_service.list_items.return_value = LIST_RECORDS_CRUD_RETURN_VALUE
+    mock_crud_service.iter_items.return_value = get_query_iterator(LIST_RECORDS_CRUD_RETURN_VALUE)
     processor.process_list_records_event(event=event)
 
     expected = {
@@ -30,30 +46,34 @@ def test_list_records_no_filter(processor):
         'gsi1': True,
         'gsi2': False,
         'condition_type': ConditionType.BEGINS_WITH,
-        'condition_value': 'Record#'
+        'condition_value': 'Record#',
+        'filter_expression': RECORD_NOT_DELETED_FILTER,
+        'max_items': LIST_RECORDS_MAX_ITEMS
     }
-    mock_crud_service.list_items.assert_called_with(**expected)
+    mock_crud_service.iter_items.assert_called_with(**expected)
 
 
 def test_list_records_date_start_provided(processor):
     event = LIST_RECORDS_EVENT_VALID
     event['queryStringParameters'] = {'date_start': '1234'}
-    mock_crud_service.list_items.return_value = LIST_RECORDS_CRUD_RETURN_VALUE
+    mock_crud_service.iter_items.return_value = get_query_iterator(LIST_RECORDS_CRUD_RETURN_VALUE)
     processor.process_list_records_event(event=event)
 
     expected = {
         'pk': f'User#77d46173-1d59-48d0-8b75-eaa76eb857b2',
         'gsi1': True,
         'condition_type': ConditionType.GREATER_THAN_OR_EQUAL,
-        'condition_value': f'Record#1234'
+        'condition_value': f'Record#1234',
+        'filter_expression': RECORD_NOT_DELETED_FILTER,
+        'max_items': LIST_RECORDS_MAX_ITEMS
     }
-    mock_crud_service.list_items.assert_called_with(**expected)
+    mock_crud_service.iter_items.assert_called_with(**expected)
 
 
 def test_list_records_date_start_and_date_end_provided(processor):
     event = LIST_RECORDS_EVENT_VALID
     event['queryStringParameters'] = {'date_start': '1234', 'date_end': '5678'}
-    mock_crud_service.list_items.return_value = LIST_RECORDS_CRUD_RETURN_VALUE
+    mock_crud_service.iter_items.return_value = get_query_iterator(LIST_RECORDS_CRUD_RETURN_VALUE)
     processor.process_list_records_event(event=event)
 
     expected = {
@@ -61,15 +81,17 @@ def test_list_records_date_start_and_date_end_provided(processor):
         'gsi1': True,
         'condition_type': ConditionType.BETWEEN,
         'low_value': f'Record#1234',
-        'high_value': f'Record#5678'
+        'high_value': f'Record#5678',
+        'filter_expression': RECORD_NOT_DELETED_FILTER,
+        'max_items': LIST_RECORDS_MAX_ITEMS
     }
-    mock_crud_service.list_items.assert_called_with(**expected)
+    mock_crud_service.iter_items.assert_called_with(**expected)
 
 
 def test_list_records_date_end_only(processor):
     event = LIST_RECORDS_EVENT_VALID
     event['queryStringParameters'] = {'date_end': '5678'}
-    mock_crud_service.list_items.return_value = LIST_RECORDS_CRUD_RETURN_VALUE
+    mock_crud_service.iter_items.return_value = get_query_iterator(LIST_RECORDS_CRUD_RETURN_VALUE)
     processor.process_list_records_event(event=event)
 
     expected = {
@@ -77,51 +99,255 @@ def test_list_records_date_end_only(processor):
         'gsi1': True,
         'condition_type': ConditionType.LESS_THAN_OR_EQUAL,
         'condition_value': f'Record#5678',
+        'filter_expression': RECORD_NOT_DELETED_FILTER,
+        'max_items': LIST_RECORDS_MAX_ITEMS
     }
-    mock_crud_service.list_items.assert_called_with(**expected)
+    mock_crud_service.iter_items.assert_called_with(**expected)
 
 
 def test_list_records_balance_start(processor):
     event = LIST_RECORDS_EVENT_VALID
     event['queryStringParameters'] = {'balance_start': '15'}
-    mock_crud_service.list_items.return_value = LIST_RECORDS_CRUD_RETURN_VALUE
+    mock_crud_service.iter_items.return_value = get_query_iterator(LIST_RECORDS_CRUD_RETURN_VALUE)
     processor.process_list_records_event(event=event)
 
     expected = {
         'pk': f'User#77d46173-1d59-48d0-8b75-eaa76eb857b2',
         'gsi2': True,
         'condition_type': ConditionType.GREATER_THAN_OR_EQUAL,
-        'condition_value': f'Record#15',
+        'condition_value': 'Record#0000000000000015',
+        'filter_expression': RECORD_NOT_DELETED_FILTER,
+        'max_items': LIST_RECORDS_MAX_ITEMS
     }
-    mock_crud_service.list_items.assert_called_with(**expected)
+    mock_crud_service.iter_items.assert_called_with(**expected)
 
 
 def test_list_records_balance_start_and_balance_end_provided(processor):
     event = LIST_RECORDS_EVENT_VALID
     event['queryStringParameters'] = {'balance_start': '15', 'balance_end': '20'}
-    mock_crud_service.list_items.return_value = LIST_RECORDS_CRUD_RETURN_VALUE
+    mock_crud_service.iter_items.return_value = get_query_iterator(LIST_RECORDS_CRUD_RETURN_VALUE)
     processor.process_list_records_event(event=event)
 
     expected = {
         'pk': f'User#77d46173-1d59-48d0-8b75-eaa76eb857b2',
         'gsi2': True,
         'condition_type': ConditionType.BETWEEN,
-        'low_value': f'Record#15',
-        'high_value': f'Record#20'
+        'low_value': 'Record#0000000000000015',
+        'high_value': 'Record#0000000000000020',
+        'filter_expression': RECORD_NOT_DELETED_FILTER,
+        'max_items': LIST_RECORDS_MAX_ITEMS
     }
-    mock_crud_service.list_items.assert_called_with(**expected)
+    mock_crud_service.iter_items.assert_called_with(**expected)
 
 
 def test_list_records_balance_end_only(processor):
     event = LIST_RECORDS_EVENT_VALID
     event['queryStringParameters'] = {'balance_end': '20'}
-    mock_crud_service.list_items.return_value = LIST_RECORDS_CRUD_RETURN_VALUE
+    mock_crud_service.iter_items.return_value = get_query_iterator(LIST_RECORDS_CRUD_RETURN_VALUE)
     processor.process_list_records_event(event=event)
 
     expected = {
         'pk': f'User#77d46173-1d59-48d0-8b75-eaa76eb857b2',
         'gsi2': True,
         'condition_type': ConditionType.LESS_THAN_OR_EQUAL,
-        'condition_value': f'Record#20'
+        'condition_value': 'Record#0000000000000020',
+        'filter_expression': RECORD_NOT_DELETED_FILTER,
+        'max_items': LIST_RECORDS_MAX_ITEMS
+    }
+    mock_crud_service.iter_items.assert_called_with(**expected)
+
+
+def test_list_records_cursor_first_page(processor):
+    event = dict(LIST_RECORDS_EVENT_VALID)
+    event['queryStringParameters'] = {'cursor': '', 'per_page': '2'}
+    last_evaluated_key = {
+        'PK': LIST_RECORDS_CRUD_RETURN_VALUE[1]['PK'],
+        'SK': LIST_RECORDS_CRUD_RETURN_VALUE[1]['SK'],
+        'GSI1PK': LIST_RECORDS_CRUD_RETURN_VALUE[1]['GSI1PK'],
+        'GSI1SK': LIST_RECORDS_CRUD_RETURN_VALUE[1]['GSI1SK']
+    }
+    mock_crud_service.iter_items.return_value = get_query_iterator(LIST_RECORDS_CRUD_RETURN_VALUE[:2],
+                                                                   last_evaluated_key=last_evaluated_key)
+    result = processor.process_list_records_event(event=event)
+
+    expected = {
+        'pk': f'User#77d46173-1d59-48d0-8b75-eaa76eb857b2',
+        'gsi1': True,
+        'gsi2': False,
+        'condition_type': ConditionType.BEGINS_WITH,
+        'condition_value': 'Record#',
+        'filter_expression': RECORD_NOT_DELETED_FILTER,
+        'max_items': 2,
+        'exclusive_start_key': None
     }
-    mock_crud_service.list_items.assert_called_with(**expected)
+    mock_crud_service.iter_items.assert_called_with(**expected)
+    body = json_string_to_dict(result.body)
+    assert result.status_code == HTTPStatus.OK
+    assert len(body['data']) == 2
+    assert CursorPaginator(logger=mock_logger,
+                           cursor=body['next_cursor'],
+                           per_page='2').exclusive_start_key == last_evaluated_key
+
+
+def test_list_records_cursor_next_page(processor):
+    event = dict(LIST_RECORDS_EVENT_VALID)
+    exclusive_start_key = {
+        'PK': 'User#77d46173-1d59-48d0-8b75-eaa76eb857b2',
+        'SK': 'Record#1a40eea3-bd09-4ee9-8b21-c7b50c536f3d',
+        'GSI1PK': 'User#77d46173-1d59-48d0-8b75-eaa76eb857b2',
+        'GSI1SK': 'Record#1678196485853'
+    }
+    cursor = CursorPaginator(logger=mock_logger, cursor='', per_page='2').encode_cursor(exclusive_start_key)
+    event['queryStringParameters'] = {'cursor': cursor, 'per_page': '2'}
+    mock_crud_service.iter_items.return_value = get_query_iterator(LIST_RECORDS_CRUD_RETURN_VALUE[2:3])
+    result = processor.process_list_records_event(event=event)
+
+    assert mock_crud_service.iter_items.call_args.kwargs['exclusive_start_key'] == exclusive_start_key
+    assert json_string_to_dict(result.body)['next_cursor'] is None
+
+
+def test_list_records_cursor_from_another_user_raises_exception(processor):
+    event = dict(LIST_RECORDS_EVENT_VALID)
+    cursor = CursorPaginator(logger=mock_logger, cursor='', per_page='2').encode_cursor({
+        'PK': 'User#another-user',
+        'SK': 'Record#1a40eea3-bd09-4ee9-8b21-c7b50c536f3d',
+        'GSI1PK': 'User#another-user',
+        'GSI1SK': 'Record#1678196485853'
+    })
+    event['queryStringParameters'] = {'cursor': cursor}
+    with pytest.raises(HTTPException):
+        processor.process_list_records_event(event=event)
+
+
+def test_list_records_cursor_with_another_user_index_partition_raises_exception(processor):
+    event = dict(LIST_RECORDS_EVENT_VALID)
+    cursor = CursorPaginator(logger=mock_logger, cursor='', per_page='2').encode_cursor({
+        'PK': 'User#77d46173-1d59-48d0-8b75-eaa76eb857b2',
+        'SK': 'Record#1a40eea3-bd09-4ee9-8b21-c7b50c536f3d',
+        'GSI1PK': 'User#another-user',
+        'GSI1SK': 'Record#1678196485853'
+    })
+    event['queryStringParameters'] = {'cursor': cursor}
+    with pytest.raises(HTTPException):
+        processor.process_list_records_event(event=event)
+
+
+def test_list_records_cursor_with_unexpected_attributes_raises_exception(processor):
+    event = dict(LIST_RECORDS_EVENT_VALID)
+    cursor = CursorPaginator(logger=mock_logger, cursor='', per_page='2').encode_cursor({
+        'PK': 'User#77d46173-1d59-48d0-8b75-eaa76eb857b2',
+        'SK': 'Record#1a40eea3-bd09-4ee9-8b21-c7b50c536f3d',
+        'GSI1PK': 'User#77d46173-1d59-48d0-8b75-eaa76eb857b2',
+        'GSI1SK': 'Record#1678196485853',
+        'GSI2PK': 'User#another-user'
+    })
+    event['queryStringParameters'] = {'cursor': cursor}
+    with pytest.raises(HTTPException):
+        processor.process_list_records_event(event=event)
+
+
+def test_list_records_fields_projection(processor):
+    event = LIST_RECORDS_EVENT_VALID
+    event['queryStringParameters'] = {'fields': 'record_id,operation_response,date'}
+    mock_crud_service.iter_items.return_value = get_query_iterator([
+        {'SK': record['SK'], 'operation_response': record['operation_response'], 'date': record['date']}
+        for record in LIST_RECORDS_CRUD_RETURN_VALUE
+    ])
+    result = processor.process_list_records_event(event=event)
+
+    assert mock_crud_service.iter_items.call_args.kwargs['fields'] == ['SK', 'operation_response', 'date']
+    record = json_string_to_dict(result.body)['data'][0]
+    assert list(record.keys()) == ['record_id', 'operation_response', 'date']
+    assert record['record_id'] == LIST_RECORDS_CRUD_RETURN_VALUE[0]['record_id']
+
+
+def test_list_records_invalid_fields_raises_exception(processor):
+    event = LIST_RECORDS_EVENT_VALID
+    event['queryStringParameters'] = {'fields': 'record_id,GSI1PK'}
+
+    with pytest.raises(HTTPException) as exc:
+        processor.process_list_records_event(event=event)
+    assert exc.value.status_code == HTTPStatus.BAD_REQUEST
+
+
+def test_list_records_filters_and_counts(processor):
+    event = dict(LIST_RECORDS_EVENT_VALID)
+    event['queryStringParameters'] = {'include_deleted': 'true', 'amount_min': '2', 'amount_max': '10',
+                                      'operation_id': 'a,b'}
+    mock_crud_service.iter_items.return_value = get_query_iterator(LIST_RECORDS_CRUD_RETURN_VALUE[:1],
+                                                                   scanned_count=3)
+    result = processor.process_list_records_event(event=event)
+
+    expected_filter = Attr('amount').gte(2) & Attr('amount').lte(10) & Attr('operation_id').is_in(['a', 'b'])
+    assert mock_crud_service.iter_items.call_args.kwargs['filter_expression'] == expected_filter
+    body = json_string_to_dict(result.body)
+    assert body['count'] == 1
+    assert body['scanned_count'] == 3
+
+
+@pytest.mark.parametrize('params', [
+    {'amount_min': 'abc'},
+    {'amount_min': '5', 'amount_max': '1'},
+    {'operation_id': ','.join(str(index) for index in range(101))},
+])
+def test_list_records_invalid_filters_raises_exception(processor, params):
+    event = dict(LIST_RECORDS_EVENT_VALID)
+    event['queryStringParameters'] = params
+
+    with pytest.raises(HTTPException) as exc:
+        processor.process_list_records_event(event=event)
+
+    assert exc.value.status_code == HTTPStatus.BAD_REQUEST
+
+
+def test_list_records_date_and_balance_queries_the_balance_range_when_narrower(processor):
+    event = dict(LIST_RECORDS_EVENT_VALID)
+    event['queryStringParameters'] = {'date_start': '1000', 'date_end': '9000', 'balance_start': '5',
+                                      'balance_end': '6'}
+    mock_crud_service.get.return_value = LIST_RECORDS_USER_STATS_BOUNDS
+    mock_crud_service.iter_items.return_value = get_query_iterator(LIST_RECORDS_CRUD_RETURN_VALUE)
+    result = processor.process_list_records_event(event=event)
+
+    payload = mock_crud_service.iter_items.call_args.kwargs
+    assert payload['gsi2'] is True
+    assert payload['low_value'] == 'Record#0000000000000005'
+    assert payload['filter_expression'] == (Attr('date').gte(1000) & Attr('date').lte(9000)) & RECORD_NOT_DELETED_FILTER
+    assert json_string_to_dict(result.body)['index'] == 'GSI2'
+
+
+def test_list_records_date_and_balance_queries_the_date_range_when_narrower(processor):
+    event = dict(LIST_RECORDS_EVENT_VALID)
+    event['queryStringParameters'] = {'date_start': '9000', 'date_end': '9100', 'balance_start': '5'}
+    mock_crud_service.get.return_value = LIST_RECORDS_USER_STATS_BOUNDS
+    mock_crud_service.iter_items.return_value = get_query_iterator(LIST_RECORDS_CRUD_RETURN_VALUE)
+    result = processor.process_list_records_event(event=event)
+
+    payload = mock_crud_service.iter_items.call_args.kwargs
+    assert payload['gsi1'] is True
+    assert payload['low_value'] == 'Record#9000'
+    assert payload['filter_expression'] == Attr('user_balance').gte(5) & RECORD_NOT_DELETED_FILTER
+    assert json_string_to_dict(result.body)['index'] == 'GSI1'
+
+
+def test_list_records_date_and_balance_cursor_keeps_the_index_of_the_cursor(processor):
+    event = dict(LIST_RECORDS_EVENT_VALID)
+    exclusive_start_key = {
+        'PK': 'User#77d46173-1d59-48d0-8b75-eaa76eb857b2',
+        'SK': 'Record#1a40eea3-bd09-4ee9-8b21-c7b50c536f3d',
+        'GSI2PK': 'User#77d46173-1d59-48d0-8b75-eaa76eb857b2',
+        'GSI2SK': 'Record#0000000000000005'
+    }
+    cursor = CursorPaginator(logger=mock_logger, cursor='', per_page='2').encode_cursor(exclusive_start_key)
+    # the bounds now make the date range narrower, the cursor was issued by a balance range query
+    event['queryStringParameters'] = {'cursor': cursor, 'per_page': '2', 'date_start': '9000', 'date_end': '9100',
+                                      'balance_start': '5'}
+    mock_crud_service.get.reset_mock()
+    mock_crud_service.get.return_value = LIST_RECORDS_USER_STATS_BOUNDS
+    mock_crud_service.iter_items.return_value = get_query_iterator(LIST_RECORDS_CRUD_RETURN_VALUE[2:3])
+    result = processor.process_list_records_event(event=event)
+
+    payload = mock_crud_service.iter_items.call_args.kwargs
+    assert payload['gsi2'] is True
+    assert payload['exclusive_start_key'] == exclusive_start_key
+    assert json_string_to_dict(result.body)['index'] == 'GSI2'
+    mock_crud_service.get.assert_not_called()
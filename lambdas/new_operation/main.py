@@ -9,13 +9,18 @@ from shared.api_utils import HTTPResponse
 from shared.bootstrap import create_operations_if_not_exists
 from shared.crud_service import CrudService
 from shared.error_handling import exception_handler
+from shared.operation_catalog import OperationCatalog
 from shared.sns_service import SnsService
 
 # environment variables
 LOGGING_LEVEL = os.environ.get('LOGGING_LEVEL', 'INFO')
 ARITHMETIC_OPERATIONS_TOPIC_NAME = os.environ.get('ARITHMETIC_OPERATIONS_TOPIC_NAME', '')
 GENERATE_RANDOM_STRING_TOPIC_NAME = os.environ.get('GENERATE_RANDOM_STRING_TOPIC_NAME', '')
+ARITHMETIC_OPERATIONS_TOPIC_ARN = os.environ.get('ARITHMETIC_OPERATIONS_TOPIC_ARN', '')
+GENERATE_RANDOM_STRING_TOPIC_ARN = os.environ.get('GENERATE_RANDOM_STRING_TOPIC_ARN', '')
 DYNAMODB_TABLE_NAME = os.environ.get('DYNAMODB_TABLE_NAME', 'arithmetic-calculator-api-dev-ArithmeticCalculatorTable')
+# Perform arithmetic operations in the request unless the request body says otherwise (synchronous: false)
+SYNCHRONOUS_ARITHMETIC_OPERATIONS = os.environ.get('SYNCHRONOUS_ARITHMETIC_OPERATIONS', 'false').lower() == 'true'
 
 # logging
 logger = logging.getLogger(__name__)
@@ -28,7 +33,11 @@ logger.setLevel(LOGGING_LEVEL)
 # AWS resources
 sns_client = boto3.client('sns')
 sns_service = SnsService(logger=logger,
-                         sns_client=sns_client)
+                         sns_client=sns_client,
+                         topic_arns={
+                             ARITHMETIC_OPERATIONS_TOPIC_NAME: ARITHMETIC_OPERATIONS_TOPIC_ARN,
+                             GENERATE_RANDOM_STRING_TOPIC_NAME: GENERATE_RANDOM_STRING_TOPIC_ARN
+                         })
 
 dynamodb = boto3.resource('dynamodb')
 table = dynamodb.Table(DYNAMODB_TABLE_NAME)
@@ -39,6 +48,10 @@ crud_service = CrudService(logger=logger,
 create_operations_if_not_exists(logger=logger,
                                 crud_service=crud_service)
 
+# Operation catalog cached per container
+operation_catalog = OperationCatalog(logger=logger,
+                                     crud_service=crud_service)
+
 @exception_handler
 def handler(event: dict, context: dict) -> HTTPResponse:
     """
@@ -57,11 +70,19 @@ def handler(event: dict, context: dict) -> HTTPResponse:
 
     The message_id and unique record_id are then returned to the client so that it can
     poll for results.
+
+    Arithmetic operations can instead run synchronously (`"synchronous": true` in the
+    request body, or SYNCHRONOUS_ARITHMETIC_OPERATIONS for every request): the cost is
+    deducted and the Record saved in one transaction, and the Record is returned with a
+    200, without the worker round trip.
+    Random strings are always generated asynchronously.
     """
     processor = NewOperationEventProcessor(logger=logger,
                                            sns_service=sns_service,
                                            crud_service=crud_service,
+                                           operation_catalog=operation_catalog,
                                            arithmetic_topic_name=ARITHMETIC_OPERATIONS_TOPIC_NAME,
-                                           random_string_topic_name=GENERATE_RANDOM_STRING_TOPIC_NAME)
+                                           random_string_topic_name=GENERATE_RANDOM_STRING_TOPIC_NAME,
+                                           synchronous_arithmetic=SYNCHRONOUS_ARITHMETIC_OPERATIONS)
 
     return processor.process_new_operation_event(event=event)
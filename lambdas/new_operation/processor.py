@@ -1,35 +1,47 @@
 from http import HTTPStatus
 from logging import Logger
 
-from shared.api_utils import HTTPResponse
-from shared.crud_service import CrudService, ConditionType
+from shared.api_utils import HTTPResponse, get_event_body
+from shared.arithmetic_utils import perform_arithmetic_operation
+from shared.balance_utils import get_or_initialize_user_balance, get_user_balance, save_user_records
+from shared.crud_service import CrudService
+from shared.date_utils import get_js_utc_now
+from shared.error_handling import HTTPException
 from shared.json_utils import json_string_to_dict
-from shared.models.operation_model import OperationOUT, OperationType
+from shared.models.operation_model import OperationType
 from shared.models.operation_request_msg_model import OperationEventMessage
-from shared.models.record_model import RecordOUT
-from shared.record_utils import get_user_most_recent_record, is_user_first_operation, check_user_has_sufficient_balance
+from shared.models.record_model import RecordIN, RecordOUT
+from shared.operation_catalog import OperationCatalog
+from shared.record_utils import check_user_has_sufficient_balance
 from shared.sns_service import SnsService
 from shared.user_utils import get_user_id_from_cognito_authorizer
 
+# Balance reads of a synchronous operation when other operations change the balance concurrently
+SYNCHRONOUS_MAX_ATTEMPTS = 3
+
 
 class NewOperationEventProcessor:
     def __init__(self,
                  logger: Logger,
                  sns_service: SnsService,
                  crud_service: CrudService,
+                 operation_catalog: OperationCatalog,
                  arithmetic_topic_name: str,
-                 random_string_topic_name: str
+                 random_string_topic_name: str,
+                 synchronous_arithmetic: bool = False
                  ) -> None:
         self.logger = logger
         self.sns_service = sns_service
         self.crud_service = crud_service
+        self.operation_catalog = operation_catalog
         self.arithmetic_topic_name = arithmetic_topic_name
         self.random_string_topic_name = random_string_topic_name
+        self.synchronous_arithmetic = synchronous_arithmetic
 
     def process_new_operation_event(self, event: dict) -> HTTPResponse:
         user_id = get_user_id_from_cognito_authorizer(logger=self.logger,
                                                       event=event)
-        body = json_string_to_dict(event.get('body', '{}'))
+        body = json_string_to_dict(get_event_body(event=event))
         num1 = body.get('num1')
         num2 = body.get('num2')
         single_number = body.get('single_number')
@@ -40,8 +52,7 @@ class NewOperationEventProcessor:
 
         topic_name = self._get_topic_name_for_operation_type(operation_type)
 
-        operation_db = self._get_operation_from_db(operation_type)
-        operation = OperationOUT(**operation_db)
+        operation = self.operation_catalog.get_operation(operation_type)
 
         operation_event_msg = OperationEventMessage(user_id=user_id,
                                                     num1=num1,
@@ -49,25 +60,15 @@ class NewOperationEventProcessor:
                                                     single_number=single_number,
                                                     operation=operation)
 
-        user_records_db = get_user_most_recent_record(crud_service=self.crud_service,
-                                                      user_id=user_id)
-
-        if is_user_first_operation(logger=self.logger,
-                                   user_records_db=user_records_db):
-            message_id = self.sns_service.publish_message(topic_name=topic_name,
-                                                          message=operation_event_msg.to_string())
-            self.logger.info(f"Sent first operation event for User {user_id}",
-                             extra={
-                                 'OperationRequest': operation_event_msg.dict(),
-                                 'MessageId': message_id
-                             })
-            return HTTPResponse(status_code=HTTPStatus.ACCEPTED,
-                                body={'RecordId': operation_event_msg.record_id, 'MessageId': message_id})
-
-        user_record = RecordOUT(**user_records_db[0])
+        if self._is_synchronous_operation(body=body, operation_type=operation.type):
+            return self._process_synchronous_operation(operation_event_msg=operation_event_msg)
+
+        user_balance = get_user_balance(logger=self.logger,
+                                        crud_service=self.crud_service,
+                                        user_id=user_id)
         check_user_has_sufficient_balance(logger=self.logger,
                                           operation=operation,
-                                          recent_record=user_record)
+                                          user_balance=user_balance)
 
         message_id = self.sns_service.publish_message(topic_name=topic_name,
                                                       message=operation_event_msg.to_string())
@@ -79,6 +80,82 @@ class NewOperationEventProcessor:
         return HTTPResponse(status_code=HTTPStatus.ACCEPTED,
                             body={'RecordId': operation_event_msg.record_id, 'MessageId': message_id})
 
+    def _is_synchronous_operation(self, body: dict, operation_type: OperationType) -> bool:
+        """
+        Arithmetic operations run in the request (synchronous mode) when the request body
+        `synchronous` flag is true, or when it is missing and the mode is enabled by default.
+        Random strings are always generated by the worker.
+        :param body: Request body
+        :param operation_type: Operation type to perform
+        :return: True to perform the operation in the request
+        """
+        if operation_type == OperationType.RANDOM_STRING:
+            return False
+        synchronous = body.get('synchronous')
+        if synchronous is None:
+            return self.synchronous_arithmetic
+        if not isinstance(synchronous, bool):
+            raise HTTPException(status_code=HTTPStatus.BAD_REQUEST,
+                                msg="synchronous must be a boolean.")
+        return synchronous
+
+    def _process_synchronous_operation(self, operation_event_msg: OperationEventMessage) -> HTTPResponse:
+        """
+        Performs an arithmetic operation in the request, without the SNS -> SQS -> worker
+        round trip and the polling. The cost is deducted and the Record saved exactly like
+        the worker does: the balance update (conditioned on the balance read) and the Record
+        are written in one transaction, so the user is never charged without a Record.
+        If another operation changed the balance in the meantime, the balance is read again.
+        :param operation_event_msg: Validated operation request
+        :return: HTTPResponse with the Record (same body as Poll Results)
+        """
+        user_id = operation_event_msg.user_id
+        operation = operation_event_msg.operation
+        self.logger.info(f"Performing synchronous operation for User {user_id}",
+                         extra={'RecordId': operation_event_msg.record_id, 'Operation': operation.dict()})
+        try:
+            results = perform_arithmetic_operation(operation_type=operation.type,
+                                                   num1=operation_event_msg.num1,
+                                                   num2=operation_event_msg.num2,
+                                                   single_number=operation_event_msg.single_number)
+        except (TypeError, ValueError, ArithmeticError) as err:
+            self.logger.info("Invalid operation.", extra={'Exception': err})
+            raise HTTPException(status_code=HTTPStatus.BAD_REQUEST,
+                                msg=f"Invalid operation: {err}")
+
+        for attempt in range(1, SYNCHRONOUS_MAX_ATTEMPTS + 1):
+            balance = get_or_initialize_user_balance(logger=self.logger,
+                                                     crud_service=self.crud_service,
+                                                     user_id=user_id)
+            check_user_has_sufficient_balance(logger=self.logger,
+                                              operation=operation,
+                                              user_balance=balance.user_balance)
+            record_in = RecordIN(record_id=operation_event_msg.record_id,
+                                 operation_id=operation.operation_id,
+                                 user_id=user_id,
+                                 amount=operation.cost,
+                                 user_balance=balance.user_balance - operation.cost,
+                                 operation_response=results,
+                                 date=get_js_utc_now())
+            self.logger.info("Saving record to DB",
+                             extra={'RecordIN': record_in.dict()})
+            try:
+                save_user_records(logger=self.logger,
+                                  crud_service=self.crud_service,
+                                  user_id=user_id,
+                                  expected_balance=balance.user_balance,
+                                  records=[record_in.dict()],
+                                  operation_types=[operation.type])
+                break
+            except HTTPException as err:
+                if err.status_code != HTTPStatus.CONFLICT or attempt == SYNCHRONOUS_MAX_ATTEMPTS:
+                    raise
+                self.logger.info("User balance changed while saving the record, trying again.",
+                                 extra={'Attempt': attempt})
+
+        return HTTPResponse(status_code=HTTPStatus.OK,
+                            body=RecordOUT(**record_in.dict()).dict())
+
     def _get_topic_name_for_operation_type(self, operation_type: OperationType) -> str:
         """
         Determines the appropriate SNS topic name to publish a message based on
@@ -91,14 +168,3 @@ class NewOperationEventProcessor:
             return self.random_string_topic_name
         else:
             return self.arithmetic_topic_name
-
-    def _get_operation_from_db(self, operation_type: OperationType) -> dict:
-        """
-        Get operation object from DB.
-        :param operation_type: The type of operation
-        :return: Operation details
-        """
-        return self.crud_service.list_items(pk='Operation',
-                                            gsi1=True,
-                                            condition_type=ConditionType.BEGINS_WITH,
-                                            condition_value=f'Operation#{operation_type}')[0]
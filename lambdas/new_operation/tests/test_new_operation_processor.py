@@ -5,14 +5,16 @@ import pytest
 from mock import MagicMock, patch
 from shared.fixture_utils import json_fixture
 from lambdas.new_operation.processor import NewOperationEventProcessor
+from shared.models.operation_model import OperationOUT
 from shared.models.operation_request_msg_model import OperationEventMessage
 from shared.error_handling import HTTPException
-from shared.json_utils import json_string_to_dict
+from shared.json_utils import dict_to_json_string, json_string_to_dict
 
 mock_logger = MagicMock()
 mock_sns_service = MagicMock()
 mock_crud_service = MagicMock()
 mock_operation_event_message = MagicMock()
+mock_operation_catalog = MagicMock()
 
 NEW_OPERATION_EVENT_VALID = json_fixture('new_operation_event_valid.json')
 NEW_OPERATION_RANDOM_STRING_EVENT_VALID = json_fixture('new_operation_random_string_valid.json')
@@ -29,6 +31,7 @@ def reset_mocks():
     mock_sns_service.reset_mock()
     mock_crud_service.reset_mock()
     mock_operation_event_message.reset_mock()
+    mock_operation_catalog.reset_mock()
 
 
 @pytest.fixture(scope="module")
@@ -37,6 +40,7 @@ def processor() -> NewOperationEventProcessor:
     return NewOperationEventProcessor(logger=mock_logger,
                                       sns_service=mock_sns_service,
                                       crud_service=mock_crud_service,
+                                      operation_catalog=mock_operation_catalog,
                                       arithmetic_topic_name='arithmetic-topic',
                                       random_string_topic_name='random-string-topic')
 
@@ -44,10 +48,9 @@ def processor() -> NewOperationEventProcessor:
 @patch('lambdas.new_operation.processor.OperationEventMessage', mock_operation_event_message)
 def test_new_operation_event_arithmetic_success(processor):
     event = NEW_OPERATION_EVENT_VALID
-    mock_crud_service.list_items.side_effect = [
-        LIST_ITEMS_GET_OPERATION_RETURN_VALUE,
-        LIST_ITEMS_GET_USER_NO_RECORDS_RETURN_VALUE
-    ]
+    mock_crud_service.get.return_value = None
+    mock_operation_catalog.get_operation.return_value = OperationOUT(**LIST_ITEMS_GET_OPERATION_RETURN_VALUE[0])
+    mock_crud_service.list_items.return_value = LIST_ITEMS_GET_USER_NO_RECORDS_RETURN_VALUE
     operation_event_return = OperationEventMessage(**OPERATION_EVENT_MSG_RETURN_VALUE)
     mock_operation_event_message.return_value = operation_event_return
     mock_sns_service.publish_message.return_value = 'f7121d00-c7c5-4290-8cc7-1ccc7460e3e8'
@@ -65,10 +68,9 @@ def test_new_operation_event_arithmetic_success(processor):
 @patch('lambdas.new_operation.processor.OperationEventMessage', mock_operation_event_message)
 def test_new_operation_event_random_string_success(processor):
     event = NEW_OPERATION_RANDOM_STRING_EVENT_VALID
-    mock_crud_service.list_items.side_effect = [
-        LIST_ITEMS_OPERATION_RANDOM_STRING_RETURN_VALUE,
-        LIST_ITEMS_GET_USER_NO_RECORDS_RETURN_VALUE
-    ]
+    mock_crud_service.get.return_value = None
+    mock_operation_catalog.get_operation.return_value = OperationOUT(**LIST_ITEMS_OPERATION_RANDOM_STRING_RETURN_VALUE[0])
+    mock_crud_service.list_items.return_value = LIST_ITEMS_GET_USER_NO_RECORDS_RETURN_VALUE
     operation_event_return = OperationEventMessage(**OPERATION_EVENT_MSG_RANDOM_STRING_RETURN_VALUE)
     mock_operation_event_message.return_value = operation_event_return
     mock_sns_service.publish_message.return_value = ''
@@ -84,12 +86,147 @@ def test_new_operation_event_random_string_success(processor):
 @patch('lambdas.new_operation.processor.OperationEventMessage', mock_operation_event_message)
 def test_new_operation_event_raises_exception_on_insufficient_funds(processor):
     event = NEW_OPERATION_RANDOM_STRING_EVENT_VALID
-    mock_crud_service.list_items.side_effect = [
-        LIST_ITEMS_OPERATION_RANDOM_STRING_RETURN_VALUE,
-        LIST_ITEMS_RECORD_INSUFFICIENT_FUNDS_RETURN_VALUE
-    ]
+    mock_crud_service.get.return_value = None
+    mock_operation_catalog.get_operation.return_value = OperationOUT(**LIST_ITEMS_OPERATION_RANDOM_STRING_RETURN_VALUE[0])
+    mock_crud_service.list_items.return_value = LIST_ITEMS_RECORD_INSUFFICIENT_FUNDS_RETURN_VALUE
     operation_event_return = OperationEventMessage(**OPERATION_EVENT_MSG_RANDOM_STRING_RETURN_VALUE)
     mock_operation_event_message.return_value = operation_event_return
     mock_sns_service.publish_message.return_value = ''
     with pytest.raises(HTTPException):
         processor.process_new_operation_event(event=event)
+
+
+@patch('lambdas.new_operation.processor.OperationEventMessage', mock_operation_event_message)
+def test_new_operation_event_reads_balance_item(processor):
+    event = NEW_OPERATION_RANDOM_STRING_EVENT_VALID
+    mock_crud_service.reset_mock()
+    mock_operation_catalog.get_operation.return_value = OperationOUT(**LIST_ITEMS_OPERATION_RANDOM_STRING_RETURN_VALUE[0])
+    mock_crud_service.get.return_value = {
+        'PK': 'User#77d46173-1d59-48d0-8b75-eaa76eb857b2',
+        'SK': 'Balance',
+        'user_id': '77d46173-1d59-48d0-8b75-eaa76eb857b2',
+        'user_balance': 2
+    }
+    operation_event_return = OperationEventMessage(**OPERATION_EVENT_MSG_RANDOM_STRING_RETURN_VALUE)
+    mock_operation_event_message.return_value = operation_event_return
+    with pytest.raises(HTTPException):
+        processor.process_new_operation_event(event=event)
+
+    mock_crud_service.list_items.assert_not_called()
+
+
+def get_event(body: dict) -> dict:
+    return {**NEW_OPERATION_EVENT_VALID, 'body': dict_to_json_string(body)}
+
+
+@pytest.fixture
+def synchronous_processor() -> NewOperationEventProcessor:
+    reset_mocks()
+    mock_crud_service.get.side_effect = None
+    mock_crud_service.transact_write.side_effect = None
+    return NewOperationEventProcessor(logger=mock_logger,
+                                      sns_service=mock_sns_service,
+                                      crud_service=mock_crud_service,
+                                      operation_catalog=mock_operation_catalog,
+                                      arithmetic_topic_name='arithmetic-topic',
+                                      random_string_topic_name='random-string-topic',
+                                      synchronous_arithmetic=True)
+
+
+@patch('lambdas.new_operation.processor.get_js_utc_now', MagicMock(return_value=1678232290113))
+def test_new_operation_event_synchronous_arithmetic(processor):
+    reset_mocks()
+    mock_operation_catalog.get_operation.return_value = OperationOUT(**LIST_ITEMS_GET_OPERATION_RETURN_VALUE[0])
+    mock_crud_service.get.return_value = {'SK': 'Balance',
+                                          'user_id': '77d46173-1d59-48d0-8b75-eaa76eb857b2',
+                                          'user_balance': 20}
+    event = get_event({'operation_type': 'ADDITION', 'num1': 5, 'num2': 3, 'synchronous': True})
+    result = processor.process_new_operation_event(event=event)
+
+    assert result.status_code == HTTPStatus.OK
+    record = json_string_to_dict(result.body)
+    assert record['operation_response'] == '8.0'
+    assert record['user_balance'] == 19
+    assert record['user_id'] == '77d46173-1d59-48d0-8b75-eaa76eb857b2'
+    assert record['date'] == 1678232290113
+    mock_sns_service.publish_message.assert_not_called()
+    mock_crud_service.create.assert_not_called()
+    balance_update, record_put, stats_update, *rollup_updates = \
+        mock_crud_service.transact_write.call_args.kwargs['transact_items']
+    assert balance_update['Update']['ExpressionAttributeValues'][':expected_balance'] == 20
+    assert balance_update['Update']['ExpressionAttributeValues'][':user_balance'] == 19
+    assert record_put['Put']['Item']['SK'] == f"Record#{record['record_id']}"
+    assert record_put['Put']['Item']['amount'] == record['amount']
+    assert stats_update['Update']['ExpressionAttributeValues'][':credit_spent'] == record['amount']
+    assert len(rollup_updates) == 3
+
+
+def test_new_operation_event_synchronous_balance_changed_is_read_again(synchronous_processor):
+    mock_operation_catalog.get_operation.return_value = OperationOUT(**LIST_ITEMS_GET_OPERATION_RETURN_VALUE[0])
+    # Balance and Stats bounds of each attempt
+    mock_crud_service.get.side_effect = [
+        {'SK': 'Balance', 'user_id': '77d46173-1d59-48d0-8b75-eaa76eb857b2', 'user_balance': 20},
+        None,
+        {'SK': 'Balance', 'user_id': '77d46173-1d59-48d0-8b75-eaa76eb857b2', 'user_balance': 14},
+        None
+    ]
+    mock_crud_service.transact_write.side_effect = [HTTPException(status_code=HTTPStatus.CONFLICT, msg='conflict'),
+                                                    None]
+    event = get_event({'operation_type': 'ADDITION', 'num1': 5, 'num2': 3})
+    result = synchronous_processor.process_new_operation_event(event=event)
+
+    assert result.status_code == HTTPStatus.OK
+    assert json_string_to_dict(result.body)['user_balance'] == 13
+    assert mock_crud_service.transact_write.call_count == 2
+
+
+def test_new_operation_event_synchronous_insufficient_funds(synchronous_processor):
+    mock_operation_catalog.get_operation.return_value = OperationOUT(**LIST_ITEMS_GET_OPERATION_RETURN_VALUE[0])
+    mock_crud_service.get.return_value = {'SK': 'Balance',
+                                          'user_id': '77d46173-1d59-48d0-8b75-eaa76eb857b2',
+                                          'user_balance': 0}
+    event = get_event({'operation_type': 'ADDITION', 'num1': 5, 'num2': 3})
+    with pytest.raises(HTTPException) as exc:
+        synchronous_processor.process_new_operation_event(event=event)
+
+    assert exc.value.status_code == HTTPStatus.BAD_REQUEST
+    mock_crud_service.transact_write.assert_not_called()
+    mock_sns_service.publish_message.assert_not_called()
+
+
+def test_new_operation_event_synchronous_invalid_operation(synchronous_processor):
+    mock_operation_catalog.get_operation.return_value = OperationOUT(**LIST_ITEMS_GET_OPERATION_RETURN_VALUE[0])
+    event = get_event({'operation_type': 'ADDITION'})
+    with pytest.raises(HTTPException) as exc:
+        synchronous_processor.process_new_operation_event(event=event)
+
+    assert exc.value.status_code == HTTPStatus.BAD_REQUEST
+    mock_crud_service.transact_write.assert_not_called()
+
+
+@pytest.mark.parametrize('event, operation', [
+    # random strings are always generated by the worker
+    (NEW_OPERATION_RANDOM_STRING_EVENT_VALID, LIST_ITEMS_OPERATION_RANDOM_STRING_RETURN_VALUE[0]),
+    (get_event({'operation_type': 'ADDITION', 'num1': 5, 'num2': 3, 'synchronous': False}),
+     LIST_ITEMS_GET_OPERATION_RETURN_VALUE[0])
+])
+def test_new_operation_event_asynchronous_in_synchronous_mode(synchronous_processor, event, operation):
+    mock_operation_catalog.get_operation.return_value = OperationOUT(**operation)
+    mock_crud_service.get.return_value = {'SK': 'Balance',
+                                          'user_id': '77d46173-1d59-48d0-8b75-eaa76eb857b2',
+                                          'user_balance': 20}
+    mock_sns_service.publish_message.return_value = 'f7121d00-c7c5-4290-8cc7-1ccc7460e3e8'
+    result = synchronous_processor.process_new_operation_event(event=event)
+
+    assert result.status_code == HTTPStatus.ACCEPTED
+    mock_sns_service.publish_message.assert_called_once()
+    mock_crud_service.transact_write.assert_not_called()
+
+
+def test_new_operation_event_synchronous_must_be_boolean(synchronous_processor):
+    mock_operation_catalog.get_operation.return_value = OperationOUT(**LIST_ITEMS_GET_OPERATION_RETURN_VALUE[0])
+    event = get_event({'operation_type': 'ADDITION', 'num1': 5, 'num2': 3, 'synchronous': 'yes'})
+    with pytest.raises(HTTPException) as exc:
+        synchronous_processor.process_new_operation_event(event=event)
+
+    assert exc.value.status_code == HTTPStatus.BAD_REQUEST
@@ -33,8 +33,12 @@ crud_service = CrudService(logger=logger,
 def handler(event: dict, context: dict) -> HTTPResponse:
     """
     Get the results of the operation (Record) given the record_id.
+    With `?wait=<seconds>` the request waits (long-poll) until the Record is written.
     """
     processor = PollResultsProcessor(logger=logger,
                                      crud_service=crud_service)
 
-    return processor.process_poll_results_event(event=event)
+    get_remaining_time_in_millis = getattr(context, 'get_remaining_time_in_millis', None)
+    remaining_time_in_millis = get_remaining_time_in_millis() if get_remaining_time_in_millis else None
+    return processor.process_poll_results_event(event=event,
+                                                remaining_time_in_millis=remaining_time_in_millis)
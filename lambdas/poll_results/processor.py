@@ -1,12 +1,22 @@
+import os
 from http import HTTPStatus
 from logging import Logger
+from time import monotonic, sleep
+from typing import Optional
 
-from shared.api_utils import HTTPResponse
+from shared.api_utils import HTTPResponse, CACHE_CONTROL_REVALIDATE, get_request_header
 from shared.crud_service import CrudService
 from shared.error_handling import HTTPException
 from shared.models.record_model import RecordOUT
 from shared.user_utils import get_user_id_from_cognito_authorizer
 
+# API Gateway closes REST integrations after 29 seconds, the Lambda timeout is set to it
+POLL_RESULTS_MAX_WAIT_SECONDS = int(os.environ.get('POLL_RESULTS_MAX_WAIT_SECONDS', 25))
+POLL_RESULTS_DEADLINE_MARGIN_MILLISECONDS = 1000
+POLL_RESULTS_BACKOFF_BASE_SECONDS = 0.1
+POLL_RESULTS_BACKOFF_CAP_SECONDS = 1.0
+POLL_RESULTS_VERSION_FIELDS = ['deleted']
+
 
 class PollResultsProcessor:
     def __init__(self,
@@ -16,16 +26,42 @@ class PollResultsProcessor:
         self.logger = logger
         self.crud_service = crud_service
 
-    def process_poll_results_event(self, event: dict) -> HTTPResponse:
+    def process_poll_results_event(self,
+                                   event: dict,
+                                   remaining_time_in_millis: Optional[int] = None
+                                   ) -> HTTPResponse:
+        """
+        Get the Record of an operation. With the `wait` query parameter (seconds) the request
+        is kept open (long-poll) and the Record is read again with exponential backoff until
+        it exists or the wait is over, instead of answering 404 right away.
+        :param event: API Gateway event
+        :param remaining_time_in_millis: [Optional] Time left before the Lambda times out
+        :return: HTTPResponse with the Record
+        """
         user_id = get_user_id_from_cognito_authorizer(logger=self.logger,
                                                       event=event)
         record_id = event.get('pathParameters', {}).get('record_id', '')
+        params = event.get('queryStringParameters') or {}
+        wait_seconds = self._get_wait_seconds(wait=params.get('wait'),
+                                              remaining_time_in_millis=remaining_time_in_millis)
 
         self.logger.info(f"Processing Poll Results request for User {user_id}",
-                         extra={'RecordId': record_id})
+                         extra={'RecordId': record_id, 'WaitSeconds': wait_seconds})
+
+        pk = f'User#{user_id}'
+        sk = f'Record#{record_id}'
+        not_modified = self._check_not_modified(pk=pk,
+                                                sk=sk,
+                                                record_id=record_id,
+                                                if_none_match=get_request_header(event=event,
+                                                                                 name='If-None-Match'))
+        if not_modified:
+            self.logger.info("Record not modified.")
+            return not_modified
 
-        user_record_db = self.crud_service.get(pk=f'User#{user_id}',
-                                               sk=f'Record#{record_id}')
+        user_record_db = self._wait_for_record(pk=pk,
+                                               sk=sk,
+                                               wait_seconds=wait_seconds)
         if not user_record_db:
             self.logger.info("Record does not exists.")
             raise HTTPException(status_code=HTTPStatus.NOT_FOUND,
@@ -35,4 +71,108 @@ class PollResultsProcessor:
                          extra={'UserRecord': user_record})
 
         return HTTPResponse(status_code=HTTPStatus.OK,
-                            body=user_record)
+                            body=user_record,
+                            headers=_get_record_headers(record_id=record_id,
+                                                        deleted=user_record['deleted']))
+
+    def _check_not_modified(self,
+                            pk: str,
+                            sk: str,
+                            record_id: str,
+                            if_none_match: Optional[str]
+                            ) -> Optional[HTTPResponse]:
+        """
+        Answers a conditional request before reading the whole Record. The Record of an
+        operation is written once and can only be marked as deleted afterwards, so its
+        version is known from the `deleted` attribute alone: a client holding the deleted
+        version is answered without any read, otherwise only that attribute is read.
+        :param pk: Primary key
+        :param sk: Sort key
+        :param record_id: ID of the Record
+        :param if_none_match: If-None-Match request header
+        :return: 304 Not Modified HTTPResponse or None if the Record must be sent
+        """
+        if not if_none_match:
+            return None
+        response = _get_not_modified_response(record_id=record_id, deleted=True)
+        if if_none_match.strip() != '*' and response.is_not_modified(if_none_match=if_none_match):
+            return response
+
+        user_record_db = self.crud_service.get(pk=pk,
+                                               sk=sk,
+                                               fields=POLL_RESULTS_VERSION_FIELDS)
+        if not user_record_db:
+            return None
+        response = _get_not_modified_response(record_id=record_id,
+                                              deleted=bool(user_record_db.get('deleted')))
+        return response if response.is_not_modified(if_none_match=if_none_match) else None
+
+    def _get_wait_seconds(self, wait: Optional[str], remaining_time_in_millis: Optional[int]) -> float:
+        """
+        Validates the wait query parameter and caps it so the response is sent before
+        API Gateway or the Lambda time out.
+        :param wait: wait query parameter
+        :param remaining_time_in_millis: Time left before the Lambda times out
+        :return: seconds to wait for the Record
+        """
+        if not wait:
+            return 0
+        try:
+            wait_seconds = float(wait)
+        except ValueError:
+            wait_seconds = -1
+        if not 0 <= wait_seconds <= POLL_RESULTS_MAX_WAIT_SECONDS:
+            raise HTTPException(status_code=HTTPStatus.BAD_REQUEST,
+                                msg=f"wait parameter must be a number of seconds between 0 "
+                                    f"and {POLL_RESULTS_MAX_WAIT_SECONDS}.")
+        if remaining_time_in_millis is not None:
+            available = (remaining_time_in_millis - POLL_RESULTS_DEADLINE_MARGIN_MILLISECONDS) / 1000
+            wait_seconds = max(0, min(wait_seconds, available))
+        return wait_seconds
+
+    def _wait_for_record(self, pk: str, sk: str, wait_seconds: float) -> Optional[dict]:
+        """
+        Reads the Record until it exists or the wait is over. Retries use strongly consistent
+        reads, so the Record is returned as soon as the worker writes it.
+        :param pk: Primary key
+        :param sk: Sort key
+        :param wait_seconds: Seconds to wait for the Record
+        :return: Record item or None
+        """
+        deadline = monotonic() + wait_seconds
+        backoff = POLL_RESULTS_BACKOFF_BASE_SECONDS
+        user_record_db = self.crud_service.get(pk=pk, sk=sk)
+        while not user_record_db:
+            remaining = deadline - monotonic()
+            if remaining <= 0:
+                break
+            sleep(min(backoff, remaining))
+            backoff = min(backoff * 2, POLL_RESULTS_BACKOFF_CAP_SECONDS)
+            user_record_db = self.crud_service.get(pk=pk, sk=sk, consistent_read=True)
+        return user_record_db
+
+
+def _get_record_headers(record_id: str, deleted: bool) -> dict:
+    """
+    Caching headers of a Record. Clients revalidate it with its version ETag, which only
+    changes when the Record is marked as deleted.
+    :param record_id: ID of the Record
+    :param deleted: Whether the Record is marked as deleted
+    :return: headers
+    """
+    return {
+        'Cache-Control': CACHE_CONTROL_REVALIDATE,
+        'ETag': f'"{record_id}.{int(deleted)}"'
+    }
+
+
+def _get_not_modified_response(record_id: str, deleted: bool) -> HTTPResponse:
+    """
+    :param record_id: ID of the Record
+    :param deleted: Whether the Record is marked as deleted
+    :return: 304 Not Modified HTTPResponse of the Record version
+    """
+    return HTTPResponse(status_code=HTTPStatus.NOT_MODIFIED,
+                        body='',
+                        headers=_get_record_headers(record_id=record_id, deleted=deleted),
+                        serialize=False).set_etag()
@@ -1,9 +1,10 @@
 from http import HTTPStatus
 
 import pytest
-from mock import MagicMock
+from mock import MagicMock, patch
 
 from lambdas.poll_results.processor import PollResultsProcessor
+from shared.api_utils import CACHE_CONTROL_REVALIDATE
 from shared.error_handling import HTTPException
 from shared.fixture_utils import json_fixture
 from shared.json_utils import json_string_to_dict
@@ -14,6 +15,8 @@ mock_crud_service = MagicMock()
 POLL_RESULTS_EVENT_VALID = json_fixture('poll_results_event_valid.json')
 POLL_RESULTS_GET_USER_RECORD_RETURN_VALUE = json_fixture('poll_results_get_user_record_return_value.json')
 POLL_RESULTS_VALID_EXPECTED = json_fixture('poll_results_valid_expected.json')
+POLL_RESULTS_ETAG = '"1a40eea3-bd09-4ee9-8b21-c7b50c536f3d.0"'
+POLL_RESULTS_DELETED_ETAG = '"1a40eea3-bd09-4ee9-8b21-c7b50c536f3d.1"'
 
 
 def reset_mocks():
@@ -37,6 +40,45 @@ def test_poll_results_success(processor):
 
     assert result.status_code == HTTPStatus.OK
     assert json_string_to_dict(result.body) == expected
+    assert result.headers['Cache-Control'] == CACHE_CONTROL_REVALIDATE
+    assert result.headers['ETag'] == POLL_RESULTS_ETAG
+
+
+def test_poll_results_not_modified_reads_only_deleted_flag(processor):
+    event = {**POLL_RESULTS_EVENT_VALID, 'headers': {'If-None-Match': POLL_RESULTS_ETAG}}
+    mock_crud_service.get.reset_mock()
+    mock_crud_service.get.return_value = {'deleted': False}
+    result = processor.process_poll_results_event(event=event)
+
+    assert result.status_code == HTTPStatus.NOT_MODIFIED
+    assert result.body == ''
+    assert result.headers['ETag'] == POLL_RESULTS_ETAG
+    mock_crud_service.get.assert_called_once()
+    assert mock_crud_service.get.call_args.kwargs['fields'] == ['deleted']
+
+
+def test_poll_results_deleted_not_modified_without_reads(processor):
+    event = {**POLL_RESULTS_EVENT_VALID, 'headers': {'If-None-Match': f'W/{POLL_RESULTS_DELETED_ETAG}'}}
+    mock_crud_service.get.reset_mock()
+    result = processor.process_poll_results_event(event=event)
+
+    assert result.status_code == HTTPStatus.NOT_MODIFIED
+    assert result.headers['ETag'] == POLL_RESULTS_DELETED_ETAG
+    mock_crud_service.get.assert_not_called()
+
+
+def test_poll_results_modified_returns_record(processor):
+    event = {**POLL_RESULTS_EVENT_VALID, 'headers': {'If-None-Match': POLL_RESULTS_ETAG}}
+    deleted_record = {**POLL_RESULTS_GET_USER_RECORD_RETURN_VALUE, 'deleted': True}
+    mock_crud_service.get.reset_mock()
+    mock_crud_service.get.side_effect = [{'deleted': True}, deleted_record]
+    result = processor.process_poll_results_event(event=event)
+    mock_crud_service.get.side_effect = None
+
+    assert result.status_code == HTTPStatus.OK
+    assert json_string_to_dict(result.body)['deleted'] is True
+    assert result.headers['ETag'] == POLL_RESULTS_DELETED_ETAG
+    assert mock_crud_service.get.call_count == 2
 
 
 def test_poll_results_no_record_raises_404(processor):
@@ -44,3 +86,37 @@ def test_poll_results_no_record_raises_404(processor):
     mock_crud_service.get.return_value = None
     with pytest.raises(HTTPException):
         processor.process_poll_results_event(event=event)
+
+
+@patch('lambdas.poll_results.processor.sleep')
+def test_poll_results_wait_returns_record_once_written(mock_sleep, processor):
+    event = {**POLL_RESULTS_EVENT_VALID, 'queryStringParameters': {'wait': '10'}}
+    mock_crud_service.get.reset_mock()
+    mock_crud_service.get.side_effect = [None, None, POLL_RESULTS_GET_USER_RECORD_RETURN_VALUE]
+    result = processor.process_poll_results_event(event=event, remaining_time_in_millis=28000)
+    mock_crud_service.get.side_effect = None
+
+    assert result.status_code == HTTPStatus.OK
+    assert json_string_to_dict(result.body) == POLL_RESULTS_VALID_EXPECTED
+    assert mock_crud_service.get.call_count == 3
+    assert mock_crud_service.get.call_args.kwargs['consistent_read'] is True
+    assert [call.args[0] for call in mock_sleep.call_args_list] == [0.1, 0.2]
+
+
+@patch('lambdas.poll_results.processor.sleep')
+def test_poll_results_wait_is_capped_by_remaining_time(mock_sleep, processor):
+    event = {**POLL_RESULTS_EVENT_VALID, 'queryStringParameters': {'wait': '20'}}
+    mock_crud_service.get.return_value = None
+    with pytest.raises(HTTPException):
+        processor.process_poll_results_event(event=event, remaining_time_in_millis=1000)
+
+    mock_sleep.assert_not_called()
+
+
+@pytest.mark.parametrize('wait', ['-1', '26', 'abc'])
+def test_poll_results_invalid_wait_raises_400(processor, wait):
+    event = {**POLL_RESULTS_EVENT_VALID, 'queryStringParameters': {'wait': wait}}
+    with pytest.raises(HTTPException) as err:
+        processor.process_poll_results_event(event=event)
+
+    assert err.value.status_code == HTTPStatus.BAD_REQUEST
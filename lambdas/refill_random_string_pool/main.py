@@ -0,0 +1,58 @@
+import logging
+import os
+
+import boto3
+from pythonjsonlogger import jsonlogger
+
+from lambdas.refill_random_string_pool.processor import RefillRandomStringPoolProcessor
+from shared.crud_service import CrudService
+from shared.random_pool import (RandomStringPool, get_random_pool_spec, RANDOM_ORG_API_URL,
+                                RANDOM_ORG_STRING_QUERY_PARAMS, RANDOM_POOL_LOW_WATER_MARK,
+                                RANDOM_POOL_REFILL_SIZE)
+from shared.requests_utils import HttpClient
+
+# environment variables
+LOGGING_LEVEL = os.environ.get('LOGGING_LEVEL', 'INFO')
+DYNAMODB_TABLE_NAME = os.environ.get('DYNAMODB_TABLE_NAME', 'arithmetic-calculator-api-dev-ArithmeticCalculatorTable')
+
+# logging
+logger = logging.getLogger(__name__)
+logHandler = logging.StreamHandler()
+formatter = jsonlogger.JsonFormatter()
+logHandler.setFormatter(formatter)
+logger.addHandler(logHandler)
+logger.setLevel(LOGGING_LEVEL)
+
+# AWS resources
+dynamodb = boto3.resource('dynamodb')
+table = dynamodb.Table(DYNAMODB_TABLE_NAME)
+
+crud_service = CrudService(logger=logger,
+                           table=table)
+
+# Random.org resources
+random_string_pool = RandomStringPool(logger=logger,
+                                      crud_service=crud_service,
+                                      spec=get_random_pool_spec(RANDOM_ORG_STRING_QUERY_PARAMS))
+random_org_http_client = HttpClient()
+
+
+def handler(event: dict, context: dict) -> dict:
+    """
+    Refill Random String Pool Lambda.
+    This lambda runs on a schedule and tops up the random string pool shared by the
+    Generate Random String Workers when it falls below the low-water mark, requesting
+    the missing strings to the Random.org API in a single bulk request.
+
+    This way most random string operations are served from the pool with a single
+    DynamoDB write and no external HTTP call on the critical path.
+    """
+    processor = RefillRandomStringPoolProcessor(logger=logger,
+                                                random_string_pool=random_string_pool,
+                                                random_org_api_url=RANDOM_ORG_API_URL,
+                                                query_params=RANDOM_ORG_STRING_QUERY_PARAMS,
+                                                low_water_mark=RANDOM_POOL_LOW_WATER_MARK,
+                                                refill_size=RANDOM_POOL_REFILL_SIZE,
+                                                http_client=random_org_http_client)
+
+    return processor.process_refill_event(event=event)
@@ -0,0 +1,76 @@
+from http import HTTPStatus
+from logging import Logger
+from typing import List, Optional
+
+import requests
+
+from shared.random_pool import RandomStringPool, generate_random_strings, get_random_org_alphabet
+from shared.requests_utils import HttpClient, request_with_retry
+
+RANDOM_ORG_MAX_STRINGS_PER_REQUEST = 10000
+
+
+class RefillRandomStringPoolProcessor:
+    def __init__(self,
+                 logger: Logger,
+                 random_string_pool: RandomStringPool,
+                 random_org_api_url: str,
+                 query_params: dict,
+                 low_water_mark: int,
+                 refill_size: int,
+                 http_client: Optional[HttpClient] = None
+                 ) -> None:
+        self.logger = logger
+        self.random_string_pool = random_string_pool
+        self.random_org_api_url = random_org_api_url
+        self.query_params = query_params
+        self.low_water_mark = low_water_mark
+        self.refill_size = refill_size
+        self.http_client = http_client
+
+    def process_refill_event(self, event: dict) -> dict:
+        """
+        Tops up the random string pool when it falls below the low-water mark.
+        :param event: Scheduled event
+        :return: Pool size before the refill and number of strings added
+        """
+        pool_size = self.random_string_pool.size()
+        self.logger.info(f"Random string pool {self.random_string_pool.pk} has {pool_size} strings",
+                         extra={'LowWaterMark': self.low_water_mark})
+        if pool_size >= self.low_water_mark:
+            return {'pool_size': pool_size, 'added': 0}
+
+        count = self.refill_size - pool_size
+        random_strings = self._get_random_org_strings(count=count)
+        if not random_strings:
+            self.logger.info("Generating Random Strings Locally",
+                             extra={'Count': count})
+            random_strings = generate_random_strings(count=count,
+                                                     length=int(self.query_params.get('len', 8)),
+                                                     alphabet=get_random_org_alphabet(self.query_params))
+        added = self.random_string_pool.refill(random_strings=random_strings)
+        return {'pool_size': pool_size, 'added': added}
+
+    def _get_random_org_strings(self, count: int) -> List[str]:
+        """
+        Requests strings to random.org in bulk
+        :param count: Number of strings
+        :return: random strings, empty if random.org could not be reached or the quota ran out
+        """
+        query_params = {**self.query_params, 'num': min(count, RANDOM_ORG_MAX_STRINGS_PER_REQUEST)}
+        try:
+            response = request_with_retry(logger=self.logger,
+                                          url=self.random_org_api_url,
+                                          request_method='GET',
+                                          query_params=query_params,
+                                          http_client=self.http_client)
+        except requests.RequestException as err:
+            self.logger.exception("Could not reach Random.org API.",
+                                  extra={'Exception': err})
+            return []
+
+        if response.status_code >= HTTPStatus.BAD_REQUEST or not response.text:
+            self.logger.error("Unfortunately, we ran out of Random.org API Quota.")
+            return []
+
+        return response.text.strip().split('\n')
@@ -0,0 +1,58 @@
+import pytest
+from mock import MagicMock, patch
+
+from lambdas.refill_random_string_pool.processor import RefillRandomStringPoolProcessor
+
+mock_logger = MagicMock()
+mock_random_string_pool = MagicMock()
+mock_request_helper = MagicMock()
+
+
+@pytest.fixture()
+def processor() -> RefillRandomStringPoolProcessor:
+    mock_random_string_pool.reset_mock()
+    mock_request_helper.reset_mock()
+    return RefillRandomStringPoolProcessor(logger=mock_logger,
+                                           random_string_pool=mock_random_string_pool,
+                                           random_org_api_url='',
+                                           query_params={'len': 8},
+                                           low_water_mark=200,
+                                           refill_size=1000)
+
+
+@patch('lambdas.refill_random_string_pool.processor.request_with_retry', mock_request_helper)
+def test_refill_random_string_pool_below_low_water_mark(processor):
+    mock_random_string_pool.size.return_value = 150
+    mock_random_string_pool.refill.return_value = 2
+    mock_request_helper.return_value.status_code = 200
+    mock_request_helper.return_value.text = "PKXculUm\nWhVZdSjH\n"
+
+    result = processor.process_refill_event(event={})
+
+    assert result == {'pool_size': 150, 'added': 2}
+    assert mock_request_helper.call_args.kwargs['query_params'] == {'len': 8, 'num': 850}
+    mock_random_string_pool.refill.assert_called_once_with(random_strings=['PKXculUm', 'WhVZdSjH'])
+
+
+@patch('lambdas.refill_random_string_pool.processor.request_with_retry', mock_request_helper)
+def test_refill_random_string_pool_above_low_water_mark(processor):
+    mock_random_string_pool.size.return_value = 500
+
+    result = processor.process_refill_event(event={})
+
+    assert result == {'pool_size': 500, 'added': 0}
+    mock_request_helper.assert_not_called()
+    mock_random_string_pool.refill.assert_not_called()
+
+
+@patch('lambdas.refill_random_string_pool.processor.request_with_retry', mock_request_helper)
+def test_refill_random_string_pool_generates_locally_when_quota_ran_out(processor):
+    mock_random_string_pool.size.return_value = 190
+    mock_request_helper.return_value.status_code = 503
+    mock_request_helper.return_value.text = "Error: You have used your daily bit allowance."
+
+    processor.process_refill_event(event={})
+
+    random_strings = mock_random_string_pool.refill.call_args.kwargs['random_strings']
+    assert len(set(random_strings)) == 810
+    assert all(len(random_string) == 8 for random_string in random_strings)
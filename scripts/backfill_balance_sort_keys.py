@@ -0,0 +1,154 @@
+"""
+Backfill of the GSI2 sort key of the existing Records to the zero padded balance encoding
+(shared/models/record_model.get_balance_sort_key), so balance range queries return the
+right Records for the items written before the encoding changed.
+
+The table is read with a parallel scan, one thread per segment, and the stale items of each
+page are updated with adaptive concurrency. After every page the LastEvaluatedKey of the
+segment is saved to a checkpoint file, so an interrupted backfill resumes where it stopped.
+Items already encoded are skipped, running it again is harmless.
+
+Usage (from the repository root, with credentials for the table):
+    python -m scripts.backfill_balance_sort_keys --table <table name> [--segments 8] \
+        [--checkpoint backfill_balance_sort_keys.json]
+"""
+import argparse
+import json
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from logging import Logger
+from typing import Tuple
+
+import boto3
+from boto3.dynamodb.conditions import Attr
+
+from shared.concurrency_utils import AdaptiveConcurrencyRunner
+from shared.crud_service import CrudService
+from shared.error_handling import HTTPException
+from shared.models.record_model import get_balance_sort_key, zero_negative_balance
+
+SEGMENT_DONE = 'done'
+BACKFILL_FIELDS = ['PK', 'SK', 'GSI2SK', 'user_balance']
+
+
+class BalanceSortKeyBackfill:
+    def __init__(self,
+                 logger: Logger,
+                 crud_service: CrudService,
+                 total_segments: int,
+                 checkpoint_path: str,
+                 page_size: int = 500
+                 ) -> None:
+        self.logger = logger
+        self.crud_service = crud_service
+        self.total_segments = total_segments
+        self.checkpoint_path = checkpoint_path
+        self.page_size = page_size
+        self.checkpoints = self._load_checkpoints()
+        self._lock = threading.Lock()
+
+    def run(self) -> dict:
+        """
+        Backfills all the segments in parallel.
+        :return: number of Records scanned and updated
+        """
+        with ThreadPoolExecutor(max_workers=self.total_segments) as executor:
+            results = list(executor.map(self.backfill_segment, range(self.total_segments)))
+        return {'scanned': sum(scanned for scanned, _ in results),
+                'updated': sum(updated for _, updated in results)}
+
+    def backfill_segment(self, segment: int) -> Tuple[int, int]:
+        """
+        Rewrites the stale GSI2 sort keys of a segment, page by page from its checkpoint.
+        :param segment: Segment of the parallel scan
+        :return: number of Records scanned and updated
+        """
+        exclusive_start_key = self.checkpoints.get(str(segment))
+        if exclusive_start_key == SEGMENT_DONE:
+            self.logger.info(f"Segment {segment} already backfilled")
+            return 0, 0
+
+        runner = AdaptiveConcurrencyRunner(logger=self.logger)
+        scanned = updated = 0
+        while True:
+            items, last_evaluated_key = self.crud_service.scan_page(segment=segment,
+                                                                    total_segments=self.total_segments,
+                                                                    limit=self.page_size,
+                                                                    exclusive_start_key=exclusive_start_key,
+                                                                    fields=BACKFILL_FIELDS,
+                                                                    filter_expression=Attr('entity').eq('RECORD'))
+            stale_items = [item for item in items if item.get('GSI2SK') != self._get_sort_key(item)]
+            outcomes = runner.run(func=self._update_sort_key,
+                                  items=stale_items,
+                                  is_throttled=_is_throttled)
+            errors = [error for _, _, error in outcomes if error is not None]
+            if errors:
+                # the checkpoint is not moved, the page is processed again on the next run
+                raise errors[0]
+
+            scanned += len(items)
+            updated += len(stale_items)
+            exclusive_start_key = last_evaluated_key
+            self._save_checkpoint(segment=segment, checkpoint=last_evaluated_key or SEGMENT_DONE)
+            if not last_evaluated_key:
+                self.logger.info(f"Segment {segment} finished. Scanned: {scanned}, updated: {updated}")
+                return scanned, updated
+
+    def _get_sort_key(self, item: dict) -> str:
+        return get_balance_sort_key(zero_negative_balance(item['user_balance']))
+
+    def _update_sort_key(self, item: dict) -> None:
+        self.crud_service.update_item_attributes(pk=item['PK'],
+                                                 sk=item['SK'],
+                                                 update_expression='SET #gsi2sk = :gsi2sk',
+                                                 expression_attribute_names={'#gsi2sk': 'GSI2SK'},
+                                                 expression_attribute_values={':gsi2sk': self._get_sort_key(item)})
+
+    def _load_checkpoints(self) -> dict:
+        if not os.path.exists(self.checkpoint_path):
+            return {}
+        with open(self.checkpoint_path) as checkpoint_file:
+            checkpoints = json.load(checkpoint_file)
+        if checkpoints.get('total_segments') != self.total_segments:
+            raise ValueError(f"Checkpoint {self.checkpoint_path} was created with "
+                             f"{checkpoints.get('total_segments')} segments")
+        return checkpoints['segments']
+
+    def _save_checkpoint(self, segment: int, checkpoint) -> None:
+        with self._lock:
+            self.checkpoints[str(segment)] = checkpoint
+            temporary_path = f'{self.checkpoint_path}.tmp'
+            with open(temporary_path, 'w') as checkpoint_file:
+                json.dump({'total_segments': self.total_segments, 'segments': self.checkpoints}, checkpoint_file)
+            os.replace(temporary_path, self.checkpoint_path)
+
+
+def _is_throttled(error: Exception) -> bool:
+    return isinstance(error, HTTPException) and error.status_code == HTTPStatus.TOO_MANY_REQUESTS
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--table', required=True, help='DynamoDB table name')
+    parser.add_argument('--segments', type=int, default=8, help='Parallel scan segments (threads)')
+    parser.add_argument('--page-size', type=int, default=500, help='Items evaluated per scan request')
+    parser.add_argument('--checkpoint', default='backfill_balance_sort_keys.json', help='Checkpoint file')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    logger = logging.getLogger('backfill_balance_sort_keys')
+    crud_service = CrudService(logger=logger,
+                               table=boto3.resource('dynamodb').Table(args.table))
+    backfill = BalanceSortKeyBackfill(logger=logger,
+                                      crud_service=crud_service,
+                                      total_segments=args.segments,
+                                      checkpoint_path=args.checkpoint,
+                                      page_size=args.page_size)
+    print(backfill.run())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""
+Microbenchmark of the JSON codec backends in shared/json_utils on list-records payloads.
+
+Usage (from the repository root):
+    python -m scripts.benchmark_json_codec [--records 1000] [--repeat 50]
+"""
+import argparse
+import timeit
+from decimal import Decimal
+from uuid import uuid4
+
+from shared.json_utils import OrJsonCodec, SimpleJsonCodec, orjson
+
+
+def get_list_records_payload(records: int, decimals: bool) -> dict:
+    """
+    Paginated list records response body. With decimals=True the numbers are Decimals,
+    like the items returned by boto3 before being mapped to the response model.
+    """
+    number = Decimal if decimals else int
+    user_id = str(uuid4())
+    return {
+        'page': 1,
+        'per_page': records,
+        'total': records,
+        'total_pages': 1,
+        'data': [{
+            'entity': 'RECORD',
+            'record_id': str(uuid4()),
+            'operation_id': str(uuid4()),
+            'user_id': user_id,
+            'amount': number(2),
+            'user_balance': number(1000 - index),
+            'operation_response': str(index * 3),
+            'date': number(1678232290113 + index),
+            'deleted': False
+        } for index in range(records)]
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--records', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    reference = SimpleJsonCodec()
+    codecs = [reference]
+    if orjson is not None:
+        codecs.append(OrJsonCodec(fallback=reference))
+
+    for decimals in (False, True):
+        payload = get_list_records_payload(records=args.records, decimals=decimals)
+        encoded = reference.dumps(payload)
+        print(f"{args.records} records, {'Decimal' if decimals else 'int'} numbers, {len(encoded)} bytes")
+        for codec in codecs:
+            assert codec.dumps(payload) == encoded
+            dumps = min(timeit.repeat(lambda: codec.dumps(payload), number=1, repeat=args.repeat))
+            loads = min(timeit.repeat(lambda: codec.loads(encoded), number=1, repeat=args.repeat))
+            print(f"  {codec.name:<10} dumps {dumps * 1000:8.3f} ms  loads {loads * 1000:8.3f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+"""
+Microbenchmark of the DynamoDB item to response dict conversion of the list endpoints:
+pydantic validation (`RecordOUT(**item).dict()`) vs `RecordOUT.from_db_items(items)`.
+
+Usage (from the repository root):
+    python -m scripts.benchmark_model_hydration [--records 1000] [--repeat 20]
+"""
+import argparse
+import timeit
+from decimal import Decimal
+from uuid import uuid4
+
+from shared.models.record_model import RecordIN, RecordOUT
+
+
+def get_db_items(records: int) -> list:
+    """
+    Record items as returned by boto3, numbers are Decimals.
+    """
+    user_id = str(uuid4())
+    items = []
+    for index in range(records):
+        item = RecordIN(record_id=str(uuid4()),
+                        operation_id=str(uuid4()),
+                        user_id=user_id,
+                        amount=2,
+                        user_balance=1000 - index,
+                        operation_response=str(index * 3),
+                        date=1678232290113 + index).dict()
+        items.append({key: Decimal(value) if isinstance(value, int) and not isinstance(value, bool) else value
+                      for key, value in item.items()})
+    return items
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--records', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    items = get_db_items(records=args.records)
+    assert RecordOUT.from_db_items(items) == [RecordOUT(**dict(item)).dict() for item in items]
+
+    validated = min(timeit.repeat(lambda: [RecordOUT(**dict(item)).dict() for item in items],
+                                  number=1, repeat=args.repeat))
+    hydrated = min(timeit.repeat(lambda: RecordOUT.from_db_items(items), number=1, repeat=args.repeat))
+    print(f"{args.records} records")
+    print(f"  RecordOUT(**item).dict()   {validated * 1000:8.3f} ms")
+    print(f"  RecordOUT.from_db_items    {hydrated * 1000:8.3f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+import json
+from http import HTTPStatus
+
+import pytest
+from mock import MagicMock
+
+from scripts.backfill_balance_sort_keys import BalanceSortKeyBackfill, SEGMENT_DONE
+from shared.error_handling import HTTPException
+
+mock_logger = MagicMock()
+mock_crud_service = MagicMock()
+
+FIRST_PAGE_KEY = {'PK': 'User#1', 'SK': 'Record#2'}
+FIRST_PAGE = [
+    {'PK': 'User#1', 'SK': 'Record#1', 'GSI2SK': 'Record#19', 'user_balance': 19},
+    {'PK': 'User#1', 'SK': 'Record#2', 'GSI2SK': 'Record#0000000000000018', 'user_balance': 18}
+]
+SECOND_PAGE = [
+    {'PK': 'User#2', 'SK': 'Record#3', 'GSI2SK': 'Record#-2', 'user_balance': -2}
+]
+
+
+def reset_mocks():
+    mock_logger.reset_mock()
+    mock_crud_service.reset_mock()
+    mock_crud_service.scan_page.side_effect = None
+    mock_crud_service.update_item_attributes.side_effect = None
+
+
+def get_backfill(checkpoint_path) -> BalanceSortKeyBackfill:
+    return BalanceSortKeyBackfill(logger=mock_logger,
+                                  crud_service=mock_crud_service,
+                                  total_segments=1,
+                                  checkpoint_path=str(checkpoint_path))
+
+
+def get_updated_sort_keys() -> dict:
+    return {call.kwargs['sk']: call.kwargs['expression_attribute_values'][':gsi2sk']
+            for call in mock_crud_service.update_item_attributes.call_args_list}
+
+
+def test_backfill_updates_only_stale_sort_keys(tmp_path):
+    reset_mocks()
+    checkpoint_path = tmp_path / 'checkpoint.json'
+    mock_crud_service.scan_page.side_effect = [(FIRST_PAGE, FIRST_PAGE_KEY), (SECOND_PAGE, None)]
+
+    assert get_backfill(checkpoint_path).run() == {'scanned': 3, 'updated': 2}
+    assert get_updated_sort_keys() == {'Record#1': 'Record#0000000000000019',
+                                       'Record#3': 'Record#0000000000000000'}
+    assert json.loads(checkpoint_path.read_text()) == {'total_segments': 1, 'segments': {'0': SEGMENT_DONE}}
+
+
+def test_backfill_resumes_from_the_checkpoint(tmp_path):
+    reset_mocks()
+    checkpoint_path = tmp_path / 'checkpoint.json'
+    checkpoint_path.write_text(json.dumps({'total_segments': 1, 'segments': {'0': FIRST_PAGE_KEY}}))
+    mock_crud_service.scan_page.side_effect = [(SECOND_PAGE, None)]
+
+    assert get_backfill(checkpoint_path).run() == {'scanned': 1, 'updated': 1}
+    assert mock_crud_service.scan_page.call_args.kwargs['exclusive_start_key'] == FIRST_PAGE_KEY
+
+    # a finished segment is not scanned again
+    reset_mocks()
+    assert get_backfill(checkpoint_path).run() == {'scanned': 0, 'updated': 0}
+    mock_crud_service.scan_page.assert_not_called()
+
+
+def test_backfill_error_keeps_the_checkpoint(tmp_path):
+    reset_mocks()
+    checkpoint_path = tmp_path / 'checkpoint.json'
+    checkpoint_path.write_text(json.dumps({'total_segments': 1, 'segments': {'0': FIRST_PAGE_KEY}}))
+    mock_crud_service.scan_page.side_effect = [(SECOND_PAGE, None)]
+    mock_crud_service.update_item_attributes.side_effect = HTTPException(status_code=HTTPStatus.BAD_REQUEST,
+                                                                         msg='error')
+
+    with pytest.raises(HTTPException):
+        get_backfill(checkpoint_path).run()
+    assert json.loads(checkpoint_path.read_text())['segments'] == {'0': FIRST_PAGE_KEY}
+
+
+def test_backfill_rejects_a_checkpoint_of_other_segments(tmp_path):
+    checkpoint_path = tmp_path / 'checkpoint.json'
+    checkpoint_path.write_text(json.dumps({'total_segments': 4, 'segments': {}}))
+
+    with pytest.raises(ValueError):
+        get_backfill(checkpoint_path)
@@ -1,12 +1,15 @@
 """
 Helper functions/classes for the API Gateway response handling
 """
-
+import base64
+import hashlib
 from http import HTTPStatus
-from typing import Union
+from typing import Optional, Union
 
 from shared.json_utils import dict_to_json_string
 
+CACHE_CONTROL_REVALIDATE = 'private, no-cache'
+
 
 class HTTPResponse:
     """
@@ -15,19 +18,97 @@ class HTTPResponse:
 
     def __init__(self,
                  status_code: Union[HTTPStatus, int],
-                 body: Union[dict, list, str]
+                 body: Union[dict, list, str],
+                 headers: Optional[dict] = None,
+                 serialize: bool = True
                  ) -> None:
+        """
+        :param status_code: HTTP status code
+        :param body: Response body, serialized to JSON unless serialize is False
+        :param headers: [Optional] Additional headers
+        :param serialize: [Optional] False to send a str body as it is (i.e. CSV)
+        """
         self.status_code = int(status_code)
-        self.body = dict_to_json_string(body)
+        self.body = dict_to_json_string(body) if serialize else body
+        self.is_base64_encoded = False
         self.headers = {
             'Access-Control-Allow-Origin': '*',
             'Access-Control-Allow-Credentials': True,
             'Access-Control-Allow-Methods': 'DELETE,GET,HEAD,OPTIONS,PATCH,POST,PUT'
         }
+        if headers:
+            self.headers.update(headers)
+
+    def set_etag(self) -> 'HTTPResponse':
+        """
+        Sets a strong ETag computed from the body, unless the response
+        already carries one (i.e. a version known without serializing the body).
+        :return: self
+        """
+        if 'ETag' not in self.headers:
+            digest = hashlib.blake2b(self.body.encode('utf-8'), digest_size=16).hexdigest()
+            self.headers['ETag'] = f'"{digest}"'
+        exposed_headers = self.headers.get('Access-Control-Expose-Headers')
+        self.headers['Access-Control-Expose-Headers'] = f'{exposed_headers}, ETag' if exposed_headers else 'ETag'
+        return self
+
+    def is_not_modified(self, if_none_match: Optional[str]) -> bool:
+        """
+        Checks the If-None-Match request header against the ETag (weak comparison).
+        :param if_none_match: If-None-Match request header
+        :return: True if the client already has the current representation
+        """
+        etag = self.headers.get('ETag')
+        if not etag or not if_none_match:
+            return False
+        if if_none_match.strip() == '*':
+            return True
+        tags = {tag.strip().replace('W/', '', 1) for tag in if_none_match.split(',')}
+        return etag in tags
+
+    def set_not_modified(self) -> 'HTTPResponse':
+        """
+        Turns the response into a 304 Not Modified without body.
+        :return: self
+        """
+        self.status_code = int(HTTPStatus.NOT_MODIFIED)
+        self.body = ''
+        return self
 
     def to_dict(self) -> dict:
-        return {
+        response = {
             'headers': self.headers,
             'statusCode': self.status_code,
             'body': self.body
         }
+        if self.is_base64_encoded:
+            response['isBase64Encoded'] = True
+        return response
+
+
+def get_request_header(event: dict, name: str) -> Optional[str]:
+    """
+    Get a request header from an API Gateway event (header names are case-insensitive).
+    :param event: API Gateway event
+    :param name: Header name
+    :return: Header value or None
+    """
+    headers = event.get('headers') or {}
+    name = name.lower()
+    for header, value in headers.items():
+        if header.lower() == name:
+            return value
+    return None
+
+
+def get_event_body(event: dict) -> str:
+    """
+    Get the request body of an API Gateway event, decoding it if API Gateway
+    passed it base64 encoded (binary media types).
+    :param event: API Gateway event
+    :return: body
+    """
+    body = event.get('body') or '{}'
+    if event.get('isBase64Encoded'):
+        return base64.b64decode(body).decode('utf-8')
+    return body
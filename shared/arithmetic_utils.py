@@ -2,9 +2,12 @@
 Common helper/utility functions used to perform arithmetic operations
 """
 import math
+from typing import Optional, Union
 
 from shared.models.operation_model import OperationType
 
+SINGLE_NUMBER_OPERATIONS = [OperationType.SQUARE_ROOT]
+
 
 def sum_numbers(num1, num2):
     return num1 + num2
@@ -33,3 +36,25 @@ OPERATION_MAP = {
     OperationType.DIVISION: divide,
     OperationType.SQUARE_ROOT: square_root
 }
+
+
+def perform_arithmetic_operation(operation_type: OperationType,
+                                 num1: Optional[Union[float, int]] = None,
+                                 num2: Optional[Union[float, int]] = None,
+                                 single_number: Optional[Union[float, int]] = None
+                                 ) -> Union[float, int]:
+    """
+    Maps the operation to perform based on operation type, performs the
+    calculation and returns the result.
+    :param operation_type: The operation type
+    :param num1: The first number
+    :param num2: The second number
+    :param single_number: For single number operations i.e. sqrt
+    :return: the operation result
+    """
+    operation_func = OPERATION_MAP[operation_type]
+
+    if operation_type in SINGLE_NUMBER_OPERATIONS:
+        return operation_func(single_number)
+
+    return operation_func(num1, num2)
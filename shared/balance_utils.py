@@ -0,0 +1,192 @@
+"""
+Common helper/utility functions used for the Balance entity
+"""
+from logging import Logger
+from typing import List
+
+from shared.crud_service import CrudService
+from shared.date_utils import get_js_utc_now
+from shared.models.balance_model import BalanceOUT
+from shared.models.operation_model import OperationType
+from shared.models.record_model import DEFAULT_INITIAL_USER_BALANCE
+from shared.record_utils import get_user_most_recent_record, is_user_first_operation, RECORD_BALANCE_FIELDS
+from shared.rollup_utils import get_user_rollup_updates
+from shared.stats_utils import add_records_to_stats_bounds, get_user_stats_bounds, get_user_stats_update
+
+BALANCE_SK = 'Balance'
+# Records per TransactWriteItems, with the Balance and Stats updates and at most one Rollup
+# update per Record and granularity it stays within the 100 actions limit
+RECORDS_PER_TRANSACTION = 24
+
+
+def get_user_balance(logger: Logger, crud_service: CrudService, user_id: str) -> int:
+    """
+    Gets the user's current balance with a single strongly consistent read of the
+    materialized Balance item. Users that did not operate since the Balance item was
+    introduced fall back to their most recent Record (or the initial balance).
+    :param logger: logger
+    :param crud_service: Crud Service
+    :param user_id: ID of the user
+    :return: Current user balance
+    """
+    logger.info("Getting the user balance.")
+    balance_db = crud_service.get(pk=f'User#{user_id}',
+                                  sk=BALANCE_SK,
+                                  consistent_read=True,
+                                  fields=['user_balance'])
+    if balance_db:
+        return int(balance_db['user_balance'])
+
+    return _get_user_balance_from_records(logger=logger,
+                                          crud_service=crud_service,
+                                          user_id=user_id)
+
+
+def get_or_initialize_user_balance(logger: Logger, crud_service: CrudService, user_id: str) -> BalanceOUT:
+    """
+    Gets the user Balance item with a strongly consistent read, initializing it from
+    the user's Record history if it does not exist yet.
+    :param logger: logger
+    :param crud_service: Crud Service
+    :param user_id: ID of the user
+    :return: Balance
+    """
+    balance_db = crud_service.get(pk=f'User#{user_id}',
+                                  sk=BALANCE_SK,
+                                  consistent_read=True)
+    if not balance_db:
+        _initialize_user_balance(logger=logger,
+                                 crud_service=crud_service,
+                                 user_id=user_id)
+        balance_db = crud_service.get(pk=f'User#{user_id}',
+                                      sk=BALANCE_SK,
+                                      consistent_read=True)
+    return BalanceOUT(**balance_db)
+
+
+def save_user_records(logger: Logger,
+                      crud_service: CrudService,
+                      user_id: str,
+                      expected_balance: int,
+                      records: List[dict],
+                      operation_types: List[OperationType]
+                      ) -> None:
+    """
+    Saves the Records of several debits applied in memory together with the resulting
+    balance, the user Stats and Rollups, in TransactWriteItems of up to
+    RECORDS_PER_TRANSACTION Records: the balance is never charged without its Records
+    being saved, and the Records are counted in the Stats and Rollups exactly once.
+    The balance update is conditioned on the balance still being `expected_balance`
+    (optimistic locking) so concurrent updates from other workers are never overwritten,
+    and the Records are put with `attribute_not_exists(SK)` so they are never written twice.
+    :param logger: logger
+    :param crud_service: Crud Service
+    :param user_id: ID of the user
+    :param expected_balance: Balance read before applying the debits
+    :param records: Records to save in order (RecordIN dicts), with the balance after each debit
+    :param operation_types: Operation type of each Record
+    :return: None
+    :raises HTTPException: CONFLICT if the balance changed or a Record already exists. The
+                           transactions committed before stay, their Records exist.
+    """
+    stats_bounds = get_user_stats_bounds(crud_service=crud_service,
+                                         user_id=user_id)
+    for start in range(0, len(records), RECORDS_PER_TRANSACTION):
+        transaction_records = records[start:start + RECORDS_PER_TRANSACTION]
+        transaction_operation_types = operation_types[start:start + RECORDS_PER_TRANSACTION]
+        stats_bounds = add_records_to_stats_bounds(records=transaction_records,
+                                                   bounds=stats_bounds)
+        user_balance = transaction_records[-1]['user_balance']
+        logger.info(f"Saving {len(transaction_records)} records and updating user balance "
+                    f"from {expected_balance} to {user_balance}.")
+        transact_items = [_get_balance_update(user_id=user_id,
+                                              expected_balance=expected_balance,
+                                              user_balance=user_balance,
+                                              last_record_id=transaction_records[-1]['record_id'])]
+        transact_items.extend({'Put': {'Item': record,
+                                       'ConditionExpression': 'attribute_not_exists(SK)'}}
+                              for record in transaction_records)
+        transact_items.append(get_user_stats_update(user_id=user_id,
+                                                    records=transaction_records,
+                                                    operation_types=transaction_operation_types,
+                                                    bounds=stats_bounds))
+        transact_items.extend(get_user_rollup_updates(user_id=user_id,
+                                                      records=transaction_records))
+        crud_service.transact_write(transact_items=transact_items)
+        expected_balance = user_balance
+
+
+def _get_balance_update(user_id: str,
+                        expected_balance: int,
+                        user_balance: int,
+                        last_record_id: str
+                        ) -> dict:
+    """
+    TransactWriteItems action that sets the balance if it is still `expected_balance`.
+    """
+    return {
+        'Update': {
+            'Key': {'PK': f'User#{user_id}', 'SK': BALANCE_SK},
+            'UpdateExpression': 'SET #user_balance = :user_balance, '
+                                '#last_record_id = :record_id, #date = :date',
+            'ConditionExpression': '#user_balance = :expected_balance',
+            'ExpressionAttributeNames': {
+                '#user_balance': 'user_balance',
+                '#last_record_id': 'last_record_id',
+                '#date': 'date'
+            },
+            'ExpressionAttributeValues': {
+                ':user_balance': user_balance,
+                ':expected_balance': expected_balance,
+                ':record_id': last_record_id,
+                ':date': get_js_utc_now()
+            }
+        }
+    }
+
+
+def _initialize_user_balance(logger: Logger, crud_service: CrudService, user_id: str) -> None:
+    """
+    Creates the Balance item from the user's Record history. `if_not_exists` makes this
+    safe when several workers initialize the same user at the same time.
+    :param logger: logger
+    :param crud_service: Crud Service
+    :param user_id: ID of the user
+    """
+    user_balance = _get_user_balance_from_records(logger=logger,
+                                                  crud_service=crud_service,
+                                                  user_id=user_id)
+    logger.info(f"Initializing the user Balance item with balance {user_balance}.")
+    crud_service.upsert_item_attributes(
+        pk=f'User#{user_id}',
+        sk=BALANCE_SK,
+        update_expression='SET #user_balance = if_not_exists(#user_balance, :user_balance), '
+                          '#entity = :entity, #user_id = :user_id',
+        expression_attribute_names={
+            '#user_balance': 'user_balance',
+            '#entity': 'entity',
+            '#user_id': 'user_id'
+        },
+        expression_attribute_values={
+            ':user_balance': user_balance,
+            ':entity': 'BALANCE',
+            ':user_id': user_id
+        })
+
+
+def _get_user_balance_from_records(logger: Logger, crud_service: CrudService, user_id: str) -> int:
+    """
+    Derives the user balance from the most recent Record.
+    :param logger: logger
+    :param crud_service: Crud Service
+    :param user_id: ID of the user
+    :return: User balance
+    """
+    user_records_db = get_user_most_recent_record(crud_service=crud_service,
+                                                  user_id=user_id,
+                                                  fields=RECORD_BALANCE_FIELDS)
+    if is_user_first_operation(logger=logger,
+                               user_records_db=user_records_db):
+        return DEFAULT_INITIAL_USER_BALANCE
+
+    return int(user_records_db[0]['user_balance'])
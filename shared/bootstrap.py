@@ -6,6 +6,7 @@ from logging import Logger
 
 from shared.crud_service import CrudService, ConditionType
 from shared.models.operation_model import OperationIN, OperationType
+from shared.operation_catalog import set_catalog_version
 
 
 def create_operations_if_not_exists(logger: Logger, crud_service: CrudService):
@@ -20,3 +21,4 @@ def create_operations_if_not_exists(logger: Logger, crud_service: CrudService):
                                        cost=cost)
             crud_service.create(item=operation_in.dict())
             cost += 1
+        set_catalog_version(crud_service=crud_service)
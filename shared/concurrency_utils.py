@@ -0,0 +1,88 @@
+"""
+Common helper/utility functions used for running DynamoDB requests in parallel
+"""
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from logging import Logger
+from time import sleep
+from typing import Any, Callable, Iterable, List, Optional, Tuple
+
+DEFAULT_MAX_CONCURRENCY = 16
+DEFAULT_INITIAL_CONCURRENCY = 4
+DEFAULT_MAX_ATTEMPTS = 5
+DEFAULT_BACKOFF_BASE_SECONDS = 0.05
+DEFAULT_BACKOFF_CAP_SECONDS = 2.0
+
+
+class AdaptiveConcurrencyRunner:
+    """
+    Runs a function over many items in parallel waves, adapting the number of concurrent
+    requests to the throughput available (AIMD, like TCP congestion control): every wave
+    without throttling adds one concurrent request, a throttled wave halves them and waits
+    with exponential backoff before the throttled items are retried.
+    """
+
+    def __init__(self,
+                 logger: Logger,
+                 max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+                 initial_concurrency: int = DEFAULT_INITIAL_CONCURRENCY,
+                 max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+                 backoff_base_seconds: float = DEFAULT_BACKOFF_BASE_SECONDS,
+                 backoff_cap_seconds: float = DEFAULT_BACKOFF_CAP_SECONDS
+                 ) -> None:
+        """
+        :param logger: logger
+        :param max_concurrency: Maximum number of concurrent requests
+        :param initial_concurrency: Concurrent requests of the first wave
+        :param max_attempts: Number of times a throttled item is tried before giving up
+        :param backoff_base_seconds: Base of the exponential backoff after a throttled wave
+        :param backoff_cap_seconds: Maximum wait after a throttled wave
+        """
+        self.logger = logger
+        self.max_concurrency = max_concurrency
+        self.concurrency = min(initial_concurrency, max_concurrency)
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base_seconds
+        self.backoff_cap = backoff_cap_seconds
+
+    def run(self,
+            func: Callable[[Any], Any],
+            items: Iterable[Any],
+            is_throttled: Callable[[Exception], bool]
+            ) -> List[Tuple[Any, Any, Optional[Exception]]]:
+        """
+        Calls func for every item.
+        :param func: Function to call with each item
+        :param items: Items to process
+        :param is_throttled: Tells if an exception raised by func is a throttling error
+        :return: (item, result, exception) outcome of every item, in completion order
+        """
+        pending = deque((item, 1) for item in items)
+        outcomes = []
+        throttled_waves = 0
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            while pending:
+                wave = [pending.popleft() for _ in range(min(self.concurrency, len(pending)))]
+                futures = [(item, attempt, executor.submit(func, item)) for item, attempt in wave]
+                throttled = []
+                for item, attempt, future in futures:
+                    try:
+                        outcomes.append((item, future.result(), None))
+                    except Exception as err:
+                        if is_throttled(err) and attempt < self.max_attempts:
+                            throttled.append((item, attempt + 1))
+                        else:
+                            outcomes.append((item, None, err))
+
+                if throttled:
+                    self.concurrency = max(1, self.concurrency // 2)
+                    backoff = min(self.backoff_cap, self.backoff_base * (2 ** throttled_waves))
+                    throttled_waves += 1
+                    self.logger.warning(f"{len(throttled)} requests throttled, retrying in {backoff:.3f} "
+                                        f"seconds with concurrency {self.concurrency}")
+                    pending.extendleft(reversed(throttled))
+                    sleep(backoff)
+                else:
+                    self.concurrency = min(self.max_concurrency, self.concurrency + 1)
+                    throttled_waves = 0
+        return outcomes
@@ -1,14 +1,30 @@
 from enum import Enum
 from http import HTTPStatus
 from logging import Logger
-from typing import Optional, Any
+from time import sleep
+from typing import Optional, Any, Tuple, Iterator, List
 
-from boto3.dynamodb.conditions import Key, Attr
+from boto3.dynamodb.conditions import Key, Attr, ConditionBase
 from botocore.exceptions import ClientError
 
 from shared.error_handling import HTTPException
 
 
+BATCH_GET_MAX_KEYS = 100
+BATCH_GET_MAX_ATTEMPTS = 5
+BATCH_GET_BACKOFF_BASE_SECONDS = 0.05
+THROTTLING_ERROR_CODES = (
+    'ProvisionedThroughputExceededException',
+    'ThrottlingException',
+    'RequestLimitExceeded'
+)
+# CancellationReasons codes of a TransactWriteItems that can succeed if the items are read again
+TRANSACTION_CONFLICT_CODES = (
+    'ConditionalCheckFailed',
+    'TransactionConflict'
+)
+
+
 class ConditionType(str, Enum):
     EQUALS = 'eq'
     LESS_THAN = 'lt'
@@ -54,6 +70,69 @@ class CrudService:
             raise HTTPException(status_code=HTTPStatus.BAD_REQUEST,
                                 msg="Oops. Something went wrong when trying to add the item to the DB.")
 
+    def batch_create(self, items: List[dict]) -> None:
+        """
+        Create/Save items in bulk with BatchWriteItem.
+        The batch writer sends the items in chunks of 25 and re-sends any unprocessed items.
+        Note: BatchWriteItem does not support condition expressions, only use it for new
+        items with unique keys.
+        :param items: Items to create
+        :return: None
+        """
+        try:
+            with self.table.batch_writer() as batch:
+                for item in items:
+                    batch.put_item(Item=item)
+        except ClientError as err:
+            self.logger.exception(
+                "Exception on BatchWrite operation for new items.",
+                extra={
+                    'ItemsCount': len(items),
+                    'Exception': err
+                }
+            )
+            raise HTTPException(status_code=HTTPStatus.BAD_REQUEST,
+                                msg="Oops. Something went wrong when trying to add the items to the DB.")
+
+    def transact_write(self, transact_items: List[dict]) -> None:
+        """
+        Writes several items atomically with TransactWriteItems: either every action is
+        applied or none is. Each item can only be the target of one action, and a
+        transaction has at most 100 actions.
+        :param transact_items: Actions without the TableName, i.e.
+                               [{'Put': {'Item': {...}, 'ConditionExpression': 'attribute_not_exists(SK)'}},
+                                {'Update': {'Key': {...}, 'UpdateExpression': '...', ...}}]
+        :return: None
+        """
+        try:
+            self.table.meta.client.transact_write_items(
+                TransactItems=[{action: {**payload, 'TableName': self.table.name}
+                                for action, payload in transact_item.items()}
+                               for transact_item in transact_items]
+            )
+        except ClientError as err:
+            reasons = [reason.get('Code') for reason in err.response.get('CancellationReasons', [])]
+            if any(reason in TRANSACTION_CONFLICT_CODES for reason in reasons):
+                self.logger.info("Transaction cancelled, a condition was not satisfied.",
+                                 extra={'CancellationReasons': reasons})
+                raise HTTPException(status_code=HTTPStatus.CONFLICT,
+                                    msg="The items changed while writing them, please try again.")
+            elif err.response['Error']['Code'] in THROTTLING_ERROR_CODES or 'ThrottlingError' in reasons:
+                self.logger.warning("Transaction throttled.",
+                                    extra={'ItemsCount': len(transact_items)})
+                raise HTTPException(status_code=HTTPStatus.TOO_MANY_REQUESTS,
+                                    msg="Too many requests, please try again later.")
+            else:
+                self.logger.exception(
+                    "Exception on TransactWrite operation.",
+                    extra={
+                        'ItemsCount': len(transact_items),
+                        'Exception': err
+                    }
+                )
+                raise HTTPException(status_code=HTTPStatus.BAD_REQUEST,
+                                    msg="Oops. Something went wrong when trying to write the items to the DB.")
+
     def update(self, item: dict) -> None:
         """
         Update an existing item.
@@ -126,6 +205,10 @@ class CrudService:
                 )
                 raise HTTPException(status_code=HTTPStatus.NOT_FOUND,
                                     msg='Item does not exists')
+            elif err.response['Error']['Code'] in THROTTLING_ERROR_CODES:
+                self.logger.warning(f"Update throttled. pk: {pk}, sk: {sk}")
+                raise HTTPException(status_code=HTTPStatus.TOO_MANY_REQUESTS,
+                                    msg="Too many requests, please try again later.")
             else:
                 self.logger.exception(
                     f"Could not update item {expression_attribute_values}",
@@ -134,18 +217,75 @@ class CrudService:
                 raise HTTPException(status_code=HTTPStatus.BAD_REQUEST,
                                     msg='Oops. Something went wrong when trying to update Item attributes.')
 
-    def get(self, pk: str, sk: str = '') -> Optional[dict]:
+    def upsert_item_attributes(self,
+                               pk: str,
+                               sk: str,
+                               update_expression: str,
+                               expression_attribute_names: dict,
+                               expression_attribute_values: dict,
+                               condition_expression: str = ''
+                               ) -> Optional[dict]:
+        """
+        Updates an item's attributes, creating the item if it does not exist.
+        Unlike `update_item_attributes`, a failed `condition_expression` is not an error,
+        it is reported by returning None so callers can implement conditional writes
+        (i.e. atomic counters with a lower bound).
+        :param pk: Primary key
+        :param sk: Sort Key
+        :param update_expression: DynamoDB update expression
+        :param expression_attribute_names: Attributes to update
+        :param expression_attribute_values: Attribute values
+        :param condition_expression: [Optional] DynamoDB condition expression
+        :return: Updated item or None if the condition was not satisfied
+        """
+        try:
+            update_payload = {
+                'Key': {'PK': pk, 'SK': sk},
+                'UpdateExpression': update_expression,
+                'ExpressionAttributeNames': expression_attribute_names,
+                'ExpressionAttributeValues': expression_attribute_values,
+                'ReturnValues': 'ALL_NEW'
+            }
+            if condition_expression:
+                update_payload['ConditionExpression'] = condition_expression
+
+            response = self.table.update_item(**update_payload)
+            return response.get('Attributes', None)
+        except ClientError as err:
+            if err.response['Error']['Code'] == 'ConditionalCheckFailedException':
+                self.logger.info(f"Condition not satisfied for item pk: {pk}, sk: {sk}")
+                return None
+
+            self.logger.exception(
+                f"Could not update item {expression_attribute_values}",
+                extra={'Exception': err}
+            )
+            raise HTTPException(status_code=HTTPStatus.BAD_REQUEST,
+                                msg='Oops. Something went wrong when trying to update Item attributes.')
+
+    def get(self,
+            pk: str,
+            sk: str = '',
+            consistent_read: bool = False,
+            fields: Optional[List[str]] = None
+            ) -> Optional[dict]:
         """
         Get item by Primary Key.
         :param pk: Primary key
         :param sk: [Optional] Sort Key
+        :param consistent_read: [Optional] Use a strongly consistent read
+        :param fields: [Optional] Only read these attributes (ProjectionExpression)
         :return: Item or None
         """
         try:
             key = {'PK': pk}
             if sk:
                 key['SK'] = sk
-            response = self.table.get_item(Key=key)
+            get_payload = {'Key': key}
+            if consistent_read:
+                get_payload['ConsistentRead'] = True
+            get_payload.update(self._get_projection_payload(fields=fields))
+            response = self.table.get_item(**get_payload)
             return response.get('Item', None)
         except ClientError as err:
             self.logger.exception(
@@ -155,6 +295,57 @@ class CrudService:
             raise HTTPException(status_code=HTTPStatus.BAD_REQUEST,
                                 msg="Item does not exists.")
 
+    def batch_get(self,
+                  keys: List[dict],
+                  consistent_read: bool = False,
+                  fields: Optional[List[str]] = None,
+                  max_attempts: int = BATCH_GET_MAX_ATTEMPTS
+                  ) -> List[dict]:
+        """
+        Get items in bulk with BatchGetItem, in chunks of 100 keys. Keys not processed by
+        DynamoDB (UnprocessedKeys, i.e. throttling) are requested again with exponential backoff.
+        :param keys: Primary keys, i.e. [{'PK': 'User#1', 'SK': 'Record#1'}]
+        :param consistent_read: [Optional] Use strongly consistent reads
+        :param fields: [Optional] Only read these attributes (ProjectionExpression), the key
+                       attributes should be included to match the items with the keys
+        :param max_attempts: [Optional] Number of requests per chunk before giving up
+        :return: Existing items, in no particular order
+        """
+        items = []
+        for start in range(0, len(keys), BATCH_GET_MAX_KEYS):
+            request = {'Keys': keys[start:start + BATCH_GET_MAX_KEYS]}
+            if consistent_read:
+                request['ConsistentRead'] = True
+            request.update(self._get_projection_payload(fields=fields))
+            items.extend(self._batch_get_chunk(request=request,
+                                               max_attempts=max_attempts))
+        return items
+
+    def _batch_get_chunk(self, request: dict, max_attempts: int) -> List[dict]:
+        items = []
+        request_items = {self.table.name: request}
+        for attempt in range(max_attempts):
+            if attempt:
+                sleep(BATCH_GET_BACKOFF_BASE_SECONDS * (2 ** attempt))
+            try:
+                response = self.table.meta.client.batch_get_item(RequestItems=request_items)
+            except ClientError as err:
+                self.logger.exception(
+                    "Exception on BatchGet operation.",
+                    extra={'KeysCount': len(request['Keys']), 'Exception': err}
+                )
+                raise HTTPException(status_code=HTTPStatus.BAD_REQUEST,
+                                    msg="Oops. Something went wrong when trying to get the items from the DB.")
+            items.extend(response.get('Responses', {}).get(self.table.name, []))
+            request_items = response.get('UnprocessedKeys')
+            if not request_items:
+                return items
+
+        self.logger.error("BatchGet keys still unprocessed after all the attempts.",
+                          extra={'Attempts': max_attempts})
+        raise HTTPException(status_code=HTTPStatus.SERVICE_UNAVAILABLE,
+                            msg="Too many requests, please try again later.")
+
     def delete(self, pk: str, sk: str) -> Optional[dict]:
         """
         Delete an item
@@ -174,6 +365,30 @@ class CrudService:
             raise HTTPException(status_code=HTTPStatus.BAD_REQUEST,
                                 msg="Item does not exists.")
 
+    def delete_if_exists(self, pk: str, sk: str) -> Optional[dict]:
+        """
+        Delete an item only if it exists. Can be used to atomically claim an item,
+        when several callers try to delete the same item only one of them gets it.
+        :param pk: Primary key
+        :param sk: Sort key
+        :return: Old item or None if the item did not exist
+        """
+        try:
+            response = self.table.delete_item(Key={'PK': pk, 'SK': sk},
+                                              ConditionExpression=Attr('PK').exists(),
+                                              ReturnValues='ALL_OLD')
+            return response.get('Attributes', None)
+        except ClientError as err:
+            if err.response['Error']['Code'] == 'ConditionalCheckFailedException':
+                self.logger.info(f"Item does not exist. PK: {pk}, SK: {sk}")
+                return None
+            self.logger.exception(
+                f"Could not delete item. PK: {pk}, SK: {sk}",
+                extra={'Exception': err}
+            )
+            raise HTTPException(status_code=HTTPStatus.BAD_REQUEST,
+                                msg="Item does not exists.")
+
     def list_items(self,
                    pk: str,
                    gsi1: bool = False,
@@ -183,10 +398,14 @@ class CrudService:
                    low_value: Any = None,
                    high_value: Any = None,
                    ascending: bool = False,
-                   limit: int = 9999
+                   limit: int = 9999,
+                   fields: Optional[List[str]] = None,
+                   filter_expression: Optional[ConditionBase] = None
                    ) -> Optional[list]:
         """
         Generic table query abstraction to list items.
+        Follows the LastEvaluatedKey continuation key so results are not truncated
+        by the DynamoDB 1 MB page limit.
         :param pk: Primary key
         :param gsi1: Query on GSI1 index
         :param gsi2: Query on GSI2 index
@@ -196,68 +415,296 @@ class CrudService:
         :param high_value: High value to use in Between condition type
         :param ascending: Controls the ScanIndexForward parameter
         :param limit: Limit the amount of records
+        :param fields: [Optional] Only read these attributes (ProjectionExpression)
+        :param filter_expression: [Optional] Condition on non-key attributes (FilterExpression)
         :return:
         """
-        try:
-            partition_key = 'PK'
-            sort_key = 'SK'
-            index_name = ''
-
-            if gsi1:
-                partition_key = 'GSI1PK'
-                sort_key = 'GSI1SK'
-                index_name = 'GSI1'
-            if gsi2:
-                partition_key = 'GSI2PK'
-                sort_key = 'GSI2SK'
-                index_name = 'GSI2'
-
-            if condition_type:
-                condition_expression = self._get_sort_key_condition_expression(sort_key=sort_key,
-                                                                               condition=condition_type,
-                                                                               condition_value=condition_value,
-                                                                               low_value=low_value,
-                                                                               high_value=high_value)
-                if index_name:
-                    response = self.table.query(
-                        IndexName=index_name,
-                        ScanIndexForward=ascending,
-                        Limit=limit,
-                        KeyConditionExpression=Key(partition_key).eq(pk) & condition_expression)
-                else:
-                    response = self.table.query(
-                        ScanIndexForward=ascending,
-                        Limit=limit,
-                        KeyConditionExpression=Key(partition_key).eq(pk) & condition_expression)
-
-                return response['Items']
-
-            if index_name:
-                response = self.table.query(IndexName=index_name,
-                                            ScanIndexForward=ascending,
-                                            Limit=limit,
-                                            KeyConditionExpression=Key(partition_key).eq(pk))
-            else:
-                response = self.table.query(ScanIndexForward=ascending,
-                                            Limit=limit,
-                                            KeyConditionExpression=Key(partition_key).eq(pk))
+        return list(self.iter_items(pk=pk,
+                                    gsi1=gsi1,
+                                    gsi2=gsi2,
+                                    condition_type=condition_type,
+                                    condition_value=condition_value,
+                                    low_value=low_value,
+                                    high_value=high_value,
+                                    ascending=ascending,
+                                    max_items=limit,
+                                    fields=fields,
+                                    filter_expression=filter_expression))
 
-            return response['Items']
+    def iter_items(self,
+                   pk: str,
+                   gsi1: bool = False,
+                   gsi2: bool = False,
+                   condition_type: ConditionType = '',
+                   condition_value: Any = None,
+                   low_value: Any = None,
+                   high_value: Any = None,
+                   ascending: bool = False,
+                   max_items: Optional[int] = None,
+                   page_size: Optional[int] = None,
+                   exclusive_start_key: Optional[dict] = None,
+                   fields: Optional[List[str]] = None,
+                   filter_expression: Optional[ConditionBase] = None
+                   ) -> 'QueryIterator':
+        """
+        Lazily iterate over the items of a query, reading one DynamoDB page at a time.
+        The returned QueryIterator can be consumed item by item (`for item in ...`) or page
+        by page (`.pages()`), and exposes the page_count, count and scanned_count read so far.
+        :param pk: Primary key
+        :param gsi1: Query on GSI1 index
+        :param gsi2: Query on GSI2 index
+        :param condition_type: Sort key condition to satisfy values
+        :param condition_value: Condition value
+        :param low_value: Low value to use in Between condition type
+        :param high_value: High value to use in Between condition type
+        :param ascending: Controls the ScanIndexForward parameter
+        :param max_items: [Optional] Item budget, stop after reading this many items
+        :param page_size: [Optional] Items per DynamoDB request (defaults to the item budget)
+        :param exclusive_start_key: [Optional] LastEvaluatedKey to resume from
+        :param fields: [Optional] Only read these attributes (ProjectionExpression)
+        :param filter_expression: [Optional] Condition on non-key attributes (FilterExpression),
+                                  the item budget counts the items that satisfy it
+        :return: QueryIterator
+        """
+        query_payload = self._get_query_payload(pk=pk,
+                                                gsi1=gsi1,
+                                                gsi2=gsi2,
+                                                condition_type=condition_type,
+                                                condition_value=condition_value,
+                                                low_value=low_value,
+                                                high_value=high_value,
+                                                ascending=ascending,
+                                                limit=page_size or max_items,
+                                                fields=fields,
+                                                filter_expression=filter_expression)
+        return QueryIterator(crud_service=self,
+                             query_payload=query_payload,
+                             max_items=max_items,
+                             exclusive_start_key=exclusive_start_key)
+
+    def query_pages(self, pk: str, **kwargs) -> Iterator[list]:
+        """
+        Lazily iterate over the pages of a query, see `iter_items` for the parameters.
+        :param pk: Primary key
+        :return: Generator of item lists, one per DynamoDB page
+        """
+        return self.iter_items(pk=pk, **kwargs).pages()
+
+    def list_items_page(self,
+                        pk: str,
+                        gsi1: bool = False,
+                        gsi2: bool = False,
+                        condition_type: ConditionType = '',
+                        condition_value: Any = None,
+                        low_value: Any = None,
+                        high_value: Any = None,
+                        ascending: bool = False,
+                        limit: int = 10,
+                        exclusive_start_key: Optional[dict] = None,
+                        fields: Optional[List[str]] = None,
+                        filter_expression: Optional[ConditionBase] = None
+                        ) -> Tuple[list, Optional[dict]]:
+        """
+        Query a single page of items (keyset pagination).
+        Only `limit` items are read from DynamoDB, and the query resumes right after the
+        `exclusive_start_key` returned by the previous page.
+        :param pk: Primary key
+        :param gsi1: Query on GSI1 index
+        :param gsi2: Query on GSI2 index
+        :param condition_type: Sort key condition to satisfy values
+        :param condition_value: Condition value
+        :param low_value: Low value to use in Between condition type
+        :param high_value: High value to use in Between condition type
+        :param ascending: Controls the ScanIndexForward parameter
+        :param limit: Page size
+        :param exclusive_start_key: LastEvaluatedKey of the previous page
+        :param fields: [Optional] Only read these attributes (ProjectionExpression)
+        :param filter_expression: [Optional] Condition on non-key attributes (FilterExpression),
+                                  applied after the `limit` items are read
+        :return: Tuple with the page items and the LastEvaluatedKey (None if there are no more items)
+        """
+        query_payload = self._get_query_payload(pk=pk,
+                                                gsi1=gsi1,
+                                                gsi2=gsi2,
+                                                condition_type=condition_type,
+                                                condition_value=condition_value,
+                                                low_value=low_value,
+                                                high_value=high_value,
+                                                ascending=ascending,
+                                                limit=limit,
+                                                fields=fields,
+                                                filter_expression=filter_expression)
+        if exclusive_start_key:
+            query_payload['ExclusiveStartKey'] = exclusive_start_key
+
+        response = self._query(query_payload=query_payload)
+        return response['Items'], response.get('LastEvaluatedKey', None)
+
+    def count_items(self,
+                    pk: str,
+                    gsi1: bool = False,
+                    gsi2: bool = False,
+                    condition_type: ConditionType = '',
+                    condition_value: Any = None,
+                    low_value: Any = None,
+                    high_value: Any = None,
+                    filter_expression: Optional[ConditionBase] = None
+                    ) -> int:
+        """
+        Count the items of a query without reading their attributes (Select=COUNT).
+        :param pk: Primary key
+        :param gsi1: Query on GSI1 index
+        :param gsi2: Query on GSI2 index
+        :param condition_type: Sort key condition to satisfy values
+        :param condition_value: Condition value
+        :param low_value: Low value to use in Between condition type
+        :param high_value: High value to use in Between condition type
+        :param filter_expression: [Optional] Only count the items that satisfy this condition
+        :return: Number of items
+        """
+        query_payload = self._get_query_payload(pk=pk,
+                                                gsi1=gsi1,
+                                                gsi2=gsi2,
+                                                condition_type=condition_type,
+                                                condition_value=condition_value,
+                                                low_value=low_value,
+                                                high_value=high_value,
+                                                ascending=True,
+                                                limit=None,
+                                                filter_expression=filter_expression)
+        query_payload['Select'] = 'COUNT'
+        count = 0
+        while True:
+            response = self._query(query_payload=query_payload)
+            count += response.get('Count', 0)
+            last_evaluated_key = response.get('LastEvaluatedKey', None)
+            if not last_evaluated_key:
+                return count
+            query_payload['ExclusiveStartKey'] = last_evaluated_key
 
+    def scan_page(self,
+                  segment: int = 0,
+                  total_segments: int = 1,
+                  limit: Optional[int] = None,
+                  exclusive_start_key: Optional[dict] = None,
+                  fields: Optional[List[str]] = None,
+                  filter_expression: Optional[ConditionBase] = None
+                  ) -> Tuple[list, Optional[dict]]:
+        """
+        Scan a single page of a segment of the table (parallel scan). Only meant for
+        maintenance jobs (backfills), the API always queries a partition.
+        Reference: https://docs.aws.amazon.com/amazondynamodb/latest/developerguide/Scan.html#Scan.ParallelScan
+        :param segment: [Optional] Segment to scan, from 0 to total_segments - 1
+        :param total_segments: [Optional] Number of segments the table is split into
+        :param limit: [Optional] Items to evaluate
+        :param exclusive_start_key: [Optional] LastEvaluatedKey of the previous page of the segment
+        :param fields: [Optional] Only read these attributes (ProjectionExpression)
+        :param filter_expression: [Optional] Condition on the attributes (FilterExpression)
+        :return: Tuple with the page items and the LastEvaluatedKey (None if the segment is finished)
+        """
+        scan_payload = {'Segment': segment, 'TotalSegments': total_segments}
+        if limit:
+            scan_payload['Limit'] = limit
+        if exclusive_start_key:
+            scan_payload['ExclusiveStartKey'] = exclusive_start_key
+        if filter_expression is not None:
+            scan_payload['FilterExpression'] = filter_expression
+        scan_payload.update(self._get_projection_payload(fields=fields))
+        try:
+            response = self.table.scan(**scan_payload)
+        except ClientError as err:
+            self.logger.exception(
+                f"Could not scan segment {segment} of {total_segments}",
+                extra={'Exception': err})
+            raise HTTPException(status_code=HTTPStatus.BAD_REQUEST,
+                                msg="Oops. Something went wrong when trying to scan items.")
+        return response['Items'], response.get('LastEvaluatedKey', None)
+
+    def _query(self, query_payload: dict) -> dict:
+        """
+        Send a single query request to DynamoDB.
+        :param query_payload: table.query payload
+        :return: query response
+        """
+        try:
+            return self.table.query(**query_payload)
         except ClientError as err:
-            query_input_values = {
-                'pk': pk,
-                'condition': condition_type,
-                'condition_value': condition_value,
-                'low_value': low_value,
-                'high_value': high_value
-            }
             self.logger.exception(
-                f"Could not process query with input values: {query_input_values}",
+                f"Could not process query with input values: {query_payload}",
                 extra={'Exceptions': err})
             raise HTTPException(status_code=HTTPStatus.BAD_REQUEST,
                                 msg="Oops. Something went wrong when trying to list items.")
 
+    def _get_query_payload(self,
+                           pk: str,
+                           gsi1: bool,
+                           gsi2: bool,
+                           condition_type: ConditionType,
+                           condition_value: Any,
+                           low_value: Any,
+                           high_value: Any,
+                           ascending: bool,
+                           limit: Optional[int],
+                           fields: Optional[List[str]] = None,
+                           filter_expression: Optional[ConditionBase] = None
+                           ) -> dict:
+        """
+        Builds the table.query keyword arguments shared by the list methods.
+        Filter conditions are composed with the boto3 condition operators,
+        i.e. `Attr('deleted').eq(False) & Attr('amount').gte(5)`. DynamoDB applies them after
+        reading the items, so they reduce the data returned but not the capacity consumed.
+        :return: table.query payload
+        """
+        partition_key = 'PK'
+        sort_key = 'SK'
+        index_name = ''
+
+        if gsi1:
+            partition_key = 'GSI1PK'
+            sort_key = 'GSI1SK'
+            index_name = 'GSI1'
+        if gsi2:
+            partition_key = 'GSI2PK'
+            sort_key = 'GSI2SK'
+            index_name = 'GSI2'
+
+        key_condition_expression = Key(partition_key).eq(pk)
+        if condition_type:
+            condition_expression = self._get_sort_key_condition_expression(sort_key=sort_key,
+                                                                           condition=condition_type,
+                                                                           condition_value=condition_value,
+                                                                           low_value=low_value,
+                                                                           high_value=high_value)
+            key_condition_expression = key_condition_expression & condition_expression
+
+        query_payload = {
+            'ScanIndexForward': ascending,
+            'KeyConditionExpression': key_condition_expression
+        }
+        if limit:
+            query_payload['Limit'] = limit
+        if index_name:
+            query_payload['IndexName'] = index_name
+        if filter_expression is not None:
+            query_payload['FilterExpression'] = filter_expression
+        query_payload.update(self._get_projection_payload(fields=fields))
+        return query_payload
+
+    def _get_projection_payload(self, fields: Optional[List[str]]) -> dict:
+        """
+        Builds the ProjectionExpression to only read some attributes. Attribute names are
+        always passed as placeholders because some of them (i.e. date) are reserved words.
+        :param fields: Attribute names, all the attributes are read if empty
+        :return: ProjectionExpression and ExpressionAttributeNames payload
+        """
+        if not fields:
+            return {}
+        attribute_names = {f'#field{index}': field for index, field in enumerate(fields)}
+        return {
+            'ProjectionExpression': ', '.join(attribute_names.keys()),
+            'ExpressionAttributeNames': attribute_names
+        }
+
     def _get_sort_key_condition_expression(self,
                                            sort_key: str,
                                            condition: ConditionType,
@@ -277,3 +724,69 @@ class CrudService:
             ConditionType.BETWEEN: Key(sort_key).between(low_value, high_value)
         }
         return condition_map.get(condition)
+
+
+class QueryIterator:
+    """
+    Iterates over the items of a DynamoDB query following the LastEvaluatedKey
+    continuation key page by page, so only one page is held in memory at a time.
+    Reference: https://docs.aws.amazon.com/amazondynamodb/latest/developerguide/Query.Pagination.html
+
+    Attribute definitions (updated as pages are read):
+    - page_count: Number of query requests sent to DynamoDB
+    - count: Number of items returned
+    - scanned_count: Number of items evaluated by DynamoDB (before any filter)
+    - last_evaluated_key: Key to resume from, None once the query is exhausted
+    """
+
+    def __init__(self,
+                 crud_service: CrudService,
+                 query_payload: dict,
+                 max_items: Optional[int] = None,
+                 exclusive_start_key: Optional[dict] = None
+                 ) -> None:
+        self.crud_service = crud_service
+        self.query_payload = query_payload
+        self.max_items = max_items
+        self.page_count = 0
+        self.count = 0
+        self.scanned_count = 0
+        self.last_evaluated_key = exclusive_start_key
+        self._exhausted = False
+
+    def __iter__(self) -> Iterator[dict]:
+        for page in self.pages():
+            yield from page
+
+    def pages(self) -> Iterator[list]:
+        """
+        Generator of item lists, one per DynamoDB page.
+        The iterator is single-use, once the query has been fully read it yields nothing.
+        """
+        if self._exhausted:
+            return
+
+        remaining = None if self.max_items is None else self.max_items - self.count
+        while remaining is None or remaining > 0:
+            query_payload = dict(self.query_payload)
+            if remaining is not None:
+                query_payload['Limit'] = min(query_payload.get('Limit', remaining), remaining)
+            if self.last_evaluated_key:
+                query_payload['ExclusiveStartKey'] = self.last_evaluated_key
+
+            response = self.crud_service._query(query_payload=query_payload)
+            items = response['Items']
+            if remaining is not None:
+                items = items[:remaining]
+                remaining -= len(items)
+
+            self.page_count += 1
+            self.count += len(items)
+            self.scanned_count += response.get('ScannedCount', len(items))
+            self.last_evaluated_key = response.get('LastEvaluatedKey', None)
+            if not self.last_evaluated_key or remaining == 0:
+                self._exhausted = True
+            yield items
+
+            if self._exhausted:
+                break
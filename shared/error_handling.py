@@ -2,7 +2,7 @@ import functools
 from http import HTTPStatus
 from typing import Any, Callable, Union
 
-from shared.api_utils import HTTPResponse
+from shared.api_utils import HTTPResponse, get_request_header
 
 """
 Helper functions/classes for errors and exception handling
@@ -26,17 +26,27 @@ def exception_handler(func: Callable) -> Callable:
     """
     Decorator to serialize responses, errors and exceptions to
     an HTTPResponse object that AWS API Gateway can understand.
+    Successful GET responses carry a strong ETag and are answered with 304 Not Modified
+    when it matches the If-None-Match request header. Large responses are compressed by
+    API Gateway (minimumCompressionSize).
     :param func: function to decorate
     :return: function wrapper
     """
 
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
+        event = kwargs.get('event', args[0] if args else None)
         try:
             value: HTTPResponse = func(*args, **kwargs)
-            return value.to_dict()
         except HTTPException as e:
-            return HTTPResponse(status_code=e.status_code,
-                                body=e.msg).to_dict()
+            value = HTTPResponse(status_code=e.status_code,
+                                 body=e.msg)
+
+        if isinstance(event, dict) and event.get('httpMethod') == 'GET' and value.status_code == HTTPStatus.OK:
+            value.set_etag()
+            if value.is_not_modified(if_none_match=get_request_header(event=event,
+                                                                      name='If-None-Match')):
+                value.set_not_modified()
+        return value.to_dict()
 
     return wrapper
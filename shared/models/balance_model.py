@@ -0,0 +1,25 @@
+from shared.models.base import Base
+
+
+class BalanceBase(Base):
+    """
+    Materialized user balance. It is kept current by the workers with an atomic
+    conditional update every time an operation cost is deducted, so the current
+    balance can be read with a single GetItem instead of querying the Records.
+
+    Attribute definitions:
+    - user_id: ID of the user
+    - user_balance: Current balance
+    - last_record_id: ID of the last Record whose cost was deducted
+    """
+    entity: str = "BALANCE"
+    user_id: str
+    user_balance: int
+    last_record_id: str = ''
+
+
+class BalanceOUT(BalanceBase):
+    """
+    Represents a Balance view object coming from DynamoDB.
+    """
+    pass
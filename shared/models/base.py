@@ -1,12 +1,20 @@
+from decimal import Decimal
+from enum import Enum
+from typing import Any, Callable, Dict, Iterable, List, Optional, Union, get_args, get_origin
+
 from pydantic import BaseModel
 
 from shared.json_utils import dict_to_json_string
 
+_db_converters_cache: Dict[type, Dict[str, Callable[[Any], Any]]] = {}
+
 
 class Base(BaseModel):
     """
     Base model to add common shared additional functionality
     """
+    # Field parsed from the SK (Entity#uuid) by from_db_items, set by the view models
+    _db_id_field = ''
 
     def to_string(self):
         """
@@ -14,3 +22,77 @@ class Base(BaseModel):
         :return: Json string
         """
         return dict_to_json_string(self.dict())
+
+    @classmethod
+    def from_db_items(cls, items: Iterable[dict], fields: Optional[List[str]] = None) -> List[dict]:
+        """
+        Bulk conversion of trusted DynamoDB items (written by this service) into plain dicts.
+        Equivalent to `[cls(**item).dict() for item in items]` without running the pydantic
+        validation: the key attributes are stripped, the id is parsed from the SK and each
+        field is only coerced to its declared type (i.e. DynamoDB Decimals to int).
+        The items are not modified.
+        :param items: DynamoDB items
+        :param fields: [Optional] Only include these fields (i.e. items read with a projection)
+        :return: list of dicts with the model fields, in declaration order
+        """
+        converters = _get_db_converters(cls)
+        if fields:
+            converters = {name: convert for name, convert in converters.items() if name in fields}
+        id_field = cls._db_id_field
+        results = []
+        for item in items:
+            result = {}
+            for name, convert in converters.items():
+                if name == id_field:
+                    result[name] = item['SK'].split('#')[1]
+                else:
+                    result[name] = convert(item[name]) if name in item else cls.__fields__[name].default
+            results.append(result)
+        return results
+
+    @classmethod
+    def get_db_attributes(cls, fields: List[str]) -> List[str]:
+        """
+        DynamoDB attributes to read to build the given fields (the id is parsed from the SK).
+        :param fields: model fields
+        :return: DynamoDB attribute names
+        """
+        return ['SK' if field == cls._db_id_field else field for field in fields]
+
+
+def _get_db_converters(model: type) -> Dict[str, Callable[[Any], Any]]:
+    """
+    Get the function that coerces each field of a model, the same way pydantic does
+    for the values stored on DynamoDB.
+    :param model: pydantic model class
+    :return: field converters by field name, in declaration order
+    """
+    if model not in _db_converters_cache:
+        _db_converters_cache[model] = {name: _get_db_converter(field.outer_type_)
+                                       for name, field in model.__fields__.items()}
+    return _db_converters_cache[model]
+
+
+def _get_db_converter(field_type: Any) -> Callable[[Any], Any]:
+    if get_origin(field_type) is Union:
+        # pydantic tries the Union types in order, the first one accepting the value wins
+        field_type = get_args(field_type)[0]
+    if field_type is str:
+        return _to_str
+    if isinstance(field_type, type) and issubclass(field_type, Enum):
+        return field_type
+    if field_type in (int, bool):
+        return field_type
+    return _identity
+
+
+def _to_str(value: Any) -> Any:
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (int, float, Decimal)):
+        return str(value)
+    return value
+
+
+def _identity(value: Any) -> Any:
+    return value
@@ -48,6 +48,7 @@ class OperationOUT(OperationBase):
     Represents an Operation view object coming from DynamoDB.
     """
     operation_id: str
+    _db_id_field = 'operation_id'
 
     def __init__(self, **data):
         mapped_fields = map_from_dynamodb_format(data)
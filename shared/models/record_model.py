@@ -6,6 +6,10 @@ from shared.models.base import Base
 from shared.date_utils import get_js_utc_now
 
 DEFAULT_INITIAL_USER_BALANCE = int(os.environ.get('DEFAULT_INITIAL_USER_BALANCE', 30))
+# Balances are zero padded on the GSI2 sort key so they sort as numbers (Record#...09 < Record#...10).
+# 16 digits fit any integer a JavaScript client can represent exactly (Number.MAX_SAFE_INTEGER).
+BALANCE_SORT_KEY_DIGITS = 16
+BALANCE_SORT_KEY_MAX = 10 ** BALANCE_SORT_KEY_DIGITS - 1
 
 
 class RecordBase(Base):
@@ -58,6 +62,7 @@ class RecordOUT(RecordBase):
     """
     Represents a Record view object coming from DynamoDB.
     """
+    _db_id_field = 'record_id'
 
     def __init__(self, **data):
         mapped_fields = map_from_dynamodb_format(data)
@@ -82,11 +87,24 @@ def map_to_dynamodb_format(data: dict) -> dict:
     data['GSI1PK'] = f'User#{user_uuid}'
     data['GSI1SK'] = f'Record#{date}'
     data['GSI2PK'] = f'User#{user_uuid}'
-    data['GSI2SK'] = f'Record#{user_balance}'
+    data['GSI2SK'] = get_balance_sort_key(user_balance)
 
     return data
 
 
+def get_balance_sort_key(user_balance: int) -> str:
+    """
+    Order-preserving encoding of a balance for the GSI2 sort key, i.e. 5 -> 'Record#0000000000000005'.
+    Used both to write Records and to build the balance range key conditions.
+    :param user_balance: the user balance, from 0 to BALANCE_SORT_KEY_MAX
+    :return: GSI2 sort key
+    """
+    user_balance = int(user_balance)
+    if not 0 <= user_balance <= BALANCE_SORT_KEY_MAX:
+        raise ValueError(f"Balance {user_balance} can't be encoded in {BALANCE_SORT_KEY_DIGITS} digits")
+    return f'Record#{user_balance:0{BALANCE_SORT_KEY_DIGITS}d}'
+
+
 def zero_negative_balance(user_balance):
     """
     Check if user balance is negative and set it to zero if it is.
@@ -0,0 +1,35 @@
+from typing import Optional
+
+from shared.models.base import Base
+
+
+class RollupBase(Base):
+    """
+    Usage of the user in a time bucket (hour, day or month, in UTC). Every Record is
+    added to the buckets it falls in by the transaction that saves it, so date range
+    summaries read one item per bucket instead of every Record.
+
+    Attribute definitions:
+    - user_id: ID of the user
+    - granularity: hour, day or month
+    - bucket: Bucket start, i.e. 2023-03-07T14 (hour), 2023-03-07 (day), 2023-03 (month)
+    - operation_count: Number of operations performed in the bucket
+    - credit_spent: Sum of the operation costs in the bucket
+    - ending_balance: Balance after the last operation of the bucket
+    - last_operation_date: Date of the last operation of the bucket (in epoch format)
+    """
+    entity: str = "ROLLUP"
+    user_id: str
+    granularity: str
+    bucket: str
+    operation_count: int = 0
+    credit_spent: int = 0
+    ending_balance: Optional[int] = None
+    last_operation_date: Optional[int] = None
+
+
+class RollupOUT(RollupBase):
+    """
+    Represents a Rollup view object coming from DynamoDB.
+    """
+    pass
@@ -0,0 +1,75 @@
+from typing import Dict, Optional
+
+from shared.models.base import Base
+from shared.models.operation_model import OperationType
+
+# Per operation type counters are stored as top-level attributes (i.e. operation_count_ADDITION),
+# `ADD` can create them on the first update, nested map paths must exist beforehand.
+OPERATION_COUNT_PREFIX = 'operation_count_'
+CREDIT_SPENT_PREFIX = 'credit_spent_'
+
+
+class OperationTypeStats(Base):
+    """
+    Usage of a single operation type.
+
+    Attribute definitions:
+    - operation_count: Number of operations performed
+    - credit_spent: Sum of the operation costs
+    """
+    operation_count: int = 0
+    credit_spent: int = 0
+
+
+class UserStatsBase(Base):
+    """
+    Aggregated usage of the user. It is updated in the same transaction as the Records
+    (atomic `ADD` counters), so the stats are read with a single GetItem
+    whatever the length of the Record history.
+
+    Attribute definitions:
+    - user_id: ID of the user
+    - operation_count: Number of operations performed
+    - credit_spent: Sum of the operation costs
+    - operations: operation_count and credit_spent by operation type
+    - first_operation_date: Date of the first operation (in epoch format)
+    - last_operation_date: Date of the last operation (in epoch format)
+    - min_balance: Lowest balance after an operation
+    - max_balance: Highest balance after an operation
+    """
+    entity: str = "USER_STATS"
+    user_id: str
+    operation_count: int = 0
+    credit_spent: int = 0
+    operations: Dict[str, OperationTypeStats] = {}
+    first_operation_date: Optional[int] = None
+    last_operation_date: Optional[int] = None
+    min_balance: Optional[int] = None
+    max_balance: Optional[int] = None
+
+
+class UserStatsOUT(UserStatsBase):
+    """
+    Represents a User Stats view object coming from DynamoDB.
+    """
+
+    def __init__(self, **data):
+        mapped_fields = map_from_dynamodb_format(data)
+        super(UserStatsOUT, self).__init__(**mapped_fields)
+
+
+def map_from_dynamodb_format(data: dict) -> dict:
+    """
+    Group the per operation type counters into the operations field,
+    every operation type is included (zero if not performed).
+    :param data:
+    :return: mapped fields
+    """
+    data['operations'] = {
+        operation_type.value: {
+            'operation_count': data.pop(f'{OPERATION_COUNT_PREFIX}{operation_type.value}', 0),
+            'credit_spent': data.pop(f'{CREDIT_SPENT_PREFIX}{operation_type.value}', 0)
+        }
+        for operation_type in OperationType
+    }
+    return data
@@ -0,0 +1,138 @@
+"""
+In-process cache of the Operation catalog.
+The catalog is a handful of rows that almost never change, so it is loaded once per
+Lambda container and served from memory instead of querying DynamoDB on every request.
+"""
+import os
+import time
+from http import HTTPStatus
+from logging import Logger
+from typing import Dict, List
+
+from shared.crud_service import CrudService, ConditionType
+from shared.date_utils import get_js_utc_now
+from shared.error_handling import HTTPException
+from shared.models.operation_model import OperationOUT, OperationType
+
+OPERATION_CATALOG_TTL_SECONDS = int(os.environ.get('OPERATION_CATALOG_TTL_SECONDS', 300))
+CATALOG_VERSION_SK = 'CatalogVersion'
+
+
+class OperationCatalog:
+    """
+    Serves Operation lookups by OperationType from memory.
+
+    The catalog is refreshed when the TTL expires: an expired catalog first checks the
+    version stamp item (PK=Operation, SK=CatalogVersion) with a single GetItem and is only
+    reloaded when the version changed. The stamp is created if it is missing (catalogs
+    created before it existed). Unknown operation types are not looked up again until the
+    TTL expires.
+
+    Attribute definitions:
+    - hits: Lookups served from memory
+    - misses: Lookups that required loading the catalog from DynamoDB
+    - loads: Number of times the catalog was loaded from DynamoDB
+    """
+
+    def __init__(self,
+                 logger: Logger,
+                 crud_service: CrudService,
+                 ttl_seconds: int = OPERATION_CATALOG_TTL_SECONDS
+                 ) -> None:
+        self.logger = logger
+        self.crud_service = crud_service
+        self.ttl_seconds = ttl_seconds
+        self.version = None
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+        self._operations: Dict[OperationType, dict] = {}
+        self._expires_at = 0.0
+
+    def get_operation(self, operation_type: OperationType) -> OperationOUT:
+        """
+        Get an Operation by type
+        :param operation_type: The type of operation
+        :return: Operation details
+        """
+        if self._is_expired():
+            self.misses += 1
+            self._refresh()
+        else:
+            self.hits += 1
+
+        operation_db = self._operations.get(operation_type)
+        if not operation_db:
+            self.logger.error(f"Operation type does not exist {operation_type}")
+            raise HTTPException(status_code=HTTPStatus.BAD_REQUEST,
+                                msg="Invalid operation type.")
+        return OperationOUT(**operation_db)
+
+    def list_operations(self) -> List[OperationOUT]:
+        """
+        List all Operations in the catalog
+        :return: Operations
+        """
+        if self._is_expired():
+            self.misses += 1
+            self._refresh()
+        else:
+            self.hits += 1
+        return [OperationOUT(**operation_db) for operation_db in self._operations.values()]
+
+    def invalidate(self) -> None:
+        """
+        Force the catalog to be reloaded on the next lookup.
+        """
+        self._expires_at = 0.0
+        self.version = None
+
+    def stats(self) -> dict:
+        return {'hits': self.hits, 'misses': self.misses, 'loads': self.loads, 'version': self.version}
+
+    def _is_expired(self) -> bool:
+        return time.monotonic() >= self._expires_at
+
+    def _refresh(self) -> None:
+        """
+        Reload the catalog, unless the version stamp shows it did not change.
+        """
+        version = self._get_version()
+        if self._operations and version == self.version:
+            self.logger.info("Operation catalog version unchanged.", extra={'Version': version})
+            self._expires_at = time.monotonic() + self.ttl_seconds
+            return
+
+        self.logger.info("Loading Operation catalog.", extra={'Version': version})
+        operations_db = self.crud_service.list_items(pk='Operation',
+                                                     condition_type=ConditionType.BEGINS_WITH,
+                                                     condition_value='Operation#')
+        self._operations = {operation_db['type']: operation_db for operation_db in operations_db}
+        self.version = version
+        self.loads += 1
+        self._expires_at = time.monotonic() + self.ttl_seconds
+
+    def _get_version(self) -> str:
+        version_db = self.crud_service.get(pk='Operation',
+                                           sk=CATALOG_VERSION_SK)
+        if not version_db:
+            self.logger.info("Creating Operation catalog version stamp.")
+            version_db = set_catalog_version(crud_service=self.crud_service,
+                                             if_missing=True)
+        return str(version_db['version'])
+
+
+def set_catalog_version(crud_service: CrudService, if_missing: bool = False) -> dict:
+    """
+    Stamps the Operation catalog with a new version, so the cached catalogs are reloaded.
+    :param crud_service: Crud Service
+    :param if_missing: [Optional] Keep the current version if there is one (safe when
+                       several containers create the stamp at the same time)
+    :return: Version stamp item
+    """
+    version = 'if_not_exists(#version, :version)' if if_missing else ':version'
+    return crud_service.upsert_item_attributes(pk='Operation',
+                                               sk=CATALOG_VERSION_SK,
+                                               update_expression=f'SET #version = {version}',
+                                               expression_attribute_names={'#version': 'version'},
+                                               expression_attribute_values={':version': get_js_utc_now()})
@@ -1,8 +1,12 @@
+import base64
+import binascii
 import math
 from http import HTTPStatus
 from logging import Logger
+from typing import Optional
 
 from shared.error_handling import HTTPException
+from shared.json_utils import dict_to_json_string, json_string_to_dict
 
 
 class Paginator:
@@ -60,3 +64,74 @@ class Paginator:
             self.logger.error(f"per_page parameter must be at least 1 {per_page}")
             raise HTTPException(status_code=HTTPStatus.BAD_REQUEST,
                                 msg="per_page parameter must be at least 1")
+
+
+class CursorPaginator:
+    """
+    Keyset pagination based on the DynamoDB LastEvaluatedKey.
+    The key is handed to the client as an opaque url-safe `cursor` string, so each page
+    only reads `per_page` items from the table instead of the whole query result.
+    """
+
+    def __init__(self,
+                 logger: Logger,
+                 cursor: str,
+                 per_page: str
+                 ) -> None:
+        self.logger = logger
+        self._validate_parameters(per_page)
+        self.cursor = cursor
+        self.per_page = int(per_page)
+        self.exclusive_start_key = self.decode_cursor(cursor) if cursor else None
+        self.next_cursor = None
+
+    def set_next_cursor(self, last_evaluated_key: Optional[dict]) -> None:
+        """
+        Set the cursor of the next page from the LastEvaluatedKey returned by the query.
+        :param last_evaluated_key: The LastEvaluatedKey returned by the query (None on the last page)
+        """
+        self.next_cursor = self.encode_cursor(last_evaluated_key) if last_evaluated_key else None
+
+    def encode_cursor(self, last_evaluated_key: dict) -> str:
+        """
+        Encode a LastEvaluatedKey as an opaque cursor
+        :param last_evaluated_key: DynamoDB LastEvaluatedKey
+        :return: cursor
+        """
+        key_json = dict_to_json_string(last_evaluated_key)
+        return base64.urlsafe_b64encode(key_json.encode('utf-8')).decode('utf-8')
+
+    def decode_cursor(self, cursor: str) -> dict:
+        """
+        Decode a cursor back to a DynamoDB ExclusiveStartKey
+        :param cursor: cursor returned on a previous page
+        :return: ExclusiveStartKey
+        """
+        try:
+            key_json = base64.urlsafe_b64decode(cursor.encode('utf-8')).decode('utf-8')
+            exclusive_start_key = json_string_to_dict(key_json)
+        except (binascii.Error, UnicodeDecodeError, ValueError):
+            self.logger.error(f"Invalid cursor {cursor}")
+            raise HTTPException(status_code=HTTPStatus.BAD_REQUEST,
+                                msg="cursor parameter is not valid")
+
+        if not isinstance(exclusive_start_key, dict):
+            self.logger.error(f"Invalid cursor {cursor}")
+            raise HTTPException(status_code=HTTPStatus.BAD_REQUEST,
+                                msg="cursor parameter is not valid")
+        return exclusive_start_key
+
+    def _validate_parameters(self, per_page: str) -> None:
+        """
+        Validate the per_page attribute
+        """
+        self.logger.info("Validating cursor pagination parameters.")
+        if not per_page.isnumeric():
+            self.logger.error(f"per_page is not numeric{per_page}")
+            raise HTTPException(status_code=HTTPStatus.BAD_REQUEST,
+                                msg="per_page parameter must be an integer")
+
+        if int(per_page) <= 0:
+            self.logger.error(f"per_page parameter must be at least 1 {per_page}")
+            raise HTTPException(status_code=HTTPStatus.BAD_REQUEST,
+                                msg="per_page parameter must be at least 1")
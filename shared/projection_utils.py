@@ -0,0 +1,30 @@
+"""
+Common helper/utility functions used for selecting the fields returned by the API
+"""
+from http import HTTPStatus
+from logging import Logger
+from typing import List, Optional, Type
+
+from shared.error_handling import HTTPException
+from shared.models.base import Base
+
+
+def get_requested_fields(logger: Logger, fields: Optional[str], model: Type[Base]) -> Optional[List[str]]:
+    """
+    Parses and validates the `fields` query parameter, a comma separated list of fields
+    of the response model (i.e. fields=record_id,operation_response,date).
+    :param logger: logger
+    :param fields: fields query parameter
+    :param model: Response model
+    :return: List of fields, or None to return every field
+    """
+    if not fields:
+        return None
+
+    requested_fields = list(dict.fromkeys(field.strip() for field in fields.split(',') if field.strip()))
+    invalid_fields = [field for field in requested_fields if field not in model.__fields__]
+    if not requested_fields or invalid_fields:
+        logger.error(f"Fields are not valid: {invalid_fields}")
+        raise HTTPException(status_code=HTTPStatus.BAD_REQUEST,
+                            msg="fields parameter is not valid")
+    return requested_fields
@@ -0,0 +1,176 @@
+"""
+Random string pool shared by all the Lambda containers.
+Random strings are stored in a DynamoDB partition (PK=RandomPool#<spec>, SK=String#<value>)
+that is refilled in bulk, so workers claim a pre-generated string with a single conditional
+delete instead of calling random.org inside the user's operation.
+"""
+import os
+import secrets
+import string
+from logging import Logger
+from typing import Iterable, List, Optional
+
+from shared.crud_service import CrudService, ConditionType
+
+RANDOM_POOL_PK_PREFIX = 'RandomPool#'
+RANDOM_POOL_STRING_SK_PREFIX = 'String#'
+RANDOM_POOL_LOW_WATER_MARK = int(os.environ.get('RANDOM_POOL_LOW_WATER_MARK', 200))
+RANDOM_POOL_REFILL_SIZE = int(os.environ.get('RANDOM_POOL_REFILL_SIZE', 1000))
+RANDOM_POOL_CLAIM_ATTEMPTS = 3
+
+RANDOM_ORG_API_URL = 'https://www.random.org/strings'
+RANDOM_ORG_STRING_QUERY_PARAMS = {
+    'len': 8,
+    'digits': 'on',
+    'upperalpha': 'on',
+    'loweralpha': 'on',
+    'unique': 'on',
+    'format': 'plain',
+    'rnd': 'new'
+}
+RANDOM_ORG_CHARSETS = {
+    'digits': string.digits,
+    'upperalpha': string.ascii_uppercase,
+    'loweralpha': string.ascii_lowercase
+}
+
+
+def get_random_pool_spec(query_params: dict) -> str:
+    """
+    Identifies the kind of strings requested to random.org (length and charset),
+    so strings generated with different parameters are kept in different pools.
+    i.e. {'len': 8, 'digits': 'on', 'upperalpha': 'on', 'loweralpha': 'on'} -> 'len8-digits-upperalpha-loweralpha'
+    :param query_params: random.org strings query parameters
+    :return: pool spec
+    """
+    charsets = [name for name in RANDOM_ORG_CHARSETS if query_params.get(name) == 'on']
+    return '-'.join([f"len{query_params.get('len')}"] + charsets)
+
+
+def get_random_org_alphabet(query_params: dict) -> str:
+    """
+    Characters allowed by random.org strings query parameters.
+    :param query_params: random.org strings query parameters
+    :return: alphabet, all the charsets if none is enabled
+    """
+    charsets = [charset for name, charset in RANDOM_ORG_CHARSETS.items() if query_params.get(name) == 'on']
+    return ''.join(charsets) or ''.join(RANDOM_ORG_CHARSETS.values())
+
+
+def generate_random_strings(count: int, length: int, alphabet: str, unique: bool = True) -> List[str]:
+    """
+    Generates random strings locally with a cryptographically secure random generator.
+    One random buffer is drawn per batch and its bytes are mapped to the alphabet with
+    rejection sampling (bytes above the largest multiple of the alphabet size are dropped),
+    so every character is equally likely.
+    :param count: Number of strings
+    :param length: Length of each string
+    :param alphabet: Characters to use (up to 256)
+    :param unique: [Optional] Do not return duplicated strings
+    :return: random strings
+    """
+    accepted_bytes = 256 - (256 % len(alphabet))
+    translation_table = bytes(ord(alphabet[byte % len(alphabet)]) for byte in range(256))
+    rejected_bytes = bytes(range(accepted_bytes, 256))
+
+    random_strings = []
+    seen = set()
+    while len(random_strings) < count:
+        missing = count - len(random_strings)
+        # over-draw by the expected rejection rate so usually a single buffer is enough
+        buffer_size = (missing * length * 256) // accepted_bytes + length
+        characters = secrets.token_bytes(buffer_size).translate(translation_table, rejected_bytes).decode('ascii')
+        for start in range(0, len(characters) - length + 1, length):
+            random_string = characters[start:start + length]
+            if unique:
+                if random_string in seen:
+                    continue
+                seen.add(random_string)
+            random_strings.append(random_string)
+            if len(random_strings) == count:
+                break
+
+    return random_strings
+
+
+class RandomStringPool:
+    """
+    Claims and refills the random strings of a pool partition.
+
+    Strings are random, so claims start at a random position of the partition to spread
+    concurrent workers over different items. A string is claimed by deleting it with a
+    condition that it still exists, if another worker claimed it first the next one is tried.
+    """
+
+    def __init__(self,
+                 logger: Logger,
+                 crud_service: CrudService,
+                 spec: str
+                 ) -> None:
+        self.logger = logger
+        self.crud_service = crud_service
+        self.spec = spec
+        self.pk = f"{RANDOM_POOL_PK_PREFIX}{spec}"
+
+    def claim(self, max_attempts: int = RANDOM_POOL_CLAIM_ATTEMPTS) -> Optional[str]:
+        """
+        Atomically takes one string out of the pool.
+        :param max_attempts: [Optional] Number of candidates to try when other workers claim them first
+        :return: random string or None if the pool is empty
+        """
+        for _ in range(max_attempts):
+            candidate = self._get_candidate()
+            if not candidate:
+                self.logger.info(f"Random string pool {self.pk} is empty.")
+                return None
+
+            claimed = self.crud_service.delete_if_exists(pk=self.pk, sk=candidate['SK'])
+            if claimed:
+                return claimed['random_string']
+
+        self.logger.info(f"Could not claim a string from pool {self.pk} after {max_attempts} attempts.")
+        return None
+
+    def size(self) -> int:
+        """
+        Counts the strings available in the pool
+        :return: number of strings
+        """
+        return self.crud_service.count_items(pk=self.pk,
+                                             condition_type=ConditionType.BEGINS_WITH,
+                                             condition_value=RANDOM_POOL_STRING_SK_PREFIX)
+
+    def refill(self, random_strings: Iterable[str]) -> int:
+        """
+        Adds strings to the pool in bulk
+        :param random_strings: strings to add
+        :return: number of strings added
+        """
+        items = [{'PK': self.pk,
+                  'SK': f"{RANDOM_POOL_STRING_SK_PREFIX}{random_string}",
+                  'random_string': random_string}
+                 for random_string in set(random_strings)]
+        if items:
+            self.crud_service.batch_create(items=items)
+        self.logger.info(f"Added {len(items)} strings to pool {self.pk}")
+        return len(items)
+
+    def _get_candidate(self) -> Optional[dict]:
+        """
+        Reads the first string after a random position of the partition, wrapping around
+        to the beginning of the partition if there are no strings after it.
+        :return: pool item or None if the pool is empty
+        """
+        start = f"{RANDOM_POOL_STRING_SK_PREFIX}{secrets.choice(string.digits + string.ascii_letters)}"
+        items, _ = self.crud_service.list_items_page(pk=self.pk,
+                                                     condition_type=ConditionType.GREATER_THAN_OR_EQUAL,
+                                                     condition_value=start,
+                                                     ascending=True,
+                                                     limit=1)
+        if not items:
+            items, _ = self.crud_service.list_items_page(pk=self.pk,
+                                                         condition_type=ConditionType.BEGINS_WITH,
+                                                         condition_value=RANDOM_POOL_STRING_SK_PREFIX,
+                                                         ascending=True,
+                                                         limit=1)
+        return items[0] if items else None
@@ -3,13 +3,19 @@ Common helper/utility functions used for Record entity
 """
 from http import HTTPStatus
 from logging import Logger
-from typing import Union
+from typing import List, Optional, Set, Union
+
+from boto3.dynamodb.conditions import Attr
 
 from shared.crud_service import ConditionType, CrudService
 from shared.date_utils import get_js_utc_now
 from shared.error_handling import HTTPException
 from shared.models.operation_model import OperationOUT, Operation
-from shared.models.record_model import RecordOUT
+
+# Attributes needed to read the user balance from a Record
+RECORD_BALANCE_FIELDS = ['user_balance', 'SK']
+# Soft deleted Records are hidden by the list endpoints (FilterExpression)
+RECORD_NOT_DELETED_FILTER = Attr('deleted').not_exists() | Attr('deleted').eq(False)
 
 
 def is_user_first_operation(logger: Logger, user_records_db: list) -> bool:
@@ -29,26 +35,30 @@ def is_user_first_operation(logger: Logger, user_records_db: list) -> bool:
 
 def check_user_has_sufficient_balance(logger: Logger,
                                       operation: Union[OperationOUT, Operation],
-                                      recent_record: RecordOUT
+                                      user_balance: int
                                       ) -> None:
     """
     Checks if the user has sufficient balance to cover for the operation cost
     :param logger: logger
     :param operation: The operation the user wants to perform
-    :param recent_record: The most recent user Record.
+    :param user_balance: The current user balance.
     :return: None
     """
     logger.info("Checking that the user has sufficient balance.")
-    if recent_record.user_balance < operation.cost:
+    if user_balance < operation.cost:
         raise HTTPException(status_code=HTTPStatus.BAD_REQUEST,
                             msg='Insufficient Funds to perform this operation')
 
 
-def get_user_most_recent_record(crud_service: CrudService, user_id: str) -> list:
+def get_user_most_recent_record(crud_service: CrudService,
+                                user_id: str,
+                                fields: Optional[List[str]] = None
+                                ) -> list:
     """
     Gets the user's most recent Record.
     :param crud_service: Crud Service
     :param user_id: ID of the user
+    :param fields: [Optional] Only read these attributes
     :return: Record DB object
     """
     return crud_service.list_items(pk=f'User#{user_id}',
@@ -56,4 +66,21 @@ def get_user_most_recent_record(crud_service: CrudService, user_id: str) -> list
                                    ascending=False,
                                    limit=1,
                                    condition_type=ConditionType.LESS_THAN_OR_EQUAL,
-                                   condition_value=f'Record#{get_js_utc_now()}')
+                                   condition_value=f'Record#{get_js_utc_now()}',
+                                   fields=fields)
+
+
+def get_saved_record_ids(crud_service: CrudService, user_id: str, record_ids: List[str]) -> Set[str]:
+    """
+    Gets which of the Records of a user already exist, with strongly consistent reads,
+    so redelivered operation messages are not performed (and charged) twice.
+    :param crud_service: Crud Service
+    :param user_id: ID of the user
+    :param record_ids: IDs of the Records
+    :return: IDs of the Records that exist
+    """
+    records_db = crud_service.batch_get(keys=[{'PK': f'User#{user_id}', 'SK': f'Record#{record_id}'}
+                                              for record_id in set(record_ids)],
+                                        consistent_read=True,
+                                        fields=['PK', 'SK', 'record_id'])
+    return {record_db['record_id'] for record_db in records_db}
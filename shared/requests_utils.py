@@ -1,13 +1,118 @@
 """
 Common helper/utility functions used for making HTTP Requests
 """
-import math
+import random
 from http import HTTPStatus
 from logging import Logger
 from time import sleep
+from typing import Optional, Tuple
 
 import requests
 from requests import Response
+from requests.adapters import HTTPAdapter
+
+DEFAULT_CONNECT_TIMEOUT_SECONDS = 3.05
+DEFAULT_READ_TIMEOUT_SECONDS = 10
+DEFAULT_POOL_MAXSIZE = 10
+DEFAULT_BACKOFF_BASE_MILLISECONDS = 200
+DEFAULT_BACKOFF_CAP_MILLISECONDS = 5000
+RETRYABLE_STATUS_CODES = (
+    HTTPStatus.TOO_MANY_REQUESTS,
+    HTTPStatus.INTERNAL_SERVER_ERROR,
+    HTTPStatus.BAD_GATEWAY,
+    HTTPStatus.SERVICE_UNAVAILABLE,
+    HTTPStatus.GATEWAY_TIMEOUT
+)
+
+
+class HttpClient:
+    """
+    Reusable HTTP client backed by a requests Session, so the TCP+TLS connections are
+    kept alive in a connection pool and reused across requests (and across invocations
+    when the client is created at module level of a Lambda).
+    """
+    def __init__(self,
+                 connect_timeout: float = DEFAULT_CONNECT_TIMEOUT_SECONDS,
+                 read_timeout: float = DEFAULT_READ_TIMEOUT_SECONDS,
+                 pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+                 backoff_base_milliseconds: int = DEFAULT_BACKOFF_BASE_MILLISECONDS,
+                 backoff_cap_milliseconds: int = DEFAULT_BACKOFF_CAP_MILLISECONDS,
+                 session: Optional[requests.Session] = None
+                 ) -> None:
+        """
+        :param connect_timeout: Seconds to wait for the connection to be established
+        :param read_timeout: Seconds to wait for the server to send a response
+        :param pool_maxsize: Maximum number of connections kept alive per host
+        :param backoff_base_milliseconds: Base of the exponential backoff between retries
+        :param backoff_cap_milliseconds: Maximum wait between retries
+        :param session: [Optional] requests Session to use, a new one is created by default
+        """
+        self.timeout: Tuple[float, float] = (connect_timeout, read_timeout)
+        self.backoff_base = backoff_base_milliseconds / 1000
+        self.backoff_cap = backoff_cap_milliseconds / 1000
+        self.session = session or requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def get_backoff_seconds(self, attempt: int) -> float:
+        """
+        Exponential backoff with full jitter: a random wait between 0 and
+        min(cap, base * 2 ** attempt).
+        Reference: https://aws.amazon.com/blogs/architecture/exponential-backoff-and-jitter/
+        :param attempt: Number of the retry, starting at 0
+        :return: Seconds to wait before the retry
+        """
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * (2 ** attempt)))
+
+    def request(self,
+                logger: Logger,
+                url: str,
+                request_method: str = 'GET',
+                headers: Optional[dict] = None,
+                query_params: Optional[dict] = None,
+                max_retries: int = 3
+                ) -> Response:
+        """
+        Sends a request and retries it with exponential backoff when the connection fails,
+        times out or the server answers with a retryable status code (429 or 5xx).
+        :param logger: logger
+        :param url: The URL of the API endpoint to be called
+        :param request_method: The HTTP method to use
+        :param headers: The HTTP Headers to send with the request
+        :param query_params: The Query Parameters to send
+        :param max_retries: The maximum number of times to retry a failed request before giving up
+        :return: Response of the last attempt
+        :raises requests.RequestException: If the last attempt could not get a response
+        """
+        for attempt in range(max_retries + 1):
+            if attempt:
+                backoff = self.get_backoff_seconds(attempt=attempt - 1)
+                logger.info(f"Retrying API Call in {backoff:.3f} seconds. Attempt: {attempt}")
+                sleep(backoff)
+
+            try:
+                response = self.session.request(method=request_method,
+                                                url=url,
+                                                headers=headers,
+                                                params=query_params,
+                                                timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout) as err:
+                logger.warning(f"{request_method} request to URL {url} failed",
+                               extra={'Exception': err})
+                if attempt == max_retries:
+                    raise
+                continue
+
+            if response.status_code not in RETRYABLE_STATUS_CODES:
+                return response
+
+            logger.warning(f"{request_method} request to URL {url} returned {response.status_code}")
+
+        return response
+
+
+default_http_client = HttpClient()
 
 
 def request_with_retry(logger: Logger,
@@ -16,63 +121,35 @@ def request_with_retry(logger: Logger,
                        headers: dict = {},
                        query_params: dict = {},
                        max_retries: int = 3,
-                       sleep_time_milliseconds: int = 200,
+                       http_client: Optional[HttpClient] = None
                        ) -> Response:
     """
     Makes a request to an API endpoint and retries with exponential backoff if
     the request is not successful. If the request is successful, it returns the results.
 
     An exponential backoff algorithm retries requests exponentially, increasing the waiting
-    time between retries up to a maximum backoff time or to a maximum number of retries (in
-    this case just 3 times by default).
+    time between retries (with random jitter) up to a maximum backoff time or to a maximum
+    number of retries (in this case just 3 times by default).
 
     This function is generic and can be used to call different APIs.
-    To avoid overwhelming the API server, a short wait time is added between each request.
+    Requests are sent through a pooled HttpClient so connections to the same host are reused,
+    and every request has connect and read timeouts.
     Parameters:
         - logger (Logger): logger
         - url (str): The URL of the API endpoint to be called
-        - request_method (str): The HTTP method to use (GET or POST) only for now
+        - request_method (str): The HTTP method to use (GET, POST, PUT, PATCH or DELETE)
         - headers (dict): The HTTP Headers to send with the request
         - query_params (dict): The Query Parameters to send
         - max_retries (int): The maximum number of times to retry a failed request before giving up
-        - sleep_time_milliseconds (int): The amount of milliseconds to wait before next request if succeeded
-                                        this is to avoid overwhelming the server if the request is in a loop.
+        - http_client (HttpClient): [Optional] client to use, defaults to a module level client
     Returns:
         Response object
     """
     logger.info(f"Sending {request_method} request to URL {url}")
-    sleep_time = sleep_time_milliseconds / 1000  # sleep before next api call, defaults to 200 milliseconds
-    request_payload = {
-        'url': url
-    }
-
-    request_method_map = {
-        'GET': requests.get,
-        'POST': requests.post,
-        'PUT': requests.put,
-        'PATCH': requests.patch,
-        'DELETE': requests.delete
-    }
-    request_func = request_method_map[request_method]
-    if headers:
-        request_payload['headers'] = headers
-    if query_params:
-        request_payload['query_params'] = query_params
-
-    request_succeeded: bool = lambda x: x < HTTPStatus.BAD_REQUEST
-
-    response = request_func(url=url, params=query_params)
-    if request_succeeded(response.status_code):
-        sleep(sleep_time)
-        return response
-
-    while max_retries > 0:
-        logger.info("Retrying API Call")
-        sleep(sleep_time)
-        response = request_func(url=url, params=query_params)
-        max_retries = max_retries - 1
-        sleep_time = math.pow(sleep_time, 2)  # Exponential Backoff
-        if request_succeeded(response.status_code):
-            max_retries = 0
-            sleep(sleep_time)
-            return response
+    http_client = http_client or default_http_client
+    return http_client.request(logger=logger,
+                               url=url,
+                               request_method=request_method,
+                               headers=headers or None,
+                               query_params=query_params or None,
+                               max_retries=max_retries)
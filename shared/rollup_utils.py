@@ -0,0 +1,92 @@
+"""
+Common helper/utility functions used for the Rollup entity
+"""
+from collections import defaultdict
+from datetime import datetime
+from typing import List
+
+# Bucket formats sort in chronological order, so a date range is a BETWEEN on the sort key
+ROLLUP_GRANULARITIES = {
+    'hour': '%Y-%m-%dT%H',
+    'day': '%Y-%m-%d',
+    'month': '%Y-%m'
+}
+
+
+def get_rollup_bucket(date: int, granularity: str) -> str:
+    """
+    UTC bucket of a date, i.e. 1678196485853 -> '2023-03-07' (day)
+    :param date: Date in epoch format (milliseconds)
+    :param granularity: hour, day or month
+    :return: bucket
+    """
+    return datetime.utcfromtimestamp(int(date) / 1000).strftime(ROLLUP_GRANULARITIES[granularity])
+
+
+def get_rollup_sort_key(granularity: str, bucket: str) -> str:
+    """
+    :param granularity: hour, day or month
+    :param bucket: bucket of the granularity
+    :return: Rollup sort key, i.e. 'Rollup#day#2023-03-07'
+    """
+    return f'Rollup#{granularity}#{bucket}'
+
+
+def get_user_rollup_updates(user_id: str, records: List[dict]) -> List[dict]:
+    """
+    TransactWriteItems actions that add Records to the user hourly, daily and monthly
+    Rollups, one atomic `ADD` update per bucket, written in the same transaction as the
+    Records so the operations are counted exactly once. The ending balance of a bucket is
+    the one of its last Record: the operations of a user are saved one transaction after
+    the other (each one is conditioned on the balance left by the previous one), so the
+    last Record saved in a bucket is its latest one.
+    :param user_id: ID of the user
+    :param records: Records saved in order (RecordIN dicts)
+    :return: Update actions, one per bucket
+    """
+    buckets = defaultdict(list)
+    for record in records:
+        for granularity in ROLLUP_GRANULARITIES:
+            buckets[(granularity, get_rollup_bucket(date=record['date'], granularity=granularity))].append(record)
+
+    return [_get_user_rollup_update(user_id=user_id,
+                                    granularity=granularity,
+                                    bucket=bucket,
+                                    records=bucket_records)
+            for (granularity, bucket), bucket_records in buckets.items()]
+
+
+def _get_user_rollup_update(user_id: str,
+                            granularity: str,
+                            bucket: str,
+                            records: List[dict]
+                            ) -> dict:
+    return {
+        'Update': {
+            'Key': {'PK': f'User#{user_id}', 'SK': get_rollup_sort_key(granularity=granularity, bucket=bucket)},
+            'UpdateExpression': 'ADD #operation_count :operation_count, #credit_spent :credit_spent '
+                                'SET #entity = :entity, #user_id = :user_id, #granularity = :granularity, '
+                                '#bucket = :bucket, #ending_balance = :ending_balance, '
+                                '#last_operation_date = :last_operation_date',
+            'ExpressionAttributeNames': {
+                '#operation_count': 'operation_count',
+                '#credit_spent': 'credit_spent',
+                '#entity': 'entity',
+                '#user_id': 'user_id',
+                '#granularity': 'granularity',
+                '#bucket': 'bucket',
+                '#ending_balance': 'ending_balance',
+                '#last_operation_date': 'last_operation_date'
+            },
+            'ExpressionAttributeValues': {
+                ':operation_count': len(records),
+                ':credit_spent': sum(record['amount'] for record in records),
+                ':entity': 'ROLLUP',
+                ':user_id': user_id,
+                ':granularity': granularity,
+                ':bucket': bucket,
+                ':ending_balance': records[-1]['user_balance'],
+                ':last_operation_date': records[-1]['date']
+            }
+        }
+    }
@@ -1,10 +1,22 @@
+import random
 from http import HTTPStatus
+from itertools import islice
+from time import sleep
+from typing import Dict, Optional, Iterable, Tuple, List
 
 from botocore.exceptions import ClientError
 from logging import Logger
 
 from shared.error_handling import HTTPException
 
+TOPIC_NOT_FOUND_ERROR_CODES = ('NotFound', 'NotFoundException')
+PUBLISH_BATCH_MAX_ENTRIES = 10
+PUBLISH_BATCH_MAX_ATTEMPTS = 3
+PUBLISH_BATCH_BACKOFF_BASE_MILLISECONDS = 100
+PUBLISH_BATCH_BACKOFF_CAP_MILLISECONDS = 2000
+# Code of the entries left unpublished because a PublishBatch call raised
+PUBLISH_BATCH_ERROR_CODE = 'PublishBatchError'
+
 
 class SnsService:
     """
@@ -12,19 +24,54 @@ class SnsService:
     """
     def __init__(self,
                  logger: Logger,
-                 sns_client
+                 sns_client,
+                 topic_arns: Optional[Dict[str, str]] = None,
+                 backoff_base_milliseconds: int = PUBLISH_BATCH_BACKOFF_BASE_MILLISECONDS,
+                 backoff_cap_milliseconds: int = PUBLISH_BATCH_BACKOFF_CAP_MILLISECONDS
                  ) -> None:
+        """
+        :param logger: logger
+        :param sns_client: boto3 SNS client
+        :param topic_arns: [Optional] Known topic ARNs by topic name (i.e. injected through
+                           environment variables), so they don't need to be resolved.
+        :param backoff_base_milliseconds: [Optional] Base of the exponential backoff between
+                                          PublishBatch retries
+        :param backoff_cap_milliseconds: [Optional] Maximum wait between PublishBatch retries
+        """
         self.logger = logger
         self.sns_client = sns_client
+        self._topic_arns = {name: arn for name, arn in (topic_arns or {}).items() if arn}
+        self.backoff_base = backoff_base_milliseconds / 1000
+        self.backoff_cap = backoff_cap_milliseconds / 1000
+
+    def get_backoff_seconds(self, attempt: int) -> float:
+        """
+        Exponential backoff with full jitter: a random wait between 0 and
+        min(cap, base * 2 ** attempt).
+        Reference: https://aws.amazon.com/blogs/architecture/exponential-backoff-and-jitter/
+        :param attempt: Number of the retry, starting at 0
+        :return: Seconds to wait before the retry
+        """
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * (2 ** attempt)))
 
     def _get_topic_arn(self, topic_name: str) -> str:
         """
-        Gets the ARN from the topic name
+        Gets the ARN from the topic name.
+        ARNs are memoized per container, so the create_topic control-plane call is only
+        made the first time a topic is used (create_topic is idempotent and returns the
+        ARN of the existing topic).
         :param topic_name: name of the topic
         :return: ARN
         """
+        topic_arn = self._topic_arns.get(topic_name)
+        if topic_arn:
+            return topic_arn
+
         try:
-            return self.sns_client.create_topic(Name=topic_name)['TopicArn']
+            self.logger.info(f"Resolving ARN for topic: {topic_name}")
+            topic_arn = self.sns_client.create_topic(Name=topic_name)['TopicArn']
+            self._topic_arns[topic_name] = topic_arn
+            return topic_arn
 
         except ClientError as err:
             self.logger.exception("There was an error trying to get the topic name.",
@@ -32,11 +79,21 @@ class SnsService:
             raise HTTPException(status_code=HTTPStatus.INTERNAL_SERVER_ERROR,
                                 msg="Oops something went wrong.")
 
+    def _invalidate_topic_arn(self, topic_name: str) -> None:
+        """
+        Forget a memoized ARN, i.e. when the topic was deleted and recreated.
+        :param topic_name: name of the topic
+        """
+        self.logger.info(f"Invalidating ARN for topic: {topic_name}")
+        self._topic_arns.pop(topic_name, None)
+
     def publish_message(self, topic_name: str, message: str, attributes: dict = None) -> dict:
         """
         Publishes a message, with attributes, to a topic. Subscriptions can be filtered
         based on message attributes so that a subscription receives messages only
         when specified attributes are present.
+        If the topic is not found the memoized ARN is invalidated and the publish is
+        retried once with a freshly resolved ARN.
         :param topic_name: The topic to publish to.
         :param message: The message to publish.
         :param attributes: The key-value attributes to attach to the message. Values
@@ -47,20 +104,21 @@ class SnsService:
         try:
             payload = {}
             if attributes:
-                att_dict = {}
-                for key, value in attributes.items():
-                    if isinstance(value, str):
-                        att_dict[key] = {'DataType': 'String', 'StringValue': value}
-                    elif isinstance(value, bytes):
-                        att_dict[key] = {'DataType': 'Binary', 'BinaryValue': value}
-                payload['MessageAttributes'] = att_dict
-
-            topic_arn = self._get_topic_arn(topic_name=topic_name)
-            payload['TopicArn'] = topic_arn
+                payload['MessageAttributes'] = self._get_message_attributes(attributes)
+
+            payload['TopicArn'] = self._get_topic_arn(topic_name=topic_name)
             payload['Message'] = message
 
-            response = self.sns_client.publish(**payload)
-            self.logger.info(f"Published message to topic: {topic_arn} attributes: {attributes} ")
+            try:
+                response = self.sns_client.publish(**payload)
+            except ClientError as err:
+                if err.response['Error']['Code'] not in TOPIC_NOT_FOUND_ERROR_CODES:
+                    raise
+                self._invalidate_topic_arn(topic_name=topic_name)
+                payload['TopicArn'] = self._get_topic_arn(topic_name=topic_name)
+                response = self.sns_client.publish(**payload)
+
+            self.logger.info(f"Published message to topic: {payload['TopicArn']} attributes: {attributes} ")
 
             return response['MessageId']
 
@@ -70,3 +128,132 @@ class SnsService:
             raise HTTPException(status_code=HTTPStatus.INTERNAL_SERVER_ERROR,
                                 msg="Oops something went wrong.")
 
+    def publish_messages(self,
+                         topic_name: str,
+                         messages: Iterable[Tuple[str, Optional[dict]]],
+                         max_attempts: int = PUBLISH_BATCH_MAX_ATTEMPTS
+                         ) -> Dict[str, List[dict]]:
+        """
+        Publishes many messages to a topic using PublishBatch, chunking them in batches
+        of up to 10 entries. Only the entries that failed are retried, up to max_attempts,
+        after an exponential backoff with jitter; entries failed because of a sender fault
+        (i.e. an invalid parameter) are not retried. If a PublishBatch call raises, the
+        messages not published yet are reported as failed with the PublishBatchError code
+        and the partial result is returned.
+        :param topic_name: The topic to publish to.
+        :param messages: Iterable of (message, attributes) pairs. Attributes can be None.
+        :param max_attempts: [Optional] Number of times a failed entry is attempted.
+        :return dict: `{'Successful': [{'Index': int, 'MessageId': str}],
+                        'Failed': [{'Index': int, 'Code': str, 'Message': str, 'SenderFault': bool}]}`
+                      where Index is the position of the message in the given iterable.
+        Reference: https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/sns/client/publish_batch.html
+        """
+        result = {'Successful': [], 'Failed': []}
+        entries = ({'Id': str(index), 'Message': message, 'Attributes': attributes}
+                   for index, (message, attributes) in enumerate(messages))
+
+        chunk = []
+        try:
+            while True:
+                chunk = list(islice(entries, PUBLISH_BATCH_MAX_ENTRIES))
+                if not chunk:
+                    break
+
+                for attempt in range(1, max_attempts + 1):
+                    successful, failed = self._publish_batch(topic_name=topic_name, entries=chunk)
+                    result['Successful'].extend(successful)
+
+                    retryable_ids = {entry['Id'] for entry in failed if not entry['SenderFault']}
+                    if attempt == max_attempts:
+                        retryable_ids = set()
+
+                    result['Failed'].extend(entry for entry in failed if entry['Id'] not in retryable_ids)
+                    chunk = [entry for entry in chunk if entry['Id'] in retryable_ids]
+                    if not chunk:
+                        break
+
+                    backoff = self.get_backoff_seconds(attempt=attempt - 1)
+                    self.logger.warning(f"Retrying {len(chunk)} failed entries in {backoff:.3f} seconds. "
+                                        f"Attempt: {attempt}")
+                    sleep(backoff)
+
+        except HTTPException as err:
+            unpublished = chunk + list(entries)
+            self.logger.warning(f"Publishing stopped, {len(unpublished)} messages were not published.")
+            result['Failed'].extend({'Id': entry['Id'],
+                                     'Code': PUBLISH_BATCH_ERROR_CODE,
+                                     'Message': err.msg,
+                                     'SenderFault': False}
+                                    for entry in unpublished)
+
+        for entry in result['Successful'] + result['Failed']:
+            entry['Index'] = int(entry.pop('Id'))
+
+        self.logger.info(f"Published {len(result['Successful'])} messages to topic: {topic_name} "
+                         f"failed: {len(result['Failed'])}")
+
+        return result
+
+    def _publish_batch(self, topic_name: str, entries: List[dict]) -> Tuple[List[dict], List[dict]]:
+        """
+        Sends one PublishBatch call (up to 10 entries).
+        If the topic is not found the memoized ARN is invalidated and the call is
+        retried once with a freshly resolved ARN.
+        :param topic_name: The topic to publish to.
+        :param entries: Entries with Id, Message and Attributes
+        :return: (successful, failed) entries as returned by SNS
+        """
+        payload = {
+            'TopicArn': self._get_topic_arn(topic_name=topic_name),
+            'PublishBatchRequestEntries': [self._get_batch_request_entry(entry) for entry in entries]
+        }
+
+        try:
+            try:
+                response = self.sns_client.publish_batch(**payload)
+            except ClientError as err:
+                if err.response['Error']['Code'] not in TOPIC_NOT_FOUND_ERROR_CODES:
+                    raise
+                self._invalidate_topic_arn(topic_name=topic_name)
+                payload['TopicArn'] = self._get_topic_arn(topic_name=topic_name)
+                response = self.sns_client.publish_batch(**payload)
+
+        except ClientError as err:
+            self.logger.exception("There was an error trying to publish a batch of messages to the topic",
+                                  extra={'Exception': err, 'topic_name': topic_name})
+            raise HTTPException(status_code=HTTPStatus.INTERNAL_SERVER_ERROR,
+                                msg="Oops something went wrong.")
+
+        successful = [{'Id': entry['Id'], 'MessageId': entry['MessageId']}
+                      for entry in response.get('Successful', [])]
+        failed = [{'Id': entry['Id'],
+                   'Code': entry.get('Code', ''),
+                   'Message': entry.get('Message', ''),
+                   'SenderFault': entry.get('SenderFault', False)}
+                  for entry in response.get('Failed', [])]
+        return successful, failed
+
+    def _get_batch_request_entry(self, entry: dict) -> dict:
+        """
+        Maps an entry to a PublishBatchRequestEntry
+        :param entry: Entry with Id, Message and Attributes
+        :return: PublishBatchRequestEntry
+        """
+        request_entry = {'Id': entry['Id'], 'Message': entry['Message']}
+        if entry['Attributes']:
+            request_entry['MessageAttributes'] = self._get_message_attributes(entry['Attributes'])
+        return request_entry
+
+    def _get_message_attributes(self, attributes: dict) -> dict:
+        """
+        Maps the key-value attributes to SNS message attributes.
+        :param attributes: The key-value attributes. Values must be either `str` or `bytes`.
+        :return: SNS MessageAttributes
+        """
+        att_dict = {}
+        for key, value in attributes.items():
+            if isinstance(value, str):
+                att_dict[key] = {'DataType': 'String', 'StringValue': value}
+            elif isinstance(value, bytes):
+                att_dict[key] = {'DataType': 'Binary', 'BinaryValue': value}
+        return att_dict
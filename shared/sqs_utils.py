@@ -0,0 +1,48 @@
+"""
+Common helper/utility functions used by the SQS worker lambdas
+"""
+from collections import OrderedDict
+from logging import Logger
+from typing import Dict, List, Tuple
+
+from shared.json_utils import json_string_to_dict
+
+
+def group_messages_by_user(logger: Logger,
+                           events: List[dict]
+                           ) -> Tuple[Dict[str, List[Tuple[dict, dict]]], List[str]]:
+    """
+    Groups the SQS messages of a batch by user_id, keeping the order in which they
+    were received so operation costs are deducted in order. Messages whose body is not
+    a JSON object with a user_id are reported on their own, without failing the batch.
+    :param logger: logger
+    :param events: SQS records of the Lambda event
+    :return: Ordered mapping of user_id to a list of (SQS record, parsed message body),
+             and the IDs of the malformed messages
+    """
+    logger.info(f"Grouping {len(events)} messages by user.")
+    messages_by_user = OrderedDict()
+    malformed_message_ids = []
+    for event in events:
+        try:
+            body = json_string_to_dict(event.get('body', '{}'))
+        except (TypeError, ValueError) as err:
+            body = None
+            logger.exception("Could not parse the message body.",
+                             extra={'MessageId': event.get('messageId'), 'Exception': err})
+        if not isinstance(body, dict) or not body.get('user_id'):
+            logger.error("Malformed message.", extra={'MessageId': event.get('messageId')})
+            malformed_message_ids.append(event.get('messageId'))
+            continue
+        messages_by_user.setdefault(body['user_id'], []).append((event, body))
+    return messages_by_user, malformed_message_ids
+
+
+def get_batch_item_failures(message_ids: List[str]) -> dict:
+    """
+    Builds the partial batch response so SQS only retries the failed messages.
+    Reference: https://docs.aws.amazon.com/lambda/latest/dg/with-sqs.html#services-sqs-batchfailurereporting
+    :param message_ids: IDs of the messages that failed
+    :return: Lambda SQS batch response
+    """
+    return {'batchItemFailures': [{'itemIdentifier': message_id} for message_id in message_ids]}
@@ -0,0 +1,107 @@
+"""
+Common helper/utility functions used for the User Stats entity
+"""
+from collections import defaultdict
+from typing import List, Optional
+
+from shared.crud_service import CrudService
+from shared.models.operation_model import OperationType
+from shared.models.user_stats_model import OPERATION_COUNT_PREFIX, CREDIT_SPENT_PREFIX
+
+USER_STATS_SK = 'Stats'
+# Attributes that only move in one direction: (attribute, aggregate, Record field)
+USER_STATS_BOUNDS = [
+    ('first_operation_date', min, 'date'),
+    ('last_operation_date', max, 'date'),
+    ('min_balance', min, 'user_balance'),
+    ('max_balance', max, 'user_balance')
+]
+
+
+def get_user_stats_bounds(crud_service: CrudService, user_id: str) -> Optional[dict]:
+    """
+    Gets the date and balance bounds of the user Stats item with a strongly consistent read.
+    :param crud_service: Crud Service
+    :param user_id: ID of the user
+    :return: Bounds or None if the user has no Stats yet
+    """
+    return crud_service.get(pk=f'User#{user_id}',
+                            sk=USER_STATS_SK,
+                            consistent_read=True,
+                            fields=[attribute for attribute, _, _ in USER_STATS_BOUNDS])
+
+
+def add_records_to_stats_bounds(records: List[dict], bounds: Optional[dict] = None) -> dict:
+    """
+    Moves the date and balance bounds of the user Stats to include the Records.
+    :param records: Records (RecordIN dicts)
+    :param bounds: [Optional] Current bounds
+    :return: New bounds
+    """
+    new_bounds = {}
+    for attribute, aggregate, field in USER_STATS_BOUNDS:
+        values = [record[field] for record in records]
+        if bounds and bounds.get(attribute) is not None:
+            values.append(bounds[attribute])
+        new_bounds[attribute] = aggregate(values)
+    return new_bounds
+
+
+def get_user_stats_update(user_id: str,
+                          records: List[dict],
+                          operation_types: List[OperationType],
+                          bounds: dict
+                          ) -> dict:
+    """
+    TransactWriteItems action that adds Records to the user Stats item, written in the
+    same transaction as the Records so the operations are counted exactly once. The
+    counters are incremented with `ADD`, whatever the number of Records. The bounds are
+    set to the ones computed from a read of the item: the transaction is conditioned on
+    the user balance, which every operation changes, so the item did not change since.
+    :param user_id: ID of the user
+    :param records: Records saved (RecordIN dicts)
+    :param operation_types: Operation type of each Record
+    :param bounds: Bounds including the Records (add_records_to_stats_bounds)
+    :return: Update action
+    """
+    counts = defaultdict(int)
+    spent = defaultdict(int)
+    for record, operation_type in zip(records, operation_types):
+        counts[operation_type.value] += 1
+        spent[operation_type.value] += record['amount']
+
+    expression_attribute_names = {
+        '#entity': 'entity',
+        '#user_id': 'user_id',
+        '#operation_count': 'operation_count',
+        '#credit_spent': 'credit_spent'
+    }
+    expression_attribute_values = {
+        ':entity': 'USER_STATS',
+        ':user_id': user_id,
+        ':operation_count': len(records),
+        ':credit_spent': sum(spent.values())
+    }
+    add_actions = ['#operation_count :operation_count', '#credit_spent :credit_spent']
+    for index, operation_type in enumerate(counts):
+        expression_attribute_names[f'#type_count_{index}'] = f'{OPERATION_COUNT_PREFIX}{operation_type}'
+        expression_attribute_names[f'#type_spent_{index}'] = f'{CREDIT_SPENT_PREFIX}{operation_type}'
+        expression_attribute_values[f':type_count_{index}'] = counts[operation_type]
+        expression_attribute_values[f':type_spent_{index}'] = spent[operation_type]
+        add_actions.append(f'#type_count_{index} :type_count_{index}')
+        add_actions.append(f'#type_spent_{index} :type_spent_{index}')
+
+    set_actions = ['#entity = :entity', '#user_id = :user_id']
+    for attribute, _, _ in USER_STATS_BOUNDS:
+        expression_attribute_names[f'#{attribute}'] = attribute
+        expression_attribute_values[f':{attribute}'] = bounds[attribute]
+        set_actions.append(f'#{attribute} = :{attribute}')
+
+    return {
+        'Update': {
+            'Key': {'PK': f'User#{user_id}', 'SK': USER_STATS_SK},
+            'UpdateExpression': f'ADD {", ".join(add_actions)} SET {", ".join(set_actions)}',
+            'ExpressionAttributeNames': expression_attribute_names,
+            'ExpressionAttributeValues': expression_attribute_values
+        }
+    }
@@ -0,0 +1,61 @@
+import base64
+
+from mock import MagicMock
+
+from shared.api_utils import HTTPResponse, get_event_body, get_request_header
+from shared.error_handling import HTTPException, exception_handler
+
+
+def test_get_request_header_is_case_insensitive():
+    assert get_request_header(event={'headers': {'accept-encoding': 'gzip'}}, name='Accept-Encoding') == 'gzip'
+    assert get_request_header(event={'headers': None}, name='Accept-Encoding') is None
+
+
+def test_get_event_body_decodes_base64():
+    event = {'body': base64.b64encode(b'{"num1": 1}').decode('ascii'), 'isBase64Encoded': True}
+
+    assert get_event_body(event=event) == '{"num1": 1}'
+    assert get_event_body(event={'body': None}) == '{}'
+
+
+def test_exception_handler_returns_text_bodies():
+    handler = exception_handler(MagicMock(side_effect=HTTPException(status_code=400, msg='x' * 2000)))
+
+    result = handler({'httpMethod': 'GET', 'headers': {'Accept-Encoding': 'gzip'}}, {})
+
+    assert result['statusCode'] == 400
+    assert 'isBase64Encoded' not in result
+    assert 'Content-Encoding' not in result['headers']
+    assert result['body'] == '"' + 'x' * 2000 + '"'
+
+
+def test_exception_handler_sets_etag_on_successful_get_only():
+    handler = exception_handler(MagicMock(side_effect=lambda *_: HTTPResponse(status_code=200, body={'a': 1})))
+
+    get_result = handler({'httpMethod': 'GET', 'headers': {}}, {})
+    post_result = handler({'httpMethod': 'POST', 'headers': {}}, {})
+
+    assert get_result['headers']['ETag'] == HTTPResponse(status_code=200, body={'a': 1}).set_etag().headers['ETag']
+    assert 'ETag' not in post_result['headers']
+
+
+def test_exception_handler_keeps_preset_etag():
+    handler = exception_handler(MagicMock(return_value=HTTPResponse(status_code=200, body={'a': 1},
+                                                                    headers={'ETag': '"v1"'})))
+
+    result = handler({'httpMethod': 'GET', 'headers': {'If-None-Match': '"v1"'}}, {})
+
+    assert result['statusCode'] == 304
+    assert result['headers']['ETag'] == '"v1"'
+    assert result['headers']['Access-Control-Expose-Headers'] == 'ETag'
+
+
+def test_exception_handler_returns_304_when_etag_matches():
+    etag = HTTPResponse(status_code=200, body={'a': 1}).set_etag().headers['ETag']
+    handler = exception_handler(MagicMock(return_value=HTTPResponse(status_code=200, body={'a': 1})))
+
+    result = handler({'httpMethod': 'GET', 'headers': {'if-none-match': f'"other", W/{etag}'}}, {})
+
+    assert result['statusCode'] == 304
+    assert result['body'] == ''
+    assert result['headers']['ETag'] == etag
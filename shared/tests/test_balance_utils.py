@@ -0,0 +1,120 @@
+from mock import MagicMock, patch
+
+from shared.balance_utils import (RECORDS_PER_TRANSACTION, get_or_initialize_user_balance, get_user_balance,
+                                  save_user_records)
+from shared.models.operation_model import OperationType
+from shared.models.record_model import DEFAULT_INITIAL_USER_BALANCE
+
+mock_logger = MagicMock()
+mock_crud_service = MagicMock()
+mock_js_utc_now = MagicMock()
+
+USER_ID = '77d46173-1d59-48d0-8b75-eaa76eb857b2'
+BALANCE_ITEM = {
+    'PK': f'User#{USER_ID}',
+    'SK': 'Balance',
+    'entity': 'BALANCE',
+    'user_id': USER_ID,
+    'user_balance': 10,
+    'last_record_id': 'previous-record'
+}
+
+
+def reset_mocks():
+    mock_logger.reset_mock()
+    mock_crud_service.reset_mock()
+    mock_crud_service.upsert_item_attributes.side_effect = None
+    mock_crud_service.get.side_effect = None
+
+
+def test_get_user_balance_from_balance_item():
+    reset_mocks()
+    mock_crud_service.get.return_value = BALANCE_ITEM
+
+    assert get_user_balance(logger=mock_logger, crud_service=mock_crud_service, user_id=USER_ID) == 10
+    mock_crud_service.list_items.assert_not_called()
+
+
+def test_get_user_balance_without_history_returns_initial_balance():
+    reset_mocks()
+    mock_crud_service.get.return_value = None
+    mock_crud_service.list_items.return_value = []
+
+    assert get_user_balance(logger=mock_logger,
+                            crud_service=mock_crud_service,
+                            user_id=USER_ID) == DEFAULT_INITIAL_USER_BALANCE
+
+
+def test_get_or_initialize_user_balance_initializes_balance_item_on_first_operation():
+    reset_mocks()
+    mock_crud_service.get.side_effect = [None, {**BALANCE_ITEM, 'user_balance': DEFAULT_INITIAL_USER_BALANCE}]
+    mock_crud_service.list_items.return_value = []
+
+    balance = get_or_initialize_user_balance(logger=mock_logger,
+                                             crud_service=mock_crud_service,
+                                             user_id=USER_ID)
+
+    assert balance.user_balance == DEFAULT_INITIAL_USER_BALANCE
+    initialize_kwargs = mock_crud_service.upsert_item_attributes.call_args.kwargs
+    assert initialize_kwargs['expression_attribute_values'][':user_balance'] == DEFAULT_INITIAL_USER_BALANCE
+
+
+@patch('shared.balance_utils.get_js_utc_now', mock_js_utc_now)
+def test_save_user_records_writes_balance_records_and_stats_in_one_transaction():
+    reset_mocks()
+    mock_crud_service.get.return_value = None
+    mock_js_utc_now.return_value = 1678232290113
+    records = [{'PK': f'User#{USER_ID}', 'SK': 'Record#1', 'record_id': '1', 'amount': 1, 'user_balance': 9,
+                'date': 1678232290000},
+               {'PK': f'User#{USER_ID}', 'SK': 'Record#2', 'record_id': '2', 'amount': 2, 'user_balance': 7,
+                'date': 1678232290113}]
+
+    save_user_records(logger=mock_logger,
+                      crud_service=mock_crud_service,
+                      user_id=USER_ID,
+                      expected_balance=10,
+                      records=records,
+                      operation_types=[OperationType.ADDITION, OperationType.DIVISION])
+
+    transact_items = mock_crud_service.transact_write.call_args.kwargs['transact_items']
+    assert transact_items[0]['Update']['Key'] == {'PK': f'User#{USER_ID}', 'SK': 'Balance'}
+    assert transact_items[0]['Update']['ConditionExpression'] == '#user_balance = :expected_balance'
+    assert transact_items[0]['Update']['ExpressionAttributeValues'] == {':user_balance': 7,
+                                                                        ':expected_balance': 10,
+                                                                        ':record_id': '2',
+                                                                        ':date': 1678232290113}
+    assert transact_items[1:3] == [{'Put': {'Item': record, 'ConditionExpression': 'attribute_not_exists(SK)'}}
+                                   for record in records]
+    assert transact_items[3]['Update']['Key'] == {'PK': f'User#{USER_ID}', 'SK': 'Stats'}
+    # the hour, day and month Rollups of the Records
+    assert [transact_item['Update']['Key']['SK'] for transact_item in transact_items[4:]] == [
+        'Rollup#hour#2023-03-07T23', 'Rollup#day#2023-03-07', 'Rollup#month#2023-03']
+
+
+def test_save_user_records_chains_the_expected_balance_and_stats_of_each_transaction():
+    reset_mocks()
+    mock_crud_service.get.return_value = {'first_operation_date': 1, 'last_operation_date': 2,
+                                          'min_balance': 100, 'max_balance': 200}
+    records = [{'PK': f'User#{USER_ID}', 'SK': f'Record#{index}', 'record_id': str(index), 'amount': 1,
+                'user_balance': 100 - index, 'date': 1678232290000 + index}
+               for index in range(1, RECORDS_PER_TRANSACTION + 2)]
+
+    save_user_records(logger=mock_logger,
+                      crud_service=mock_crud_service,
+                      user_id=USER_ID,
+                      expected_balance=100,
+                      records=records,
+                      operation_types=[OperationType.ADDITION] * len(records))
+
+    transactions = [call.kwargs['transact_items'] for call in mock_crud_service.transact_write.call_args_list]
+    # Balance, Records, Stats and the hour, day and month Rollups
+    assert [len(transact_items) for transact_items in transactions] == [RECORDS_PER_TRANSACTION + 5, 6]
+    balance_values = [transact_items[0]['Update']['ExpressionAttributeValues'] for transact_items in transactions]
+    assert [values[':expected_balance'] for values in balance_values] == [100, 100 - RECORDS_PER_TRANSACTION]
+    assert [values[':user_balance'] for values in balance_values] == [100 - RECORDS_PER_TRANSACTION,
+                                                                      100 - RECORDS_PER_TRANSACTION - 1]
+    stats_values = [transact_items[-4]['Update']['ExpressionAttributeValues'] for transact_items in transactions]
+    assert [values[':operation_count'] for values in stats_values] == [RECORDS_PER_TRANSACTION, 1]
+    assert [values[':min_balance'] for values in stats_values] == [100 - RECORDS_PER_TRANSACTION,
+                                                                   100 - RECORDS_PER_TRANSACTION - 1]
+    assert [values[':max_balance'] for values in stats_values] == [200, 200]
@@ -0,0 +1,56 @@
+import pytest
+from mock import MagicMock, patch
+
+from shared.concurrency_utils import AdaptiveConcurrencyRunner
+
+mock_logger = MagicMock()
+
+
+class Throttled(Exception):
+    pass
+
+
+def is_throttled(error: Exception) -> bool:
+    return isinstance(error, Throttled)
+
+
+def test_runner_increases_concurrency_without_throttling():
+    runner = AdaptiveConcurrencyRunner(logger=mock_logger, max_concurrency=5, initial_concurrency=2)
+
+    outcomes = runner.run(func=lambda item: item * 2, items=range(20), is_throttled=is_throttled)
+
+    assert sorted(result for _, result, _ in outcomes) == [item * 2 for item in range(20)]
+    assert runner.concurrency == 5
+
+
+@patch('shared.concurrency_utils.sleep')
+def test_runner_retries_throttled_items_with_less_concurrency(mock_sleep):
+    attempts = {}
+
+    def func(item):
+        attempts[item] = attempts.get(item, 0) + 1
+        if attempts[item] == 1 and item < 2:
+            raise Throttled()
+        return item
+
+    runner = AdaptiveConcurrencyRunner(logger=mock_logger, max_concurrency=4, initial_concurrency=4)
+    outcomes = runner.run(func=func, items=range(4), is_throttled=is_throttled)
+
+    assert sorted(result for _, result, _ in outcomes) == [0, 1, 2, 3]
+    assert attempts == {0: 2, 1: 2, 2: 1, 3: 1}
+    mock_sleep.assert_called_once_with(0.05)
+
+
+@patch('shared.concurrency_utils.sleep')
+def test_runner_reports_errors_and_gives_up_after_max_attempts(mock_sleep):
+    def func(item):
+        if item == 0:
+            raise Throttled()
+        raise ValueError()
+
+    runner = AdaptiveConcurrencyRunner(logger=mock_logger, max_attempts=3)
+    outcomes = {item: error for item, _, error in runner.run(func=func, items=[0, 1], is_throttled=is_throttled)}
+
+    assert isinstance(outcomes[0], Throttled)
+    assert isinstance(outcomes[1], ValueError)
+    assert mock_sleep.call_count == 2
@@ -1,8 +1,10 @@
 import pytest
 from boto3.dynamodb.conditions import Key, Attr
-from mock import MagicMock
+from botocore.exceptions import ClientError
+from mock import MagicMock, patch
 
 from shared.crud_service import ConditionType, CrudService
+from shared.error_handling import HTTPException
 from shared.fixture_utils import json_fixture
 from shared.models.operation_model import OperationIN
 
@@ -110,6 +112,7 @@ def test_crud_service_list_items_partition_key_only(crud_service):
     data = CRUD_SERVICE_SAMPLE_DATA_ITEM
     operation_in = OperationIN(**data)
     pk = operation_in.PK
+    mock_table.query.return_value = {'Items': []}
 
     crud_service.list_items(pk=pk)
 
@@ -128,6 +131,7 @@ def test_crud_service_list_items_by_global_secondary_index(crud_service):
     pk = operation_in.GSI1PK
     condition_type = ConditionType.BEGINS_WITH
     condition_value = 'Operation#type'
+    mock_table.query.return_value = {'Items': []}
 
     crud_service.list_items(pk=pk,
                             gsi1=True,
@@ -142,3 +146,278 @@ def test_crud_service_list_items_by_global_secondary_index(crud_service):
     }
 
     mock_table.query.assert_called_with(**expected)
+
+
+def test_crud_service_list_items_page_with_exclusive_start_key(crud_service):
+    data = CRUD_SERVICE_SAMPLE_DATA_ITEM
+    operation_in = OperationIN(**data)
+    pk = operation_in.GSI1PK
+    exclusive_start_key = {'PK': operation_in.PK, 'SK': operation_in.SK,
+                           'GSI1PK': operation_in.GSI1PK, 'GSI1SK': operation_in.GSI1SK}
+    mock_table.query.return_value = {'Items': [], 'LastEvaluatedKey': exclusive_start_key}
+
+    items, last_evaluated_key = crud_service.list_items_page(pk=pk,
+                                                             gsi1=True,
+                                                             limit=10,
+                                                             exclusive_start_key=exclusive_start_key)
+
+    expected = {
+        'IndexName': 'GSI1',
+        'ScanIndexForward': False,
+        'Limit': 10,
+        'KeyConditionExpression': Key('GSI1PK').eq(pk),
+        'ExclusiveStartKey': exclusive_start_key
+    }
+
+    mock_table.query.assert_called_with(**expected)
+    assert items == []
+    assert last_evaluated_key == exclusive_start_key
+
+
+def test_crud_service_list_items_follows_last_evaluated_key(crud_service):
+    mock_table.query.reset_mock()
+    mock_table.query.side_effect = [
+        {'Items': [{'SK': 'Record#1'}, {'SK': 'Record#2'}], 'LastEvaluatedKey': {'PK': 'User#1', 'SK': 'Record#2'}},
+        {'Items': [{'SK': 'Record#3'}]}
+    ]
+
+    items = crud_service.list_items(pk='User#1')
+    mock_table.query.side_effect = None
+
+    assert items == [{'SK': 'Record#1'}, {'SK': 'Record#2'}, {'SK': 'Record#3'}]
+    assert mock_table.query.call_count == 2
+    assert mock_table.query.call_args.kwargs['ExclusiveStartKey'] == {'PK': 'User#1', 'SK': 'Record#2'}
+    assert mock_table.query.call_args.kwargs['Limit'] == 9997
+
+
+def test_crud_service_iter_items_item_budget_and_stats(crud_service):
+    mock_table.query.reset_mock()
+    mock_table.query.side_effect = [
+        {'Items': [{'SK': 'Record#1'}, {'SK': 'Record#2'}], 'ScannedCount': 2,
+         'LastEvaluatedKey': {'PK': 'User#1', 'SK': 'Record#2'}},
+        {'Items': [{'SK': 'Record#3'}], 'ScannedCount': 1,
+         'LastEvaluatedKey': {'PK': 'User#1', 'SK': 'Record#3'}}
+    ]
+
+    query_iterator = crud_service.iter_items(pk='User#1',
+                                             page_size=2,
+                                             max_items=3)
+    pages = list(query_iterator.pages())
+    mock_table.query.side_effect = None
+
+    assert pages == [[{'SK': 'Record#1'}, {'SK': 'Record#2'}], [{'SK': 'Record#3'}]]
+    assert mock_table.query.call_count == 2
+    assert mock_table.query.call_args.kwargs['Limit'] == 1
+    assert query_iterator.page_count == 2
+    assert query_iterator.count == 3
+    assert query_iterator.scanned_count == 3
+    assert query_iterator.last_evaluated_key == {'PK': 'User#1', 'SK': 'Record#3'}
+
+
+def test_crud_service_iter_items_is_single_use(crud_service):
+    mock_table.query.reset_mock()
+    mock_table.query.side_effect = [
+        {'Items': [{'SK': 'Record#1'}], 'ScannedCount': 1,
+         'LastEvaluatedKey': {'PK': 'User#1', 'SK': 'Record#1'}},
+        {'Items': [{'SK': 'Record#2'}], 'ScannedCount': 1}
+    ]
+
+    query_iterator = crud_service.iter_items(pk='User#1')
+    first_run = list(query_iterator)
+    second_run = list(query_iterator)
+    mock_table.query.side_effect = None
+
+    assert first_run == [{'SK': 'Record#1'}, {'SK': 'Record#2'}]
+    assert second_run == []
+    assert mock_table.query.call_count == 2
+    assert query_iterator.page_count == 2
+    assert query_iterator.count == 2
+    assert query_iterator.scanned_count == 2
+
+
+def test_crud_service_upsert_item_attributes_condition_not_satisfied(crud_service):
+    error_response = {'Error': {'Code': 'ConditionalCheckFailedException', 'Message': ''}}
+    mock_table.update_item.side_effect = ClientError(error_response, 'UpdateItem')
+
+    result = crud_service.upsert_item_attributes(pk='User#1',
+                                                 sk='Balance',
+                                                 update_expression='SET #user_balance = #user_balance - :cost',
+                                                 condition_expression='#user_balance >= :cost',
+                                                 expression_attribute_names={'#user_balance': 'user_balance'},
+                                                 expression_attribute_values={':cost': 2})
+    mock_table.update_item.side_effect = None
+
+    assert result is None
+    mock_table.update_item.assert_called_with(Key={'PK': 'User#1', 'SK': 'Balance'},
+                                              UpdateExpression='SET #user_balance = #user_balance - :cost',
+                                              ExpressionAttributeNames={'#user_balance': 'user_balance'},
+                                              ExpressionAttributeValues={':cost': 2},
+                                              ConditionExpression='#user_balance >= :cost',
+                                              ReturnValues='ALL_NEW')
+
+
+def test_crud_service_batch_create_success(crud_service):
+    items = [{'PK': 'User#1', 'SK': f'Record#{index}'} for index in range(30)]
+
+    crud_service.batch_create(items=items)
+
+    batch = mock_table.batch_writer.return_value.__enter__.return_value
+    assert batch.put_item.call_count == 30
+    batch.put_item.assert_called_with(Item={'PK': 'User#1', 'SK': 'Record#29'})
+
+
+def test_delete_if_exists_returns_none_when_already_deleted():
+    table = MagicMock()
+    table.delete_item.side_effect = ClientError({'Error': {'Code': 'ConditionalCheckFailedException'}},
+                                                'DeleteItem')
+    crud_service = CrudService(logger=mock_logger, table=table)
+
+    assert crud_service.delete_if_exists(pk='RandomPool#len8', sk='String#a') is None
+
+
+def test_count_items_follows_last_evaluated_key():
+    table = MagicMock()
+    table.query.side_effect = [{'Count': 3, 'LastEvaluatedKey': {'PK': 'a'}}, {'Count': 2}]
+    crud_service = CrudService(logger=mock_logger, table=table)
+
+    assert crud_service.count_items(pk='RandomPool#len8') == 5
+    assert table.query.call_args_list[0].kwargs['Select'] == 'COUNT'
+    assert table.query.call_args_list[1].kwargs['ExclusiveStartKey'] == {'PK': 'a'}
+
+
+def test_list_items_with_fields_uses_projection_expression():
+    table = MagicMock()
+    table.query.return_value = {'Items': []}
+    crud_service = CrudService(logger=mock_logger, table=table)
+
+    crud_service.list_items(pk='User#1', gsi1=True, limit=1, fields=['user_balance', 'SK'])
+
+    query_payload = table.query.call_args.kwargs
+    assert query_payload['ProjectionExpression'] == '#field0, #field1'
+    assert query_payload['ExpressionAttributeNames'] == {'#field0': 'user_balance', '#field1': 'SK'}
+
+
+def test_get_with_fields_uses_projection_expression():
+    table = MagicMock()
+    table.get_item.return_value = {'Item': {'user_balance': 10}}
+    crud_service = CrudService(logger=mock_logger, table=table)
+
+    assert crud_service.get(pk='User#1', sk='Balance', fields=['user_balance']) == {'user_balance': 10}
+    table.get_item.assert_called_once_with(Key={'PK': 'User#1', 'SK': 'Balance'},
+                                           ProjectionExpression='#field0',
+                                           ExpressionAttributeNames={'#field0': 'user_balance'})
+
+
+@patch('shared.crud_service.sleep')
+def test_batch_get_chunks_keys_and_retries_unprocessed_keys(mock_sleep):
+    table = MagicMock()
+    table.name = 'Table'
+    keys = [{'PK': 'User#1', 'SK': f'Record#{index}'} for index in range(150)]
+    table.meta.client.batch_get_item.side_effect = [
+        {'Responses': {'Table': keys[:90]}, 'UnprocessedKeys': {'Table': {'Keys': keys[90:100]}}},
+        {'Responses': {'Table': keys[90:100]}, 'UnprocessedKeys': {}},
+        {'Responses': {'Table': keys[100:]}}
+    ]
+    crud_service = CrudService(logger=mock_logger, table=table)
+
+    assert crud_service.batch_get(keys=keys, consistent_read=True) == keys
+
+    calls = table.meta.client.batch_get_item.call_args_list
+    assert len(calls[0].kwargs['RequestItems']['Table']['Keys']) == 100
+    assert calls[0].kwargs['RequestItems']['Table']['ConsistentRead'] is True
+    assert calls[1].kwargs['RequestItems'] == {'Table': {'Keys': keys[90:100]}}
+    assert calls[2].kwargs['RequestItems']['Table']['Keys'] == keys[100:]
+    mock_sleep.assert_called_once()
+
+
+@patch('shared.crud_service.sleep')
+def test_batch_get_raises_when_keys_stay_unprocessed(mock_sleep):
+    table = MagicMock()
+    table.name = 'Table'
+    keys = [{'PK': 'User#1', 'SK': 'Record#1'}]
+    table.meta.client.batch_get_item.return_value = {'Responses': {'Table': []},
+                                                     'UnprocessedKeys': {'Table': {'Keys': keys}}}
+    crud_service = CrudService(logger=mock_logger, table=table)
+
+    with pytest.raises(HTTPException) as err:
+        crud_service.batch_get(keys=keys, max_attempts=3)
+
+    assert err.value.status_code == 503
+    assert table.meta.client.batch_get_item.call_count == 3
+
+
+def test_transact_write_sets_the_table_name_of_every_action():
+    table = MagicMock()
+    table.name = 'Table'
+    crud_service = CrudService(logger=mock_logger, table=table)
+
+    crud_service.transact_write(transact_items=[
+        {'Put': {'Item': {'PK': 'User#1', 'SK': 'Record#1'}, 'ConditionExpression': 'attribute_not_exists(SK)'}},
+        {'Update': {'Key': {'PK': 'User#1', 'SK': 'Balance'}, 'UpdateExpression': 'SET #a = :a'}}
+    ])
+
+    transact_items = table.meta.client.transact_write_items.call_args.kwargs['TransactItems']
+    assert transact_items == [
+        {'Put': {'Item': {'PK': 'User#1', 'SK': 'Record#1'}, 'ConditionExpression': 'attribute_not_exists(SK)',
+                 'TableName': 'Table'}},
+        {'Update': {'Key': {'PK': 'User#1', 'SK': 'Balance'}, 'UpdateExpression': 'SET #a = :a',
+                    'TableName': 'Table'}}
+    ]
+
+
+def test_transact_write_condition_not_satisfied_raises_409():
+    table = MagicMock()
+    table.meta.client.transact_write_items.side_effect = ClientError(
+        {'Error': {'Code': 'TransactionCanceledException'},
+         'CancellationReasons': [{'Code': 'ConditionalCheckFailed'}, {'Code': 'None'}]},
+        'TransactWriteItems')
+    crud_service = CrudService(logger=mock_logger, table=table)
+
+    with pytest.raises(HTTPException) as err:
+        crud_service.transact_write(transact_items=[{'Put': {'Item': {'PK': 'User#1', 'SK': 'Record#1'}}}])
+
+    assert err.value.status_code == 409
+
+
+def test_update_item_attributes_throttled_raises_429():
+    table = MagicMock()
+    table.update_item.side_effect = ClientError({'Error': {'Code': 'ProvisionedThroughputExceededException'}},
+                                                'UpdateItem')
+    crud_service = CrudService(logger=mock_logger, table=table)
+
+    with pytest.raises(HTTPException) as err:
+        crud_service.update_item_attributes(pk='User#1', sk='Record#1', update_expression='SET #deleted = :deleted',
+                                            expression_attribute_names={'#deleted': 'deleted'},
+                                            expression_attribute_values={':deleted': True})
+
+    assert err.value.status_code == 429
+
+
+def test_list_items_with_filter_expression():
+    table = MagicMock()
+    table.query.return_value = {'Items': [], 'Count': 0, 'ScannedCount': 4}
+    crud_service = CrudService(logger=mock_logger, table=table)
+    filter_expression = Attr('deleted').eq(False) & Attr('amount').gte(5)
+
+    records = crud_service.iter_items(pk='User#1', gsi1=True, filter_expression=filter_expression)
+
+    assert list(records) == []
+    assert records.scanned_count == 4
+    assert table.query.call_args.kwargs['FilterExpression'] == filter_expression
+
+
+def test_scan_page_of_segment():
+    table = MagicMock()
+    table.scan.return_value = {'Items': [{'PK': 'User#1'}], 'LastEvaluatedKey': {'PK': 'User#1', 'SK': 'Record#1'}}
+    crud_service = CrudService(logger=mock_logger, table=table)
+
+    items, last_evaluated_key = crud_service.scan_page(segment=2, total_segments=4, limit=10,
+                                                       exclusive_start_key={'PK': 'User#0', 'SK': 'Record#0'},
+                                                       fields=['PK'])
+
+    assert items == [{'PK': 'User#1'}]
+    assert last_evaluated_key == {'PK': 'User#1', 'SK': 'Record#1'}
+    table.scan.assert_called_once_with(Segment=2, TotalSegments=4, Limit=10,
+                                       ExclusiveStartKey={'PK': 'User#0', 'SK': 'Record#0'},
+                                       ProjectionExpression='#field0',
+                                       ExpressionAttributeNames={'#field0': 'PK'})
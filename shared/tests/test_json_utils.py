@@ -0,0 +1,58 @@
+from decimal import Decimal
+from uuid import UUID
+
+import pytest
+
+from shared.json_utils import OrJsonCodec, SimpleJsonCodec, get_json_codec, json_string_to_dict
+from shared.models.operation_model import OperationType
+
+SAMPLE_PAYLOADS = [
+    {'id': UUID('1b2bbb74-8f7f-4f4c-a4f7-47dc8c4c0d7e'), 'type': OperationType.ADDITION},
+    {'amount': Decimal('1'), 'balance': Decimal('-20'), 'response': Decimal('1.50'), 'big': Decimal('1E+2')},
+    {'data': [{'nested': [Decimal('0.000001'), None, True, 'ñandú', '"quoted"\n']}], 'float': 0.5},
+    {'small': 1e-07, 'big': 1.5e16},
+    {'big_int': 2 ** 70},
+    {1: 'int key'},
+    'plain string',
+]
+
+
+@pytest.mark.parametrize('payload', SAMPLE_PAYLOADS)
+def test_codecs_are_byte_identical(payload):
+    pytest.importorskip('orjson')
+    reference = SimpleJsonCodec()
+
+    assert OrJsonCodec(fallback=reference).dumps(payload) == reference.dumps(payload)
+
+
+@pytest.mark.parametrize('data', [
+    '{"a": [1, 2.5, "b", null], "ñ": "\\u00f1"}',
+    b'{"balance": -20, "small": 1e-07}',
+    '{"big_int": 1180591620717411303424}',
+    '[NaN, Infinity]',
+    '"\\ud800"',
+])
+def test_codecs_decode_to_same_value(data):
+    pytest.importorskip('orjson')
+    reference = SimpleJsonCodec()
+    decoded = OrJsonCodec(fallback=reference).loads(data)
+
+    assert repr(decoded) == repr(reference.loads(data))
+
+
+def test_simplejson_codec_output():
+    payload = {'id': UUID('1b2bbb74-8f7f-4f4c-a4f7-47dc8c4c0d7e'), 'type': OperationType.ADDITION,
+               'response': Decimal('1.50')}
+
+    assert SimpleJsonCodec().dumps(payload) == \
+           '{"id": "1b2bbb74-8f7f-4f4c-a4f7-47dc8c4c0d7e", "type": "ADDITION", "response": 1.50}'
+    assert SimpleJsonCodec().dumps({'name': 'ñandú'}) == '{"name": "\\u00f1and\\u00fa"}'
+
+
+def test_get_json_codec_by_name():
+    assert get_json_codec('simplejson').name == 'simplejson'
+    assert get_json_codec('auto').name in ('simplejson', 'orjson')
+
+
+def test_json_string_to_dict():
+    assert json_string_to_dict('{"a":[1,2.5,"b"]}') == {'a': [1, 2.5, 'b']}
@@ -0,0 +1,86 @@
+import pytest
+from mock import MagicMock
+
+from shared.error_handling import HTTPException
+from shared.models.operation_model import OperationType
+from shared.operation_catalog import OperationCatalog
+
+mock_logger = MagicMock()
+mock_crud_service = MagicMock()
+
+OPERATIONS_DB = [
+    {'PK': 'Operation', 'SK': 'Operation#08a76cbd-7fa0-42e6-89c5-4c3e71c45101',
+     'entity': 'OPERATION', 'type': 'ADDITION', 'cost': 1},
+    {'PK': 'Operation', 'SK': 'Operation#36d7f5da-d185-4585-8d0b-1dc62f5b0f85',
+     'entity': 'OPERATION', 'type': 'RANDOM_STRING', 'cost': 6}
+]
+
+
+def reset_mocks():
+    mock_crud_service.reset_mock()
+    mock_crud_service.list_items.return_value = OPERATIONS_DB
+    mock_crud_service.get.return_value = {'PK': 'Operation', 'SK': 'CatalogVersion', 'version': 1}
+
+
+def test_operation_catalog_loads_once():
+    reset_mocks()
+    catalog = OperationCatalog(logger=mock_logger, crud_service=mock_crud_service, ttl_seconds=300)
+
+    addition = catalog.get_operation(OperationType.ADDITION)
+    random_string = catalog.get_operation(OperationType.RANDOM_STRING)
+
+    assert addition.operation_id == '08a76cbd-7fa0-42e6-89c5-4c3e71c45101'
+    assert random_string.cost == 6
+    assert mock_crud_service.list_items.call_count == 1
+    assert catalog.stats() == {'hits': 1, 'misses': 1, 'loads': 1, 'version': '1'}
+
+
+def test_operation_catalog_expired_with_same_version_is_not_reloaded():
+    reset_mocks()
+    catalog = OperationCatalog(logger=mock_logger, crud_service=mock_crud_service, ttl_seconds=0)
+
+    catalog.get_operation(OperationType.ADDITION)
+    catalog.get_operation(OperationType.ADDITION)
+
+    assert mock_crud_service.list_items.call_count == 1
+    assert catalog.misses == 2
+
+
+def test_operation_catalog_expired_with_new_version_is_reloaded():
+    reset_mocks()
+    catalog = OperationCatalog(logger=mock_logger, crud_service=mock_crud_service, ttl_seconds=0)
+
+    catalog.get_operation(OperationType.ADDITION)
+    mock_crud_service.get.return_value = {'PK': 'Operation', 'SK': 'CatalogVersion', 'version': 2}
+    catalog.get_operation(OperationType.ADDITION)
+
+    assert mock_crud_service.list_items.call_count == 2
+    assert catalog.version == '2'
+
+
+def test_operation_catalog_creates_missing_version_stamp():
+    reset_mocks()
+    mock_crud_service.get.return_value = None
+    mock_crud_service.upsert_item_attributes.return_value = {'PK': 'Operation', 'SK': 'CatalogVersion',
+                                                             'version': 3}
+    catalog = OperationCatalog(logger=mock_logger, crud_service=mock_crud_service, ttl_seconds=0)
+
+    catalog.get_operation(OperationType.ADDITION)
+
+    assert catalog.version == '3'
+    kwargs = mock_crud_service.upsert_item_attributes.call_args.kwargs
+    assert kwargs['sk'] == 'CatalogVersion'
+    assert kwargs['update_expression'] == 'SET #version = if_not_exists(#version, :version)'
+
+
+def test_operation_catalog_unknown_operation_type():
+    reset_mocks()
+    catalog = OperationCatalog(logger=mock_logger, crud_service=mock_crud_service)
+
+    with pytest.raises(HTTPException):
+        catalog.get_operation(OperationType.DIVISION)
+    with pytest.raises(HTTPException):
+        catalog.get_operation(OperationType.DIVISION)
+
+    assert mock_crud_service.list_items.call_count == 1
+    assert catalog.stats()['hits'] == 1
@@ -1,3 +1,5 @@
+from decimal import Decimal
+
 import pytest
 from pydantic import ValidationError
 
@@ -37,3 +39,12 @@ def test_operation_json_serialization():
     assert 'operation_id' in operation_out_dict.keys()
     for key, value in data.items():
         assert operation_out_dict[key] == value
+
+
+def test_operation_from_db_items_matches_model_dict():
+    item = OperationIN(**OPERATION_CREATE_DATA_VALID).dict()
+    db_items = [item, {**item, 'cost': Decimal('4')}]
+
+    expected = [OperationOUT(**dict(db_item)).dict() for db_item in db_items]
+
+    assert OperationOUT.from_db_items(db_items) == expected
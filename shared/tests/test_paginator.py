@@ -3,7 +3,7 @@ from mock import MagicMock
 
 from shared.error_handling import HTTPException
 from shared.fixture_utils import json_fixture
-from shared.pagination import Paginator
+from shared.pagination import Paginator, CursorPaginator
 
 mock_logger = MagicMock()
 
@@ -68,3 +68,33 @@ def test_paginator_parameter_must_be_numeric():
         Paginator(logger=mock_logger,
                   page="WORLD",
                   per_page="HELLO")
+
+
+def test_cursor_paginator_round_trip():
+    last_evaluated_key = {'PK': 'User#1234', 'SK': 'Record#5678'}
+    paginator = CursorPaginator(logger=mock_logger,
+                                cursor='',
+                                per_page="2")
+    paginator.set_next_cursor(last_evaluated_key=last_evaluated_key)
+    next_page_paginator = CursorPaginator(logger=mock_logger,
+                                          cursor=paginator.next_cursor,
+                                          per_page="2")
+
+    assert paginator.exclusive_start_key is None
+    assert next_page_paginator.exclusive_start_key == last_evaluated_key
+
+
+def test_cursor_paginator_last_page_has_no_next_cursor():
+    paginator = CursorPaginator(logger=mock_logger,
+                                cursor='',
+                                per_page="2")
+    paginator.set_next_cursor(last_evaluated_key=None)
+
+    assert paginator.next_cursor is None
+
+
+def test_cursor_paginator_invalid_cursor():
+    with pytest.raises(HTTPException):
+        CursorPaginator(logger=mock_logger,
+                        cursor="not-a-cursor",
+                        per_page="2")
@@ -0,0 +1,72 @@
+from mock import MagicMock
+
+from shared.random_pool import (RandomStringPool, generate_random_strings, get_random_org_alphabet,
+                                get_random_pool_spec, RANDOM_ORG_STRING_QUERY_PARAMS)
+
+mock_logger = MagicMock()
+
+
+def _pool_item(random_string: str) -> dict:
+    return {'PK': 'RandomPool#len8', 'SK': f'String#{random_string}', 'random_string': random_string}
+
+
+def test_get_random_pool_spec():
+    assert get_random_pool_spec(RANDOM_ORG_STRING_QUERY_PARAMS) == 'len8-digits-upperalpha-loweralpha'
+    assert get_random_pool_spec({'len': 4, 'digits': 'on', 'loweralpha': 'off'}) == 'len4-digits'
+
+
+def test_claim_deletes_candidate():
+    crud_service = MagicMock()
+    crud_service.list_items_page.return_value = ([_pool_item('PKXculUm')], None)
+    crud_service.delete_if_exists.return_value = _pool_item('PKXculUm')
+    pool = RandomStringPool(logger=mock_logger, crud_service=crud_service, spec='len8')
+
+    assert pool.claim() == 'PKXculUm'
+    crud_service.delete_if_exists.assert_called_once_with(pk='RandomPool#len8', sk='String#PKXculUm')
+
+
+def test_claim_tries_next_candidate_when_already_claimed():
+    crud_service = MagicMock()
+    crud_service.list_items_page.side_effect = [([_pool_item('a')], None), ([_pool_item('b')], None)]
+    crud_service.delete_if_exists.side_effect = [None, _pool_item('b')]
+    pool = RandomStringPool(logger=mock_logger, crud_service=crud_service, spec='len8')
+
+    assert pool.claim() == 'b'
+    assert crud_service.delete_if_exists.call_count == 2
+
+
+def test_claim_wraps_around_and_returns_none_when_empty():
+    crud_service = MagicMock()
+    crud_service.list_items_page.return_value = ([], None)
+    pool = RandomStringPool(logger=mock_logger, crud_service=crud_service, spec='len8')
+
+    assert pool.claim() is None
+    assert crud_service.list_items_page.call_args.kwargs['condition_value'] == 'String#'
+    crud_service.delete_if_exists.assert_not_called()
+
+
+def test_refill_writes_unique_strings():
+    crud_service = MagicMock()
+    pool = RandomStringPool(logger=mock_logger, crud_service=crud_service, spec='len8')
+
+    assert pool.refill(random_strings=['a', 'b', 'a']) == 2
+    items = crud_service.batch_create.call_args.kwargs['items']
+    assert sorted(item['SK'] for item in items) == ['String#a', 'String#b']
+
+
+def test_generate_random_strings_matches_random_org_params():
+    alphabet = get_random_org_alphabet(RANDOM_ORG_STRING_QUERY_PARAMS)
+    random_strings = generate_random_strings(count=5000, length=8, alphabet=alphabet)
+
+    assert len(alphabet) == 62
+    assert len(random_strings) == len(set(random_strings)) == 5000
+    assert all(len(random_string) == 8 for random_string in random_strings)
+    assert set(''.join(random_strings)) == set(alphabet)
+
+
+def test_generate_random_strings_with_single_charset():
+    alphabet = get_random_org_alphabet({'len': 4, 'digits': 'on'})
+    random_strings = generate_random_strings(count=100, length=4, alphabet=alphabet)
+
+    assert alphabet == '0123456789'
+    assert all(random_string.isdigit() and len(random_string) == 4 for random_string in random_strings)
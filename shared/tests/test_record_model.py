@@ -1,8 +1,10 @@
+from decimal import Decimal
+
 import pytest
 from pydantic import ValidationError
 
 from shared.fixture_utils import json_fixture
-from shared.models.record_model import RecordIN, RecordOUT
+from shared.models.record_model import RecordIN, RecordOUT, get_balance_sort_key
 
 RECORD_CREATE_DATA_VALID = json_fixture('record_create_data_valid.json')
 RECORD_CREATE_DATA_INVALID = json_fixture('record_create_data_invalid.json')
@@ -24,6 +26,18 @@ def test_record_create_success():
         assert record_dict[key] == value
 
 
+def test_balance_sort_key_preserves_numeric_order():
+    balances = [0, 9, 10, 100, 25, Decimal(7)]
+
+    sort_keys = [get_balance_sort_key(balance) for balance in balances]
+
+    assert sort_keys[1] == 'Record#0000000000000009'
+    assert sorted(sort_keys) == [get_balance_sort_key(balance) for balance in sorted(balances)]
+    assert RecordIN(**RECORD_CREATE_DATA_VALID).GSI2SK == get_balance_sort_key(RECORD_CREATE_DATA_VALID['user_balance'])
+    with pytest.raises(ValueError):
+        get_balance_sort_key(10 ** 16)
+
+
 def test_invalid_record_input_raises_validation_error():
     data = RECORD_CREATE_DATA_INVALID
     with pytest.raises(ValidationError):
@@ -39,3 +53,21 @@ def test_record_json_serialization():
     assert 'record_id' in record_out_dict.keys()
     for key, value in data.items():
         assert record_out_dict[key] == value
+
+
+def test_record_from_db_items_matches_model_dict():
+    item = RecordIN(**RECORD_CREATE_DATA_VALID).dict()
+    db_items = [
+        item,
+        {**item, 'amount': Decimal('3'), 'user_balance': Decimal('12'), 'date': Decimal('1678232290113'),
+         'operation_response': Decimal('2.50')},
+        {key: value for key, value in item.items() if key not in ('entity', 'deleted')}
+    ]
+
+    expected = [RecordOUT(**dict(db_item)).dict() for db_item in db_items]
+    result = RecordOUT.from_db_items(db_items)
+
+    assert result == expected
+    assert [list(record) for record in result] == [list(record) for record in expected]
+    assert [type(record['amount']) for record in result] == [int, int, int]
+    assert 'SK' in db_items[0]
@@ -0,0 +1,76 @@
+import pytest
+import requests
+from mock import MagicMock, patch
+
+from shared.requests_utils import HttpClient, request_with_retry
+
+mock_logger = MagicMock()
+mock_sleep = MagicMock()
+
+
+def _response(status_code: int) -> MagicMock:
+    response = MagicMock()
+    response.status_code = status_code
+    return response
+
+
+@pytest.fixture()
+def session() -> MagicMock:
+    mock_sleep.reset_mock()
+    return MagicMock()
+
+
+@patch('shared.requests_utils.sleep', mock_sleep)
+def test_request_with_retry_success_does_not_sleep(session):
+    session.request.return_value = _response(200)
+    http_client = HttpClient(session=session, connect_timeout=1, read_timeout=2)
+
+    response = request_with_retry(logger=mock_logger, url='https://example.com',
+                                  query_params={'num': 10}, http_client=http_client)
+
+    assert response.status_code == 200
+    mock_sleep.assert_not_called()
+    session.request.assert_called_once_with(method='GET', url='https://example.com', headers=None,
+                                            params={'num': 10}, timeout=(1, 2))
+
+
+@patch('shared.requests_utils.sleep', mock_sleep)
+def test_request_with_retry_retries_server_errors(session):
+    session.request.side_effect = [_response(503), requests.ConnectionError(), _response(200)]
+    http_client = HttpClient(session=session)
+
+    response = request_with_retry(logger=mock_logger, url='https://example.com', http_client=http_client)
+
+    assert response.status_code == 200
+    assert session.request.call_count == 3
+    assert mock_sleep.call_count == 2
+
+
+@patch('shared.requests_utils.sleep', mock_sleep)
+def test_request_with_retry_does_not_retry_client_errors(session):
+    session.request.return_value = _response(404)
+    http_client = HttpClient(session=session)
+
+    response = request_with_retry(logger=mock_logger, url='https://example.com', http_client=http_client)
+
+    assert response.status_code == 404
+    session.request.assert_called_once()
+
+
+@patch('shared.requests_utils.sleep', mock_sleep)
+def test_request_with_retry_raises_after_max_retries(session):
+    session.request.side_effect = requests.Timeout()
+    http_client = HttpClient(session=session)
+
+    with pytest.raises(requests.Timeout):
+        request_with_retry(logger=mock_logger, url='https://example.com', max_retries=2, http_client=http_client)
+
+    assert session.request.call_count == 3
+
+
+def test_backoff_grows_exponentially_up_to_cap():
+    http_client = HttpClient(session=MagicMock(), backoff_base_milliseconds=100, backoff_cap_milliseconds=1000)
+
+    with patch('shared.requests_utils.random.uniform', lambda low, high: high):
+        assert [http_client.get_backoff_seconds(attempt=attempt) for attempt in range(6)] == \
+               [0.1, 0.2, 0.4, 0.8, 1.0, 1.0]
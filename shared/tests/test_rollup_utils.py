@@ -0,0 +1,39 @@
+from shared.rollup_utils import get_rollup_bucket, get_user_rollup_updates
+
+USER_ID = '77d46173-1d59-48d0-8b75-eaa76eb857b2'
+# 2023-03-07T13:41:25Z, 2023-03-07T14:00:00Z and 2023-03-07T14:00:00Z
+RECORDS = [
+    {'record_id': '1', 'amount': 1, 'user_balance': 29, 'date': 1678196485853},
+    {'record_id': '2', 'amount': 6, 'user_balance': 23, 'date': 1678197600000},
+    {'record_id': '3', 'amount': 1, 'user_balance': 22, 'date': 1678197600000}
+]
+
+
+def test_get_rollup_bucket():
+    assert get_rollup_bucket(date=1678196485853, granularity='hour') == '2023-03-07T13'
+    assert get_rollup_bucket(date=1678196485853, granularity='day') == '2023-03-07'
+    assert get_rollup_bucket(date=1678196485853, granularity='month') == '2023-03'
+
+
+def test_get_user_rollup_updates_one_update_per_bucket():
+    updates = {update['Update']['Key']['SK']: update['Update']['ExpressionAttributeValues']
+               for update in get_user_rollup_updates(user_id=USER_ID, records=RECORDS)}
+
+    assert set(updates) == {'Rollup#hour#2023-03-07T13', 'Rollup#hour#2023-03-07T14',
+                            'Rollup#day#2023-03-07', 'Rollup#month#2023-03'}
+    assert updates['Rollup#hour#2023-03-07T13'][':operation_count'] == 1
+    assert updates['Rollup#hour#2023-03-07T14'][':operation_count'] == 2
+    assert updates['Rollup#hour#2023-03-07T14'][':credit_spent'] == 7
+    day = updates['Rollup#day#2023-03-07']
+    assert (day[':operation_count'], day[':credit_spent']) == (3, 8)
+    # the last Record saved in the bucket sets its ending balance
+    assert (day[':ending_balance'], day[':last_operation_date']) == (22, 1678197600000)
+
+
+def test_get_user_rollup_updates_are_unconditional_adds():
+    update = get_user_rollup_updates(user_id=USER_ID, records=RECORDS[:1])[0]['Update']
+
+    assert update['Key'] == {'PK': f'User#{USER_ID}', 'SK': 'Rollup#hour#2023-03-07T13'}
+    assert update['UpdateExpression'].startswith('ADD #operation_count :operation_count, '
+                                                 '#credit_spent :credit_spent SET ')
+    assert 'ConditionExpression' not in update
@@ -0,0 +1,138 @@
+from botocore.exceptions import ClientError
+from mock import MagicMock, patch
+
+from shared.sns_service import SnsService
+
+mock_logger = MagicMock()
+
+
+def _not_found_error():
+    return ClientError({'Error': {'Code': 'NotFound', 'Message': 'Topic does not exist'}}, 'Publish')
+
+
+def test_publish_message_memoizes_topic_arn():
+    sns_client = MagicMock()
+    sns_client.create_topic.return_value = {'TopicArn': 'arn:topic'}
+    sns_client.publish.return_value = {'MessageId': 'message-id'}
+    sns_service = SnsService(logger=mock_logger, sns_client=sns_client)
+
+    sns_service.publish_message(topic_name='topic', message='1')
+    result = sns_service.publish_message(topic_name='topic', message='2')
+
+    assert result == 'message-id'
+    sns_client.create_topic.assert_called_once_with(Name='topic')
+    assert sns_client.publish.call_args.kwargs['TopicArn'] == 'arn:topic'
+
+
+def test_publish_message_uses_injected_topic_arn():
+    sns_client = MagicMock()
+    sns_client.publish.return_value = {'MessageId': 'message-id'}
+    sns_service = SnsService(logger=mock_logger, sns_client=sns_client,
+                             topic_arns={'topic': 'arn:injected', 'other': ''})
+
+    sns_service.publish_message(topic_name='topic', message='1', attributes={'operation_type': 'ADDITION'})
+
+    sns_client.create_topic.assert_not_called()
+    assert sns_client.publish.call_args.kwargs['TopicArn'] == 'arn:injected'
+    assert sns_client.publish.call_args.kwargs['MessageAttributes'] == {
+        'operation_type': {'DataType': 'String', 'StringValue': 'ADDITION'}
+    }
+
+
+def test_publish_message_invalidates_topic_arn_when_not_found():
+    sns_client = MagicMock()
+    sns_client.create_topic.return_value = {'TopicArn': 'arn:new'}
+    sns_client.publish.side_effect = [_not_found_error(), {'MessageId': 'message-id'}]
+    sns_service = SnsService(logger=mock_logger, sns_client=sns_client, topic_arns={'topic': 'arn:old'})
+
+    result = sns_service.publish_message(topic_name='topic', message='1')
+
+    assert result == 'message-id'
+    sns_client.create_topic.assert_called_once_with(Name='topic')
+    assert sns_client.publish.call_args.kwargs['TopicArn'] == 'arn:new'
+
+
+def _batch_response(entries, failed_ids=(), sender_fault=False):
+    return {
+        'Successful': [{'Id': entry['Id'], 'MessageId': f"message-{entry['Id']}"}
+                       for entry in entries if entry['Id'] not in failed_ids],
+        'Failed': [{'Id': entry['Id'], 'Code': 'InternalError', 'Message': 'Error', 'SenderFault': sender_fault}
+                   for entry in entries if entry['Id'] in failed_ids]
+    }
+
+
+def test_publish_messages_chunks_in_batches_of_ten():
+    sns_client = MagicMock()
+    sns_client.publish_batch.side_effect = lambda **kwargs: _batch_response(kwargs['PublishBatchRequestEntries'])
+    sns_service = SnsService(logger=mock_logger, sns_client=sns_client, topic_arns={'topic': 'arn:topic'})
+
+    result = sns_service.publish_messages(topic_name='topic',
+                                          messages=((str(i), {'operation_type': 'ADDITION'}) for i in range(25)))
+
+    assert sns_client.publish_batch.call_count == 3
+    assert [len(c.kwargs['PublishBatchRequestEntries']) for c in sns_client.publish_batch.call_args_list] == [10, 10, 5]
+    assert [entry['Index'] for entry in result['Successful']] == list(range(25))
+    assert result['Successful'][0]['MessageId'] == 'message-0'
+    assert result['Failed'] == []
+
+
+@patch('shared.sns_service.sleep')
+def test_publish_messages_retries_only_failed_entries(mock_sleep):
+    sns_client = MagicMock()
+    sns_client.publish_batch.side_effect = [
+        _batch_response([{'Id': '0'}, {'Id': '1'}, {'Id': '2'}], failed_ids=('1',)),
+        _batch_response([{'Id': '1'}])
+    ]
+    sns_service = SnsService(logger=mock_logger, sns_client=sns_client, topic_arns={'topic': 'arn:topic'})
+
+    result = sns_service.publish_messages(topic_name='topic', messages=[('a', None), ('b', None), ('c', None)])
+
+    retried_entries = sns_client.publish_batch.call_args_list[1].kwargs['PublishBatchRequestEntries']
+    assert retried_entries == [{'Id': '1', 'Message': 'b'}]
+    mock_sleep.assert_called_once()
+    assert 0 <= mock_sleep.call_args.args[0] <= 0.1
+    assert sorted(entry['Index'] for entry in result['Successful']) == [0, 1, 2]
+    assert result['Failed'] == []
+
+
+def test_publish_messages_reports_failures():
+    sns_client = MagicMock()
+    sns_client.publish_batch.side_effect = lambda **kwargs: _batch_response(kwargs['PublishBatchRequestEntries'],
+                                                                            failed_ids=('0',), sender_fault=True)
+    sns_service = SnsService(logger=mock_logger, sns_client=sns_client, topic_arns={'topic': 'arn:topic'})
+
+    result = sns_service.publish_messages(topic_name='topic', messages=[('a', None), ('b', None)])
+
+    assert sns_client.publish_batch.call_count == 1
+    assert result['Failed'] == [{'Index': 0, 'Code': 'InternalError', 'Message': 'Error', 'SenderFault': True}]
+    assert result['Successful'] == [{'Index': 1, 'MessageId': 'message-1'}]
+
+
+@patch('shared.sns_service.sleep')
+def test_publish_messages_backoff_grows_between_attempts(mock_sleep):
+    sns_client = MagicMock()
+    sns_client.publish_batch.side_effect = lambda **kwargs: _batch_response(kwargs['PublishBatchRequestEntries'],
+                                                                            failed_ids=('0',))
+    sns_service = SnsService(logger=mock_logger, sns_client=sns_client, topic_arns={'topic': 'arn:topic'})
+
+    with patch('shared.sns_service.random.uniform', side_effect=lambda low, high: high):
+        result = sns_service.publish_messages(topic_name='topic', messages=[('a', None)], max_attempts=4)
+
+    assert [call.args[0] for call in mock_sleep.call_args_list] == [0.1, 0.2, 0.4]
+    assert [entry['Index'] for entry in result['Failed']] == [0]
+
+
+@patch('shared.sns_service.sleep')
+def test_publish_messages_returns_partial_result_when_a_call_raises(mock_sleep):
+    sns_client = MagicMock()
+    sns_client.publish_batch.side_effect = [
+        _batch_response([{'Id': str(i)} for i in range(10)], failed_ids=('3',)),
+        ClientError({'Error': {'Code': 'InternalError', 'Message': 'Error'}}, 'PublishBatch')
+    ]
+    sns_service = SnsService(logger=mock_logger, sns_client=sns_client, topic_arns={'topic': 'arn:topic'})
+
+    result = sns_service.publish_messages(topic_name='topic', messages=((str(i), None) for i in range(15)))
+
+    assert len(result['Successful']) == 9
+    assert [entry['Index'] for entry in result['Failed']] == [3] + list(range(10, 15))
+    assert {entry['Code'] for entry in result['Failed']} == {'PublishBatchError'}
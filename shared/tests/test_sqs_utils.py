@@ -0,0 +1,40 @@
+from mock import MagicMock
+
+from shared.sqs_utils import group_messages_by_user, get_batch_item_failures
+
+mock_logger = MagicMock()
+
+
+def test_group_messages_by_user_keeps_order():
+    events = [
+        {'messageId': '1', 'body': '{"user_id": "user-1", "record_id": "a"}'},
+        {'messageId': '2', 'body': '{"user_id": "user-2", "record_id": "b"}'},
+        {'messageId': '3', 'body': '{"user_id": "user-1", "record_id": "c"}'}
+    ]
+
+    result, malformed_message_ids = group_messages_by_user(logger=mock_logger, events=events)
+
+    assert malformed_message_ids == []
+    assert list(result.keys()) == ['user-1', 'user-2']
+    assert [body['record_id'] for _, body in result['user-1']] == ['a', 'c']
+    assert [event['messageId'] for event, _ in result['user-2']] == ['2']
+
+
+def test_group_messages_by_user_reports_malformed_messages():
+    events = [
+        {'messageId': '1', 'body': '{"user_id": "user-1", "record_id": "a"}'},
+        {'messageId': '2', 'body': '{"user_id": '},
+        {'messageId': '3', 'body': '["user-1"]'},
+        {'messageId': '4', 'body': '{"record_id": "d"}'}
+    ]
+
+    result, malformed_message_ids = group_messages_by_user(logger=mock_logger, events=events)
+
+    assert malformed_message_ids == ['2', '3', '4']
+    assert [event['messageId'] for event, _ in result['user-1']] == ['1']
+
+
+def test_get_batch_item_failures():
+    assert get_batch_item_failures(message_ids=['1', '3']) == {
+        'batchItemFailures': [{'itemIdentifier': '1'}, {'itemIdentifier': '3'}]
+    }
@@ -0,0 +1,65 @@
+from mock import MagicMock
+
+from shared.models.operation_model import OperationType
+from shared.stats_utils import add_records_to_stats_bounds, get_user_stats_bounds, get_user_stats_update
+
+mock_crud_service = MagicMock()
+
+USER_ID = '77d46173-1d59-48d0-8b75-eaa76eb857b2'
+RECORDS = [
+    {'record_id': '1', 'amount': 1, 'user_balance': 29, 'date': 1678196485853},
+    {'record_id': '2', 'amount': 6, 'user_balance': 23, 'date': 1678196485900},
+    {'record_id': '3', 'amount': 1, 'user_balance': 22, 'date': 1678196486000}
+]
+OPERATION_TYPES = [OperationType.ADDITION, OperationType.RANDOM_STRING, OperationType.ADDITION]
+
+
+def test_get_user_stats_bounds_reads_only_the_bounds():
+    mock_crud_service.get.return_value = None
+
+    assert get_user_stats_bounds(crud_service=mock_crud_service, user_id=USER_ID) is None
+    mock_crud_service.get.assert_called_once_with(pk=f'User#{USER_ID}',
+                                                  sk='Stats',
+                                                  consistent_read=True,
+                                                  fields=['first_operation_date', 'last_operation_date',
+                                                          'min_balance', 'max_balance'])
+
+
+def test_add_records_to_stats_bounds_without_stats():
+    assert add_records_to_stats_bounds(records=RECORDS) == {'first_operation_date': 1678196485853,
+                                                            'last_operation_date': 1678196486000,
+                                                            'min_balance': 22,
+                                                            'max_balance': 29}
+
+
+def test_add_records_to_stats_bounds_moves_only_the_bounds_beyond_the_stored_ones():
+    bounds = {'first_operation_date': 1678000000000,
+              'last_operation_date': 1678000000000,
+              'min_balance': 5,
+              'max_balance': 30}
+
+    assert add_records_to_stats_bounds(records=RECORDS, bounds=bounds) == {'first_operation_date': 1678000000000,
+                                                                           'last_operation_date': 1678196486000,
+                                                                           'min_balance': 5,
+                                                                           'max_balance': 30}
+
+
+def test_get_user_stats_update_adds_counters_in_one_update():
+    bounds = add_records_to_stats_bounds(records=RECORDS)
+    update = get_user_stats_update(user_id=USER_ID,
+                                   records=RECORDS,
+                                   operation_types=OPERATION_TYPES,
+                                   bounds=bounds)['Update']
+
+    assert update['Key'] == {'PK': f'User#{USER_ID}', 'SK': 'Stats'}
+    assert update['UpdateExpression'].startswith('ADD #operation_count :operation_count, ')
+    assert '#min_balance = :min_balance' in update['UpdateExpression']
+    assert 'ConditionExpression' not in update
+    names = update['ExpressionAttributeNames']
+    values = update['ExpressionAttributeValues']
+    assert values[':operation_count'] == 3
+    assert values[':credit_spent'] == 8
+    counters = {names[name]: values[name.replace('#', ':')] for name in names if name.startswith('#type_')}
+    assert counters == {'operation_count_ADDITION': 2, 'credit_spent_ADDITION': 2,
+                        'operation_count_RANDOM_STRING': 1, 'credit_spent_RANDOM_STRING': 6}
+    assert {attribute: values[f':{attribute}'] for attribute in bounds} == bounds